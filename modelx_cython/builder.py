@@ -12,7 +12,7 @@ import numbers
 # You should have received a copy of the GNU Lesser General Public
 # License along with this library.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Union, Sequence, Mapping, Dict, Tuple
+from typing import Union, Sequence, Mapping, Dict, Tuple, Optional
 import logging
 
 try:
@@ -20,21 +20,34 @@ try:
 except ImportError:  # Python -3.9
     NoneType = type(None)
 
+import math
 from functools import cached_property
 
-from modelx_cython.typedefs import get_type_expr
+from modelx_cython.typedefs import get_type_expr, get_buffer_type_expr, get_dtype_name
 from modelx_cython.config import TransSpec
 from modelx_cython.tracer import RuntimeCellsInfo, MxCallTraceLogger
 from modelx_cython.parser import ModuleVisitor, LexicalCellsInfo, LexicalRefInfo
+from modelx_cython.inference import TypeInferrer
+from modelx_cython.nogil import NogilAnalyzer
+from modelx_cython.columns import ColumnAnalyzer, Columns
+from modelx_cython.recursion import Recursion, find_recursion
+from modelx_cython.steps import StepGroup, find_step_groups
+from modelx_cython.constants import find_constants
+from modelx_cython.shared import find_shared_cells
 
 from modelx_cython.consts import (
     SPACE_PREF,
-    MODULE_PREF
+    MODULE_PREF,
+    CY_MOD
 )
-from modelx_cython.typedefs import str_to_type, normalize_type
+from modelx_cython.typedefs import (
+    str_to_type, normalize_type, CY_BITS_T, CY_BITS_T_P)
 
 _logger = logging.getLogger(__name__)
 
+CACHE_ARRAY = "array"       # Fixed-size C arrays in each space
+CACHE_BUFFER = "buffer"     # Memoryviews allocated and grown on demand
+
 
 class CombinedCellsInfo(LexicalCellsInfo):
     parent: 'ClassInfo'
@@ -77,13 +90,22 @@ class CombinedCellsInfo(LexicalCellsInfo):
     def has_typeinfo(self):
         return bool(self._rt)
 
+    def get_max_arg(self, arg: str) -> Optional[int]:
+        """Highest value of arg traced, None if not traced"""
+        assert self.has_typeinfo()
+        return self._rt.max_args.get(arg)
+
     def has_args(self):
         return bool(self.params)
 
+    def get_argtype(self, arg: str) -> type:
+        assert self.has_typeinfo()
+        assert arg in self._rt.arg_types
+        return self._rt.arg_types[arg]
+
     def get_argtype_expr(self, arg: str, c_style=False) -> str:
         if self.has_typeinfo():
-            assert arg in self._rt.arg_types
-            return get_type_expr(self._rt.arg_types[arg], c_style=c_style)
+            return get_type_expr(self.get_argtype(arg), c_style=c_style)
         else:
             return "object"
 
@@ -114,7 +136,8 @@ class CombinedCellsInfo(LexicalCellsInfo):
 
     def is_arrayable(self):
         assert self.has_args() and self.has_typeinfo()
-        if self.is_int_args and self.is_real_value and not self.is_array_returned:
+        if (self.is_int_args and self.is_real_value and not self.is_array_returned
+                and tuple(self.params) in self.parent.cells_arg_sizes):
             return True
         else:
             return False
@@ -124,8 +147,159 @@ class CombinedCellsInfo(LexicalCellsInfo):
         if not rettype_expr:
             rettype_expr = self.get_rettype_expr(c_style=c_style)
 
-        sizes = self.parent.cells_arg_sizes[tuple(self.params)]
-        return rettype_expr + "".join([f"[{str(i)}]" for i in sizes])
+        lengths = self.parent.get_array_lengths(tuple(self.params))
+        return rettype_expr + "".join([f"[{str(i)}]" for i in lengths])
+
+    @cached_property
+    def has_flags(self) -> str:
+        """How to tell whether values in the array are calculated
+
+        One of :attr:`TransSpec.FLAGS_ARRAY`, :attr:`TransSpec.FLAGS_BITS`
+        and :attr:`TransSpec.FLAGS_NAN`. A cells whose formula returns NaN
+        is calculated on every call if NaN is used as the sentinel.
+        """
+        assert self.is_arrayable()
+        flags = self._spec.get(TransSpec.HAS_FLAGS, TransSpec.FLAGS_ARRAY)
+        if flags == TransSpec.FLAGS_ARRAY:
+            return flags
+        elif flags == TransSpec.FLAGS_BITS:
+            if self.is_buffered():
+                _logger.warning(
+                    f"'{TransSpec.FLAGS_BITS}' for spec '{TransSpec.HAS_FLAGS}' is not supported "
+                    f"by buffers and replaced by '{TransSpec.FLAGS_ARRAY}' in {self.fqname}")
+                return TransSpec.FLAGS_ARRAY
+            return flags
+        elif flags == TransSpec.FLAGS_NAN:
+            if issubclass(self.norm_type, numbers.Integral):
+                raise ValueError(
+                    f"'{TransSpec.FLAGS_NAN}' for spec '{TransSpec.HAS_FLAGS}' "
+                    f"is invalid for integer values of {self.fqname}")
+            return flags
+        else:
+            raise ValueError(f"invalid value for spec '{TransSpec.HAS_FLAGS}': {flags}")
+
+    def get_bits_decl_expr(self, c_style=False):
+        """Return the array type of the packed flags"""
+        assert self.has_flags == TransSpec.FLAGS_BITS
+        typ = CY_BITS_T if c_style else f"{CY_MOD}.{CY_BITS_T_P}"
+        lengths = self.parent.get_array_lengths(tuple(self.params))
+        return typ + f"[{math.ceil(math.prod(lengths) / 8)}]"
+
+    def get_index_exprs(self, indexes: Sequence[str] = ()) -> Sequence[str]:
+        """Return the expressions of the indexes in the arrays for the args
+
+        ``indexes`` are the expressions of the args, the params by default.
+        The args are offset by the starts of the arrays.
+        """
+        starts = self.parent.cells_arg_starts[tuple(self.params)]
+        result = []
+        for p, start in zip(indexes or self.params, starts):
+            if start > 0:
+                result.append(f"{p} - {start}")
+            elif start < 0:
+                result.append(f"{p} + {-start}")
+            else:
+                result.append(p)
+        return result
+
+    def get_flat_index_expr(self, indexes: Sequence[str] = ()):
+        """Return the expression of the index of the flag bit for the args
+
+        ``indexes`` are the expressions of the args, the params by default.
+        """
+        assert self.has_flags == TransSpec.FLAGS_BITS
+        lengths = self.parent.get_array_lengths(tuple(self.params))
+        terms = []
+        for i, p in enumerate(self.get_index_exprs(indexes)):
+            stride = math.prod(lengths[i + 1:])
+            if stride > 1:
+                terms.append(f"({p}) * {stride}" if " " in p else f"{p} * {stride}")
+            else:
+                terms.append(p)
+        return " + ".join(terms)
+
+    def is_buffered(self):
+        return self.parent.module.cache_layout == CACHE_BUFFER and self.is_arrayable()
+
+    def is_hashed(self):
+        """Whether the values are cached in a hash table keyed on the args
+
+        Values of cells with args of numbers not cached in arrays,
+        such as cells with float args, are cached in memoryviews of
+        the keys, the values and the flags of slots of an open addressing
+        hash table instead of a dict. Keys are the bits of the args.
+        """
+        assert self.has_args() and self.has_typeinfo()
+        numeric = (bool, numbers.Integral, numbers.Real)
+        return (not self.is_arrayable() and not self.is_array_returned
+                and normalize_type(self.norm_type) in numeric
+                and all(normalize_type(self.get_argtype(p)) in numeric
+                        for p in self.params))
+
+    def has_overflow(self):
+        """Whether values for args out of the arrays are cached in a dict
+
+        Values of cells cached in arrays are cached in a dict keyed on
+        the args if the args are out of the arrays, so the arrays can be
+        sized to the common range of args. nogil cells raise IndexError
+        instead, as dicts are not accessible without the GIL.
+        """
+        assert self.has_args() and self.has_typeinfo()
+        return self.is_arrayable() and not self.is_nogil()
+
+    def is_real_arg(self, arg: str):
+        assert self.has_args() and self.has_typeinfo()
+        return normalize_type(self._rt.arg_types[arg]) is numbers.Real
+
+    def get_buffer_decl_expr(self, is_flag=False, c_style=False):
+        """Return the memoryview type of the values or the flags"""
+        assert self.is_buffered()
+        typ = bool if is_flag else self.norm_type
+        dims = [":"] * (len(self.params) - 1) + ["::1"]     # C-contiguous
+        return get_buffer_type_expr(typ, c_style=c_style) + "[" + ", ".join(dims) + "]"
+
+    def get_dtype_name(self, is_flag=False):
+        assert self.is_buffered()
+        return get_dtype_name(bool if is_flag else self.norm_type)
+
+    def is_nogil(self):
+        return self.name in self.parent.nogil_cells
+
+    def is_constant(self):
+        return self.name in self.parent.constant_cells
+
+    def is_shared(self):
+        return self.name in self.parent.shared_cells
+
+    @cached_property
+    def loop(self) -> bool:
+        """False if recursive calls are kept as specified"""
+        value = self._spec.get(TransSpec.LOOP, True)
+        if not isinstance(value, bool):
+            raise ValueError(f"invalid value for spec '{TransSpec.LOOP}': {value}")
+        return value
+
+    @cached_property
+    def recursion(self) -> Union[Recursion, NoneType]:
+        """How the values are calculated forward instead of recursively
+
+        None unless the formula calls the cells on the previous index
+        of a parameter down to a base index, and the values are cached
+        in C arrays. See :mod:`modelx_cython.recursion`.
+        """
+        if not (self.loop and self.has_typeinfo() and self.has_args()
+                and self.is_arrayable() and not self.is_buffered()):
+            return None
+
+        formula = self.parent.visitor.formulas.get(self.parent.name, {}).get(self.name)
+        result = find_recursion(self.name, self.params, formula) if formula else None
+        if result and result.base < self.parent.cells_arg_starts[tuple(self.params)][
+                self.params.index(result.param)]:
+            return None     # The base index is out of the arrays
+        if result:
+            _logger.info(f"{self.fqname} is calculated forward on {result.param} "
+                         f"from {result.base}")
+        return result
 
 
 class CombinedRefInfo:
@@ -186,6 +360,8 @@ class ClassInfo:
     params: dict  # name -> CombinedRefInfo
     _cells_max_args: Dict[Tuple[str], Tuple[int]]
     _max_arg_cells: Dict[Tuple[str], Dict[str, str]]  # {(arg,) : {arg: fqname}}
+    _cells_min_args: Dict[Tuple[str], Tuple[int]]
+    _min_arg_cells: Dict[Tuple[str], Dict[str, str]]
 
     def __init__(self, name, module):
         self.name = name
@@ -195,20 +371,28 @@ class ClassInfo:
         self.cells = {}
         self._cells_max_args = {}
         self._max_arg_cells = {}    # keep cells fqname for logging
+        self._cells_min_args = {}
+        self._min_arg_cells = {}
+        self._inferred_args = set()     # Params of cells typed by inference
         self.refs = {}
         self.spaces = []
         self._init_cells()
         self._init_spaces()
         self._init_refs()
         self._add_space_params()
+        if module.infer_types:
+            self._infer_cells()
+
+    def _get_cells_spec(self, name):
+        return self.module.spec.get_spec(self.fqname).get(TransSpec.CELLS, {}).get(name, {})
 
     def _init_cells(self):
-        for name, lx_info in self.visitor.cells_info[self.name].items():
+        for name, lx_info in self.visitor.cells_info.get(self.name, {}).items():
             rt_info = self.logger.cells_info.get(lx_info.fqname, None)
             self.cells[name] = CombinedCellsInfo(
                 self,
                 lx_info, rt_info,
-                self.module.spec.get_spec(self.fqname).get(TransSpec.CELLS, {}).get(name, {})
+                self._get_cells_spec(name)
             )
             if rt_info:
                 args = tuple(rt_info.max_args)
@@ -222,6 +406,29 @@ class ClassInfo:
                         if v > d[k]:
                             d[k] = v
                             self._max_arg_cells[args][k] = lx_info.fqname
+                    self._cells_max_args[args] = tuple(d.values())
+
+                mins = tuple(rt_info.min_args.get(k, 0) for k in args)  # 0 if not traced
+                if args not in self._cells_min_args:
+                    self._cells_min_args[args] = mins
+                    self._min_arg_cells[args] = {k: lx_info.fqname for k in args}
+                else:
+                    d = dict(zip(args, self._cells_min_args[args]))
+                    for k, v in zip(args, mins):
+                        if v < d[k]:
+                            d[k] = v
+                            self._min_arg_cells[args][k] = lx_info.fqname
+                    self._cells_min_args[args] = tuple(d.values())
+
+    def _infer_cells(self):
+        # Give types inferred from formulas to cells not called by the sample
+        inferrer = TypeInferrer(self, self.visitor.formulas.get(self.name, {}))
+        for name, st_info in inferrer.infer().items():
+            lx_info = self.visitor.cells_info[self.name][name]
+            self.cells[name] = CombinedCellsInfo(
+                self, lx_info, st_info, self._get_cells_spec(name)
+            )
+            self._inferred_args.add(tuple(lx_info.params))
 
     def _init_spaces(self):
         self.spaces.extend(self.visitor.spaces.get(self.name, []))
@@ -253,6 +460,93 @@ class ClassInfo:
     def fqname(self):
         return self.module.fqname + "." + self.name
 
+    @cached_property
+    def max_itemspaces(self) -> Union[int, NoneType]:
+        """Maximum number of item spaces to keep, or None for no limit
+
+        Least recently used item spaces are removed when a new one is
+        created beyond the maximum. If 0, item spaces are not kept, and
+        are deleted when the caller releases them, such as after
+        the cells called on them returns.
+        """
+        value = self.module.spec.get_spec(self.fqname).get(TransSpec.MAX_ITEMSPACES, None)
+        if value is None:
+            return None
+        elif isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+            return value
+        else:
+            raise ValueError(f"invalid value for spec '{TransSpec.MAX_ITEMSPACES}': {value}")
+
+    @cached_property
+    def nogil_cells(self) -> frozenset:
+        names = [name for name, cells in self.cells.items()
+                 if not cells.is_special()
+                 and self._get_cells_spec(name).get(TransSpec.NOGIL, False)]
+        if names:
+            analyzer = NogilAnalyzer(self, self.visitor.formulas.get(self.name, {}))
+            return frozenset(analyzer.analyze(names))
+        else:
+            return frozenset()
+
+    @cached_property
+    def columns(self) -> Columns:
+        """Cells calculated over arrays of the values in item spaces
+
+        Empty unless the class has item spaces.
+        See :mod:`modelx_cython.columns`.
+        """
+        if "__call__" not in self.cells:
+            return Columns({}, {})
+
+        result = ColumnAnalyzer(self, self.visitor.formulas.get(self.name, {})).find()
+        for name in sorted(result.exprs):
+            _logger.info(f"{self.cells[name].fqname} is calculated over arrays of item spaces")
+        return result
+
+    @cached_property
+    def step_groups(self) -> Sequence[StepGroup]:
+        """Groups of cells calling each other on previous indexes
+
+        See :mod:`modelx_cython.steps`.
+        """
+        groups = find_step_groups(self, self.visitor.formulas.get(self.name, {}))
+        for group in groups:
+            _logger.info(f"{', '.join(group.cells)} in {self.fqname} "
+                         f"are calculated in steps of {group.param}")
+        return groups
+
+    @cached_property
+    def constant_cells(self) -> Mapping[str, str]:
+        """Cells returning number literals to the literals if folded
+
+        See :mod:`modelx_cython.constants`.
+        """
+        if not self.module.fold_constants:
+            return {}
+
+        result = find_constants(self, self.visitor.formulas.get(self.name, {}))
+        for name, literal in result.items():
+            _logger.info(f"{self.cells[name].fqname} is folded into {literal}")
+        return result
+
+    @cached_property
+    def shared_cells(self) -> frozenset:
+        """Cells sharing values among item spaces
+
+        See :mod:`modelx_cython.shared`. Cells folded into
+        literals are not included as they have no values to share.
+        nogil cells are not included either, as threads evaluating
+        item spaces without the GIL would write the same caches.
+        """
+        if not self.module.share_cells:
+            return frozenset()
+
+        names = find_shared_cells(self, self.visitor.formulas.get(self.name, {}))
+        names -= set(self.constant_cells) | self.nogil_cells
+        for name in sorted(names):
+            _logger.info(f"{self.cells[name].fqname} shares values among item spaces")
+        return frozenset(names)
+
     @cached_property
     def cells_arg_sizes(self) -> Mapping[Tuple[str], Tuple[int]]:
         # params = self.module.spec.get_spec(self.fqname).get(TransSpec.CELLS_PARAMS, {})
@@ -290,6 +584,55 @@ class ClassInfo:
 
         return sizes
 
+    @cached_property
+    def cells_arg_starts(self) -> Mapping[Tuple[str], Tuple[int]]:
+        """Lowest args of the arrays of cells values by params
+
+        The lowest args traced, or lower args specified by
+        ``cells_param_start`` in the spec. Values are in the arrays
+        at the args minus the starts, so arrays of args starting
+        from such as 18 or 2020 do not have elements below them.
+        Arrays shared with cells typed by inference start from 0 or lower,
+        as the args of such cells are not known.
+        """
+        starts = {}
+        params = self.module.spec.get_spec(self.fqname).get(TransSpec.CELLS_PARAM_START, {})
+        for k, v in params.items():     # Tuplize 1-arg
+            if isinstance(k, tuple):
+                starts[k] = v
+            else:
+                starts[(k,)] = (v,)
+
+        for args, mins in self._cells_min_args.items():
+            if args in starts:
+                d = dict(zip(args, starts[args]))
+                for k, v in zip(args, mins):
+                    if v < d[k]:
+                        _logger.info(f"Specified start of {d[k]} for cells parameter {k} in {self.name} is replaced by {v} from {self._min_arg_cells[args][k]}")
+                        d[k] = v
+                starts[args] = tuple(d.values())
+            else:
+                starts[args] = mins
+
+        for args in self._inferred_args:
+            if args in starts:
+                starts[args] = tuple(min(i, 0) for i in starts[args])
+
+        result = {}
+        for args, sizes in self.cells_arg_sizes.items():
+            result[args] = starts.get(args, (0,) * len(args))
+            for k, start, size in zip(args, result[args], sizes):
+                if not start < size:
+                    raise ValueError(
+                        f"invalid value for spec '{TransSpec.CELLS_PARAM_START}': "
+                        f"{start} for {k} in {self.name} is not below the size {size}")
+        return result
+
+    def get_array_lengths(self, args: Tuple[str]) -> Tuple[int]:
+        """Return the lengths of the dimensions of the arrays for args"""
+        return tuple(size - start for size, start
+                     in zip(self.cells_arg_sizes[args], self.cells_arg_starts[args]))
+
 
 class ModuleInfo:
 
@@ -297,15 +640,25 @@ class ModuleInfo:
     visitor: ModuleVisitor
     logger: MxCallTraceLogger
     spec: TransSpec
+    infer_types: bool
+    cache_layout: str
+    fold_constants: bool
+    share_cells: bool
     classes: dict   # class name -> ClassInfo
 
     def __init__(self, fqname: str, visitor: ModuleVisitor, logger: MxCallTraceLogger,
-                 spec: TransSpec):
+                 spec: TransSpec, infer_types: bool = False,
+                 cache_layout: str = CACHE_ARRAY, fold_constants: bool = False,
+                 share_cells: bool = False):
 
         self.fqname = fqname
         self.visitor = visitor
         self.logger = logger
         self.spec = spec
+        self.infer_types = infer_types
+        self.cache_layout = cache_layout
+        self.fold_constants = fold_constants
+        self.share_cells = share_cells
         self.classes = {}
         self._init_classes()
 
@@ -324,6 +677,40 @@ class ModuleInfo:
                         result.append(mod)
         return result
 
+    @cached_property
+    def has_buffers(self):
+        return any(c.is_buffered() for cls in self.classes.values()
+                   for c in cls.cells.values()
+                   if not c.is_special() and c.has_args() and c.has_typeinfo())
+
+    @cached_property
+    def has_tables(self):
+        return any(c.is_hashed() for cls in self.classes.values()
+                   for c in cls.cells.values()
+                   if not c.is_special() and c.has_args() and c.has_typeinfo())
+
+    @cached_property
+    def has_itemspaces(self):
+        return any("__call__" in cls.cells for cls in self.classes.values())
+
+    @cached_property
+    def has_arrays(self):
+        return any(not c.is_buffered() for cls in self.classes.values()
+                   for c in cls.cells.values()
+                   if not c.is_special() and c.has_args() and c.has_typeinfo()
+                   and c.is_arrayable())
+
+    @cached_property
+    def has_nan_flags(self):
+        return any(c.has_flags == TransSpec.FLAGS_NAN for cls in self.classes.values()
+                   for c in cls.cells.values()
+                   if not c.is_special() and c.has_args() and c.has_typeinfo()
+                   and c.is_arrayable())
+
+    @cached_property
+    def has_nogil(self):
+        return any(cls.nogil_cells for cls in self.classes.values())
+
     @cached_property
     def sub_modules(self):
         result = []
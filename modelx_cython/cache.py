@@ -0,0 +1,191 @@
+# Copyright (c) 2023-2025 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import hashlib
+import pathlib
+import filecmp
+import shutil
+import logging
+from typing import Dict, Iterable, Optional
+
+from modelx_cython import __version__
+from modelx_cython.config import TransSpec
+from modelx_cython.tracer import MxCallTraceLogger
+
+_logger = logging.getLogger(__name__)
+
+
+def _to_canonical(data):
+    # Spec keys can be tuples, which JSON does not accept as keys
+    if isinstance(data, dict):
+        return sorted([repr(k), _to_canonical(v)] for k, v in data.items())
+    elif isinstance(data, (list, tuple)):
+        return [_to_canonical(v) for v in data]
+    else:
+        return data
+
+
+def get_digest(data) -> str:
+    if not isinstance(data, str):
+        data = json.dumps(_to_canonical(data), default=repr)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def types_digest(logger: MxCallTraceLogger, module: str) -> str:
+    """Digest of the trace-derived type information of a module"""
+    cells = {}
+    for fqname, info in logger.cells_info.items():
+        if info.module == module:
+            cells[fqname] = info.to_dict()
+
+    prefix = module + "."
+    refs = {k: v.to_dict() for k, v in logger.ref_info.items() if k.startswith(prefix)}
+    params = {
+        k: {p: v.to_dict() for p, v in params.items()}
+        for k, params in logger.param_info.items() if k.startswith(prefix)
+    }
+    return get_digest({"cells": cells, "refs": refs, "params": params})
+
+
+def model_digest(logger: MxCallTraceLogger, spec: TransSpec, graph: str) -> str:
+    """Digest of the information translation of each module depends on
+
+    Modules are translated with the types of refs and spaces in other
+    modules, and the call graph of all the modules decides the cells
+    removed by ``--outputs``, so any change in them invalidates all
+    the modules.
+    """
+    types = {
+        "cells": {k: v.to_dict() for k, v in logger.cells_info.items()},
+        "refs": {k: v.to_dict() for k, v in logger.ref_info.items()},
+        "params": {
+            k: {p: v.to_dict() for p, v in params.items()}
+            for k, params in logger.param_info.items()
+        }
+    }
+    spec_data = spec.get_spec("")     # Whole spec
+    return get_digest({"types": types, "spec": spec_data, "graph": graph})
+
+
+def spec_digest(spec: TransSpec, module: str) -> str:
+    """Digest of the spec slice for the classes defined in a module
+
+    The classes in a module are the child spaces of the space the
+    module belongs to. Specs of their own child spaces are excluded,
+    as they are defined in other modules.
+    """
+    data = spec.get_spec(module).get(TransSpec.SPACES) or {}
+    classes = {
+        name: {k: v for k, v in space_spec.items() if k != TransSpec.SPACES}
+        for name, space_spec in data.items()
+    }
+    return get_digest(classes)
+
+
+class BuildCache:
+    """Content hashes of translated modules
+
+    The cache is stored in the generated package and maps the name of
+    each translated module to the digests of its source, its type
+    information, its spec slice, the options and the information
+    shared by all modules. Modules whose digests are unchanged
+    are not translated again, so that their ``.py``, ``.pxd`` and
+    compiled files are left untouched and Cython and the C compiler
+    skip them.
+    """
+
+    FILE_NAME = "_mx_build_cache.json"
+
+    def __init__(self, path: pathlib.Path, load: bool = True):
+        self.path = path
+        self._data: Dict[str, dict] = {}
+        if load and path.exists():
+            try:
+                data = json.loads(path.read_text())
+            except ValueError:
+                _logger.warning(f"ignoring corrupted build cache: {path}")
+            else:
+                if data.get("version") == __version__:
+                    self._data = data.get("modules", {})
+
+    @property
+    def modules(self):
+        return list(self._data)
+
+    def make_key(self, source: str, types: str, spec: str, options=None,
+                 model: str = "") -> dict:
+        return {
+            "source": get_digest(source),
+            "types": types,
+            "spec": spec,
+            "options": get_digest(options or {}),
+            "model": model
+        }
+
+    def is_fresh(self, module: str, key: dict) -> bool:
+        return self._data.get(module) == key
+
+    def update(self, module: str, key: dict):
+        self._data[module] = key
+
+    def save(self):
+        self.path.write_text(
+            json.dumps({"version": __version__, "modules": self._data},
+                       indent=2, sort_keys=True))
+
+
+def write_if_changed(path: pathlib.Path, text: str) -> bool:
+    """Write text to path only if the content differs"""
+    if path.exists() and path.read_text() == text:
+        return False
+    path.write_text(text)
+    return True
+
+
+def sync_tree(src: pathlib.Path, dst: pathlib.Path,
+              exclude: Optional[Iterable[pathlib.Path]] = None):
+    """Copy files in src that are missing or different in dst
+
+    Files in dst that are not in src are removed, except the build cache
+    and files generated from ``.py`` files in src, such as ``.pxd``,
+    ``.c`` and compiled files. Paths in exclude are relative to src.
+    """
+    for dst_file in sorted(dst.rglob("*"), reverse=True):   # Files before dirs
+        rel_path = dst_file.relative_to(dst)
+        if "__pycache__" in rel_path.parts or (src / rel_path).exists():
+            continue
+        elif dst_file.is_dir():
+            if not any(dst_file.iterdir()):
+                dst_file.rmdir()
+        elif rel_path == pathlib.Path(BuildCache.FILE_NAME):
+            continue
+        elif (dst_file.suffix != ".py"
+              and (src / rel_path.parent / (rel_path.name.split(".")[0] + ".py")).exists()):
+            continue
+        else:
+            dst_file.unlink()
+            _logger.info(f"removed {dst_file}")
+
+    exclude = set(exclude or ())
+    for src_file in src.rglob("*"):
+        rel_path = src_file.relative_to(src)
+        if src_file.is_dir() or rel_path in exclude or "__pycache__" in rel_path.parts:
+            continue
+        dst_file = dst / rel_path
+        if dst_file.exists() and filecmp.cmp(src_file, dst_file, shallow=False):
+            continue
+        dst_file.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(src_file, dst_file)
+        _logger.info(f"updated {dst_file}")
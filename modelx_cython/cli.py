@@ -26,10 +26,17 @@ from typing import IO, TYPE_CHECKING, Sequence, Optional, Tuple
 
 from modelx_cython.consts import MX_MODEL_MOD, MX_SPACE_MOD, MX_SYS_MOD
 from modelx_cython.config import TransSpec
-from modelx_cython.tracer import trace_calls, MxCallTraceLogger, MxCodeFilter
-from modelx_cython.builder import ModuleInfo
+from modelx_cython.tracer import (
+    trace_calls, MxCallTraceLogger, MxCodeFilter,
+    TRACER_AUTO, TRACER_PROFILE, TRACER_MONITORING)
+from modelx_cython.builder import ModuleInfo, CACHE_ARRAY, CACHE_BUFFER
 from modelx_cython.parser import ModuleVisitor
+from modelx_cython.graph import CallGraph, GRAPH_SUFFIX, prune_cells
 from modelx_cython.transformer import ModuleTransformer, PXDGenerator
+from modelx_cython.cache import (
+    BuildCache, types_digest, spec_digest, model_digest, write_if_changed, sync_tree)
+
+_logger = logging.getLogger(__name__)
 
 
 def increment_backups(
@@ -52,19 +59,23 @@ def increment_backups(
             backup_path.rename(next_backup)
 
 
-def run_sample(model_path: pathlib.Path, sample_path: str, new_model_name: str = None) -> MxCallTraceLogger:
+def run_sample(model_path: pathlib.Path, sample_path: str, new_model_name: str = None,
+               tracer: str = TRACER_PROFILE,
+               max_traced_calls: Optional[int] = None) -> MxCallTraceLogger:
 
     module: str = model_path.name
     try:
         module_path = str(model_path.parent)
         sys.path.insert(0, module_path)
 
-        logger = MxCallTraceLogger(module=module, new_model_name=new_model_name)
+        logger = MxCallTraceLogger(module=module, new_model_name=new_model_name,
+                                   max_traced_calls=max_traced_calls)
         with trace_calls(
             module=module,
             logger=logger,
             max_typed_dict_size=0,
-            code_filter= MxCodeFilter()):
+            code_filter= MxCodeFilter(),
+            backend=tracer):
             runpy.run_path(sample_path, run_name="__main__")
 
     finally:
@@ -86,11 +97,16 @@ def main_handler(args: argparse.Namespace, stdout: IO[str], stderr: IO[str]) ->
     setup_file = pathlib.Path(args.setup) if args.setup else work_dir / "setup.py"
 
     if not args.compile_only:
-        increment_backups(model_path)
-        shutil.copytree(orig_path, model_path)
-        shutil.copy(pathlib.Path(__file__).parent / (MX_SYS_MOD + ".pxd"), model_path)
+        if args.trace_db and pathlib.Path(args.trace_db).exists():
+            _logger.info(f"loading type information from {args.trace_db}")
+            logger = MxCallTraceLogger.load(args.trace_db, new_model_name=model_name)
+        else:
+            logger = run_sample(orig_path, args.sample, new_model_name=model_name,
+                                tracer=args.tracer,
+                                max_traced_calls=args.max_traced_calls)
+            if args.trace_db:
+                logger.save(args.trace_db)
 
-        logger = run_sample(orig_path, args.sample, new_model_name=model_name)
         if args.no_spec:
             d = {}
         else:
@@ -102,35 +118,83 @@ def main_handler(args: argparse.Namespace, stdout: IO[str], stderr: IO[str]) ->
         spec = TransSpec(d)
         rel_model_path = model_path.relative_to(model_path.parent)
 
-        modules = [rel_model_path / (MX_SYS_MOD + ".py")]
+        # Relative paths of the modules to translate
+        src_paths = {}
         for m in logger.modules:
             subs = m.split(".")
             assert subs.pop(0) == model_path.name
             assert subs[-1] in [MX_MODEL_MOD, MX_SPACE_MOD]
-            pxd_path = subs.copy()
-            subs[-1] = subs[-1] + ".py"
-            pxd_path[-1] = pxd_path[-1] + ".pxd"
-            abs_src_path = model_path / "/".join(subs)
-            rel_src_path = rel_model_path / "/".join(subs)
-            abs_pxd_path = model_path / "/".join(pxd_path)
-            abs_init_path = model_path / "/".join(subs[:-1] + ["__init__.pxd"])
-            source = abs_src_path.read_text()
-            visitor = ModuleVisitor(module=m, source=source)
-            module_info = ModuleInfo(m, visitor, logger, spec)
-            trans = ModuleTransformer(source, module_info)
-            pxd = PXDGenerator(module_info)
-
-            abs_src_path.write_text(trans.transformed.code)
-            abs_pxd_path.write_text(pxd.code)
-            abs_init_path.write_text("from . cimport _mx_classes")
-            modules.append(rel_src_path)
-
-        create_setup(model_name, modules=modules, setup_file=setup_file)
+            src_paths[m] = pathlib.Path(*subs[:-1], subs[-1] + ".py")
+
+        cache = BuildCache(model_path / BuildCache.FILE_NAME, load=args.incremental)
+        if args.incremental and sorted(cache.modules) == sorted(src_paths):
+            sync_tree(orig_path, model_path, exclude=src_paths.values())
+        else:
+            if args.incremental:
+                _logger.info("building all modules as no build cache matches the model")
+            cache = BuildCache(model_path / BuildCache.FILE_NAME, load=False)
+            increment_backups(model_path)
+            shutil.copytree(orig_path, model_path)
+
+        write_if_changed(
+            model_path / (MX_SYS_MOD + ".pxd"),
+            (pathlib.Path(__file__).parent / (MX_SYS_MOD + ".pxd")).read_text())
+
+        # All modules are parsed as calls across modules are resolved in the graph
+        sources = {m: (orig_path / rel_path).read_text() for m, rel_path in src_paths.items()}
+        visitors = {m: ModuleVisitor(module=m, source=source) for m, source in sources.items()}
+        graph = CallGraph(visitors, logger)
+        write_if_changed(work_dir / (model_name + GRAPH_SUFFIX), graph.dumps())
+
+        if args.outputs:
+            pruned = graph.get_unreachable(args.outputs.split(","))
+            for m, classes in pruned.items():
+                sources[m] = prune_cells(sources[m], classes)
+                visitors[m] = ModuleVisitor(module=m, source=sources[m])
+
+        model_key = model_digest(logger, spec, graph.dumps())
+        modules = [rel_model_path / (MX_SYS_MOD + ".py")]
+        for m, rel_path in src_paths.items():
+            abs_src_path = model_path / rel_path
+            abs_pxd_path = abs_src_path.with_suffix(".pxd")
+            abs_init_path = abs_src_path.with_name("__init__.pxd")
+            source = sources[m]
+            key = cache.make_key(
+                source=source,
+                types=types_digest(logger, m),
+                spec=spec_digest(spec, m),
+                options={"infer_types": args.infer_types,
+                         "cache_layout": args.cache_layout,
+                         "fold_constants": args.fold_constants,
+                         "share_cells": args.share_cells,
+                         "outputs": args.outputs},
+                model=model_key)
+
+            if not (cache.is_fresh(m, key) and abs_pxd_path.exists()):
+                module_info = ModuleInfo(m, visitors[m], logger, spec,
+                                         infer_types=args.infer_types,
+                                         cache_layout=args.cache_layout,
+                                         fold_constants=args.fold_constants,
+                                         share_cells=args.share_cells)
+                trans = ModuleTransformer(source, module_info)
+                pxd = PXDGenerator(module_info)
+
+                write_if_changed(abs_src_path, trans.transformed.code)
+                write_if_changed(abs_pxd_path, pxd.code)
+                cache.update(m, key)
+            else:
+                _logger.info(f"skipped translating unchanged module {m}")
+
+            write_if_changed(abs_init_path, "from . cimport _mx_classes")
+            modules.append(rel_model_path / rel_path)
+
+        cache.save()
+        create_setup(model_name, modules=modules, setup_file=setup_file, jobs=args.jobs)
 
     if args.translate_only:
         return 0
     else:
-        return compile_main(work_dir, setup_file)
+        return compile_main(work_dir, setup_file, jobs=args.jobs)
 
 
 # Mapping from string names to logging levels
@@ -160,12 +224,34 @@ def parse_log_level(value):
         raise argparse.ArgumentTypeError(f"Invalid log level: {value}")
 
 
-def compile_main(work_dir: pathlib.Path, setup_file: pathlib.Path) -> int:
+def parse_jobs(value):
+    try:
+        jobs = int(value)
+    except ValueError:
+        jobs = 0
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(f"Invalid number of jobs: {value}")
+    return jobs
+
+
+def parse_max_traced_calls(value):
+    try:
+        calls = int(value)
+    except ValueError:
+        calls = 0
+    if calls < 1:
+        raise argparse.ArgumentTypeError(f"Invalid number of traced calls: {value}")
+    return calls
+
+
+def compile_main(work_dir: pathlib.Path, setup_file: pathlib.Path, jobs: int = 1) -> int:
 
     env = os.environ.copy()
     env["PYTHONPATH"] = str(work_dir) + os.pathsep + env.get("PYTHONPATH", "")
-    cmd = subprocess.run([sys.executable, str(setup_file), "build_ext", "--inplace"],
-                         env=env, cwd=str(work_dir))
+    argv = [sys.executable, str(setup_file), "build_ext", "--inplace"]
+    if jobs > 1:
+        argv += ["--parallel", str(jobs)]
+    cmd = subprocess.run(argv, env=env, cwd=str(work_dir))
     return cmd.returncode
 
 
@@ -190,6 +276,93 @@ def main(argv: Sequence[str], stdout: IO[str], stderr: IO[str]) -> int:
         )
     )
 
+    parser.add_argument(
+        "--tracer",
+        type=str,
+        choices=[TRACER_AUTO, TRACER_PROFILE, TRACER_MONITORING],
+        default=TRACER_AUTO,
+        help=(
+            "Tracer for collecting type information. 'monitoring' uses sys.monitoring "
+            "available on Python 3.12+, 'profile' uses sys.setprofile, and 'auto' uses "
+            "'monitoring' if available (default: auto)"
+        )
+    )
+
+    parser.add_argument(
+        "--max-traced-calls",
+        type=parse_max_traced_calls,
+        metavar="N",
+        default=None,
+        help=(
+            "Trace return values of only the first N calls to each cells. "
+            "Arguments of all calls are still traced to size the arrays of cells values "
+            "(default: trace all calls)"
+        )
+    )
+
+    parser.add_argument(
+        "--trace-db",
+        type=str,
+        default="",
+        help=(
+            "Path to a file to save type information collected from the sample. "
+            "If the file exists, type information is loaded from it instead of running the sample"
+        )
+    )
+
+    parser.add_argument(
+        "--infer-types",
+        action="store_true",
+        default=False,
+        help=(
+            "Infer types of cells not called by the sample from their formulas "
+            "(default: False)"
+        )
+    )
+
+    parser.add_argument(
+        "--cache-layout",
+        type=str,
+        choices=[CACHE_ARRAY, CACHE_BUFFER],
+        default=CACHE_ARRAY,
+        help=(
+            "Layout of the caches of cells with integer arguments. 'array' embeds "
+            "fixed-size C arrays in each space, and 'buffer' uses memoryviews "
+            "allocated on first call and grown for arguments out of them (default: array)"
+        )
+    )
+
+    parser.add_argument(
+        "--fold-constants",
+        action="store_true",
+        default=False,
+        help=(
+            "Replace calls of cells without parameters returning number literals "
+            "with the literals (default: False)"
+        )
+    )
+
+    parser.add_argument(
+        "--share-cells",
+        action="store_true",
+        default=False,
+        help=(
+            "Calculate cells not referring to the parameters of spaces only in the spaces, "
+            "and call them in the spaces from their item spaces (default: False)"
+        )
+    )
+
+    parser.add_argument(
+        "--outputs",
+        type=str,
+        default="",
+        help=(
+            "Comma-separated names of cells to output, such as 'Projection.pv_net_cf'. "
+            "Cells not called from them directly or indirectly are removed "
+            "(default: keep all cells)"
+        )
+    )
+
     spec_group = parser.add_mutually_exclusive_group()
 
     spec_group.add_argument(
@@ -217,6 +390,26 @@ def main(argv: Sequence[str], stdout: IO[str], stderr: IO[str]) -> int:
         )
     )
 
+    parser.add_argument(
+        "--jobs",
+        type=parse_jobs,
+        default=1,
+        help=(
+            "Number of parallel jobs for cythonizing and compiling modules. "
+            "With --compile-only, only compiling uses the jobs, as cythonizing "
+            "uses the number written in the existing setup file (default: 1)"
+        )
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=False,
+        help=(
+            "Translate and compile only modules changed since the last build (default: False)"
+        )
+    )
+
     task_group = parser.add_mutually_exclusive_group()
 
     task_group.add_argument(
@@ -247,31 +440,60 @@ def main(argv: Sequence[str], stdout: IO[str], stderr: IO[str]) -> int:
     return main_handler(args, stdout, stderr)
 
 
-def create_setup(model_name: str, modules: Sequence[str], setup_file: pathlib.Path):
+def create_setup(model_name: str, modules: Sequence[str], setup_file: pathlib.Path,
+                 jobs: int = 1):
 
     modules_str = textwrap.indent(",\n".join(
         ['"' + s.as_posix() + '"' for s in modules]
-    ), " " * 8)
+    ), " " * 12)
 
     setup_script = textwrap.dedent("""\
     import sys
+    import time
     from setuptools import setup
+    from setuptools.command.build_ext import build_ext
     from Cython.Build import cythonize
 
-    setup(
-        name="{model_name}",
-        ext_modules=cythonize([
+
+    class timed_build_ext(build_ext):
+        \"\"\"build_ext reporting the time spent compiling each module\"\"\"
+
+        timings = {{}}
+
+        def build_extension(self, ext):
+            start = time.perf_counter()
+            super().build_extension(ext)
+            self.timings[ext.name] = elapsed = time.perf_counter() - start
+            print(f"compiled {{ext.name}} in {{elapsed:.2f}}s")
+
+
+    if __name__ == "__main__":
+        start = time.perf_counter()
+        ext_modules = cythonize([
     {modules_str}
             ],
-            annotate=True
+            annotate=True,
+            nthreads={nthreads}
         )
-    )
+        print(f"cythonized {len_modules} modules in {{time.perf_counter() - start:.2f}}s")
+
+        setup(
+            name="{model_name}",
+            ext_modules=ext_modules,
+            cmdclass={{"build_ext": timed_build_ext}}
+        )
+
+        for name, elapsed in sorted(
+                timed_build_ext.timings.items(), key=lambda x: x[1], reverse=True):
+            print(f"{{elapsed:8.2f}}s  {{name}}")
     """)
 
     setup_file.write_text(
         setup_script.format(
             model_name=model_name,
-            modules_str=modules_str))
+            modules_str=modules_str,
+            len_modules=len(modules),
+            nthreads=jobs if jobs > 1 else 0))
 
 
 def entry_point_main():
@@ -0,0 +1,269 @@
+# Copyright (c) 2023-2025 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Calculation of cells over arrays of the values in item spaces
+
+Formulas of cells that only return arithmetic of numbers, parameters,
+refs of numbers and the values of other such cells, the formulas
+:mod:`modelx_cython.nogil` checks, give the values in many item spaces
+at once if calculated on arrays of the refs in the item spaces::
+
+    def pv(t):
+        if t < term:
+            return cf(t) * disc(t) + pv(t + 1)
+        else:
+            return cf(t) * disc(t)
+
+is calculated as::
+
+    self._mx_where(
+        t < self._mx_cols["term"],
+        lambda: self.cf(t) * self.disc(t) + self.pv(t + 1),
+        lambda: self.cf(t) * self.disc(t))
+
+where ``self._mx_cols["term"]`` is the array of ``term`` gathered from
+the item spaces, so each formula is calculated once on each argument
+for all the item spaces. Branches are calculated on all the item spaces
+unless the condition is the same in all of them.
+Cells without parameters returning numbers whose formulas cannot be
+calculated so, such as sums over generators, are calculated in each
+item space and their values are gathered into arrays like refs.
+
+The arguments of calls must be calculated only from parameters and
+numbers, as they are the same in all the item spaces.
+Division by zero gives inf or nan instead of raising an error.
+"""
+
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple, TYPE_CHECKING
+
+import libcst as cst
+import libcst.matchers as m
+
+from modelx_cython.consts import MX_AND, MX_COLS, MX_OR, MX_SELF, MX_WHERE, NP_MOD
+from modelx_cython.nogil import NogilAnalyzer, _NUMERIC
+from modelx_cython.typedefs import normalize_type
+
+if TYPE_CHECKING:
+    from modelx_cython.builder import ClassInfo
+
+_NP_FUNCS = {"max": "maximum", "min": "minimum"}
+
+
+class Columns(NamedTuple):
+    """Cells calculated over arrays and the names gathered for them"""
+    exprs: Mapping[str, str]   # Cells to their formulas on arrays
+    gathered: Mapping[str, Tuple[str, ...]]     # Cells to refs and cells gathered
+
+
+class ColumnAnalyzer(NogilAnalyzer):
+    """Find cells in a class to calculate over arrays of item spaces
+
+    Formulas are checked as by :class:`NogilAnalyzer` except that
+    the values need not be cached in C arrays, and that the arguments
+    of calls to cells must only be of parameters and numbers.
+    """
+
+    def __init__(self, cls_info: "ClassInfo", formulas: Mapping[str, cst.FunctionDef]):
+        super().__init__(cls_info, formulas)
+        self._exprs: Dict[str, cst.BaseExpression] = {}   # Formulas as expressions
+
+    def find(self) -> Columns:
+        """Return the cells in the class to calculate over arrays"""
+        exprs, gathered = {}, {}
+        for name, cells in self.cls_info.cells.items():
+            if cells.is_special():
+                continue
+            closure = self._get_columns(name)
+            if closure is None:
+                continue
+            names, cells_gathered = closure
+            refs = set()
+            for n in names:
+                for attr in m.findall(self._exprs[n], m.Attribute(
+                        value=m.Name(MX_SELF), attr=m.Name())):
+                    if attr.attr.value in self.cls_info.refs:
+                        refs.add(attr.attr.value)
+            exprs[name] = self._to_array_code(name, cells_gathered)
+            gathered[name] = tuple(sorted(refs | cells_gathered))
+
+        return Columns(exprs, gathered)
+
+    def _get_columns(self, name) -> Optional[Tuple[Set[str], Set[str]]]:
+        # Cells calculated over arrays and cells gathered to calculate name
+        names, gathered = set(), set()
+        stack = [name]
+        while stack:
+            n = stack.pop()
+            if n in names or n in gathered:
+                continue
+            elif self._get_reason(n) is None:
+                names.add(n)
+                for call in m.findall(self.formulas[n].body, m.Call(
+                        func=m.Attribute(value=m.Name(MX_SELF), attr=m.Name()))):
+                    stack.append(call.func.attr.value)
+            elif n != name and self._is_gathered(n):
+                gathered.add(n)
+            else:
+                return None
+        return names, gathered
+
+    def _is_gathered(self, name) -> bool:
+        cells = self.cls_info.cells[name]
+        return (not cells.is_special() and not cells.has_args() and cells.has_typeinfo()
+                and not cells.is_array_returned
+                and normalize_type(cells.norm_type) in _NUMERIC)
+
+    def _check_cells(self, name) -> Optional[str]:
+        reason = super()._check_cells(name)
+        if reason:
+            return reason
+
+        stmts = [s for s in self.formulas[name].body.body if not m.matches(
+            s, m.SimpleStatementLine(body=[m.Expr(m.SimpleString() | m.ConcatenatedString())]))]
+        expr = _to_expr(stmts)
+        if expr is None:
+            return "it can return None"
+        self._exprs[name] = expr
+        return None
+
+    def _check_cache(self, cells) -> Optional[str]:
+        return None     # Values are not cached
+
+    def _check_call(self, node: cst.Call, cells) -> Optional[str]:
+        reason = super()._check_call(node, cells)
+        if reason:
+            return reason
+        elif m.matches(node.func, m.Attribute(value=m.Name(MX_SELF))):
+            for arg in node.args:
+                if m.findall(arg.value, m.Attribute() | m.Call()):
+                    code = cst.Module([]).code_for_node(node.func)
+                    return f"it calls {code} with other than its parameters and numbers"
+        return None
+
+    def _to_array_code(self, name: str, gathered: Set[str]) -> str:
+        expr = self._exprs[name].visit(_ArrayTransformer(
+            refs=set(self.cls_info.refs), gathered=gathered))
+        return cst.Module([]).code_for_node(expr)
+
+
+def _to_expr(stmts: Sequence[cst.BaseStatement]) -> Optional[cst.BaseExpression]:
+    """Return the value of if and return statements as an expression
+
+    None if the statements can complete without returning a value.
+    Statements after an if statement are joined to its branches.
+    """
+    for i, stmt in enumerate(stmts):
+        if isinstance(stmt, cst.SimpleStatementLine):
+            for s in stmt.body:
+                if isinstance(s, cst.Return):
+                    return s.value and _parenthesize(s.value)
+        elif isinstance(stmt, cst.If):
+            rest = list(stmts[i + 1:])
+            body = _to_expr(list(stmt.body.body) + rest)
+            if isinstance(stmt.orelse, cst.If):
+                orelse = _to_expr([stmt.orelse] + rest)
+            elif stmt.orelse is not None:
+                orelse = _to_expr(list(stmt.orelse.body.body) + rest)
+            else:
+                orelse = _to_expr(rest)
+            if body is None or orelse is None:
+                return None
+            return _parenthesize(cst.IfExp(
+                test=_parenthesize(stmt.test), body=body, orelse=orelse))
+    return None
+
+
+def _parenthesize(node: cst.BaseExpression) -> cst.BaseExpression:
+    return node.with_changes(lpar=[cst.LeftParen()], rpar=[cst.RightParen()])
+
+
+def _is_scalar(node: cst.CSTNode) -> bool:
+    # True if the value is the same in all item spaces
+    return not m.findall(node, m.Attribute(value=m.Name(MX_SELF)))
+
+
+class _ArrayTransformer(cst.CSTTransformer):
+    """Rewrite a formula to calculate on arrays of the values in item spaces"""
+
+    def __init__(self, refs: Set[str], gathered: Set[str]):
+        super().__init__()
+        self.refs = refs
+        self.gathered = gathered
+
+    def _parse(self, code: str, node: cst.BaseExpression) -> cst.BaseExpression:
+        return cst.parse_expression(code).with_changes(lpar=node.lpar, rpar=node.rpar)
+
+    def _code(self, node: cst.CSTNode) -> str:
+        return cst.Module([]).code_for_node(node)
+
+    def leave_Attribute(self, original_node, updated_node):
+        if (m.matches(original_node.value, m.Name(MX_SELF))
+                and original_node.attr.value in self.refs):
+            return self._parse(
+                f'{MX_SELF}.{MX_COLS}["{original_node.attr.value}"]', updated_node)
+        return updated_node
+
+    def leave_Call(self, original_node, updated_node):
+        func = original_node.func
+        if (m.matches(func, m.Attribute(value=m.Name(MX_SELF), attr=m.Name()))
+                and func.attr.value in self.gathered):
+            return self._parse(f'{MX_SELF}.{MX_COLS}["{func.attr.value}"]', updated_node)
+        elif isinstance(func, cst.Name) and not _is_scalar(original_node):
+            args = [self._code(arg.value) for arg in updated_node.args]
+            if func.value == "abs":
+                return self._parse(f"{NP_MOD}.abs({args[0]})", updated_node)
+            elif func.value in _NP_FUNCS and len(args) > 1:
+                code = args[0]
+                for arg in args[1:]:
+                    code = f"{NP_MOD}.{_NP_FUNCS[func.value]}({code}, {arg})"
+                return self._parse(code, updated_node)
+        return updated_node
+
+    def leave_IfExp(self, original_node, updated_node):
+        if _is_scalar(original_node.test):
+            return updated_node
+        return self._parse(
+            f"{MX_SELF}.{MX_WHERE}({self._code(updated_node.test)}, "
+            f"lambda: {self._code(updated_node.body)}, "
+            f"lambda: {self._code(updated_node.orelse)})", updated_node)
+
+    def leave_BooleanOperation(self, original_node, updated_node):
+        if _is_scalar(original_node):
+            return updated_node
+        func = MX_AND if isinstance(updated_node.operator, cst.And) else MX_OR
+        return self._parse(
+            f"{MX_SELF}.{func}({self._code(updated_node.left)}, "
+            f"lambda: {self._code(updated_node.right)})", updated_node)
+
+    def leave_UnaryOperation(self, original_node, updated_node):
+        if isinstance(updated_node.operator, cst.Not) and not _is_scalar(original_node):
+            return self._parse(
+                f"{NP_MOD}.logical_not({self._code(updated_node.expression)})", updated_node)
+        return updated_node
+
+    def leave_Comparison(self, original_node, updated_node):
+        if len(updated_node.comparisons) == 1 or _is_scalar(original_node):
+            return updated_node
+
+        # Split a < b < c into a < b and b < c
+        left = updated_node.left
+        comparisons: List[str] = []
+        for c in updated_node.comparisons:
+            comparisons.append(self._code(
+                cst.Comparison(left=left, comparisons=[c])))
+            left = c.comparator
+        code = comparisons[-1]
+        for comparison in reversed(comparisons[:-1]):
+            code = f"{MX_SELF}.{MX_AND}({comparison}, lambda: {code})"
+        return self._parse(code, updated_node)
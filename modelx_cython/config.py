@@ -27,10 +27,18 @@ class TransSpec:
     SPACE_PARAMS = "space_params"
     CELLS = "cells"
     CELLS_PARAM_SIZE = "cells_param_size"
+    CELLS_PARAM_START = "cells_param_start"
     CELLS_PARAMS = "cells_params"   # deprecated
     SIZE = "size"   # deprecated
     RET_T = "return_type"
     PARAM_T = "param_type"
+    HAS_FLAGS = "has_flags"
+    FLAGS_ARRAY = "array"   # A bint for each value
+    FLAGS_BITS = "bits"     # A bit for each value
+    FLAGS_NAN = "nan"       # NaN in the values for values not calculated
+    NOGIL = "nogil"
+    LOOP = "loop"   # False to keep recursive calls on previous indexes
+    MAX_ITEMSPACES = "max_itemspaces"   # 0 to keep no item spaces
 
     def __init__(self, data: dict) -> None:
         
@@ -0,0 +1,98 @@
+# Copyright (c) 2023-2025 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Folding of cells returning constants
+
+Cells such as ``expense_acq`` and ``loading_prem`` in BasicTerm
+have no parameters and formulas only returning number literals::
+
+    def _f_expense_acq(self):
+        \"\"\"Acquisition expense per policy\"\"\"
+        return 300
+
+Calls of such cells on ``self`` in formulas are replaced with the
+literals typed as the values of the cells, such as ``300.0`` if the
+values are floats, and the cells return the literals without caching
+the values in the spaces.
+"""
+
+import ast
+import math
+import numbers
+from typing import Dict, Mapping, Optional, TYPE_CHECKING
+
+import libcst as cst
+import libcst.matchers as m
+
+from modelx_cython.consts import MX_SELF
+from modelx_cython.typedefs import normalize_type
+
+if TYPE_CHECKING:
+    from modelx_cython.builder import ClassInfo, CombinedCellsInfo
+
+_LITERAL = (m.Integer() | m.Float() | m.Name("True") | m.Name("False")
+            | m.UnaryOperation(operator=m.Minus(), expression=m.Integer() | m.Float()))
+
+_INT_MAX = 2 ** 63 - 1  # C long long
+
+
+def find_constants(cls_info: "ClassInfo",
+                   formulas: Mapping[str, cst.FunctionDef]) -> Dict[str, str]:
+    """Return cells in a class returning constants to the literals"""
+    result = {}
+    for name, cells in cls_info.cells.items():
+        if (not cells.is_special() and not cells.has_args()
+                and cells.has_typeinfo() and name in formulas):
+            literal = _get_literal(cells, formulas[name])
+            if literal is not None:
+                result[name] = literal
+
+    return result
+
+
+def _get_literal(cells: "CombinedCellsInfo", node: cst.FunctionDef) -> Optional[str]:
+    body = list(node.body.body)
+    if body and m.matches(body[0], m.SimpleStatementLine(
+            body=[m.Expr(value=m.SimpleString() | m.ConcatenatedString())])):
+        body.pop(0)     # Docstring
+
+    if not (len(body) == 1 and m.matches(
+            body[0], m.SimpleStatementLine(body=[m.Return(value=_LITERAL)]))):
+        return None
+
+    value = ast.literal_eval(cst.Module([]).code_for_node(body[0].body[0].value))
+    typ = normalize_type(cells.norm_type)
+    if typ is bool and isinstance(value, bool):
+        return repr(value)
+    elif typ is numbers.Integral and type(value) is int and -_INT_MAX <= value <= _INT_MAX:
+        return repr(value) if value >= 0 else f"({value})"
+    elif typ is numbers.Real and type(value) in (int, float) and math.isfinite(value):
+        value = float(value)
+        return repr(value) if value >= 0 else f"({value})"
+    else:
+        return None
+
+
+class ConstantFolder(cst.CSTTransformer):
+    """Replace calls of cells returning constants with the literals"""
+
+    def __init__(self, constants: Mapping[str, str]):
+        self.constants = constants
+
+    def leave_Call(self, original_node, updated_node):
+        if (m.matches(original_node, m.Call(
+                func=m.Attribute(value=m.Name(MX_SELF), attr=m.Name()), args=[]))
+                and original_node.func.attr.value in self.constants):
+            return cst.parse_expression(self.constants[original_node.func.attr.value])
+        return updated_node
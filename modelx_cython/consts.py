@@ -21,6 +21,9 @@ SPACE_PREF = "_c_"
 FORMULA_PREF = "_f_"
 VAR_PREF = "_v_"
 HAS_PREF = "_has_"
+KEY_PREF = "_key_"
+LEN_PREF = "_len_"
+OVER_PREF = "_over_"
 MX_SELF = "self"
 
 MX_MODEL_MOD = FILE_PREF + "model"
@@ -29,8 +32,25 @@ MX_SYS_MOD = FILE_PREF + "sys"
 
 MX_ASSIGN_REFS = GLOBAL_PREF + "assign_refs"
 MX_COPY_REFS = GLOBAL_PREF + "copy_refs"
+MX_GROW_BUFFER = GLOBAL_PREF + "grow_buffer"
+MX_GROW_TABLE = GLOBAL_PREF + "grow_table"
+MX_FIND_KEY = GLOBAL_PREF + "find_key"
+MX_EVAL_ITEMS = GLOBAL_PREF + "eval_items"
+MX_EVAL_NOGIL = GLOBAL_PREF + "eval_nogil"
+MX_EVAL_COLUMNS = GLOBAL_PREF + "eval_columns"
+MX_COLUMNS = GLOBAL_PREF + "columns"
+MX_COLS = GLOBAL_PREF + "cols"
+MX_MEMO = GLOBAL_PREF + "memo"
+MX_WHERE = GLOBAL_PREF + "where"
+MX_AND = GLOBAL_PREF + "and"
+MX_OR = GLOBAL_PREF + "or"
+MX_ITEMSPACES = GLOBAL_PREF + "itemspaces"
+MX_CLEAR_CACHE = GLOBAL_PREF + "clear_cache"
+MX_RUN_STEPS = GLOBAL_PREF + "run_steps"
+MX_SHARED = GLOBAL_PREF + "shared"
 BASE_MODEL = "BaseModel"
 SPACE_PARAMS = VAR_PREF + "space_params"
+CELLS_NAMES = VAR_PREF + "cells_names"
 CY_MOD = GLOBAL_PREF + "cy"
 NP_MOD = GLOBAL_PREF + "np"
 PD_MOD = GLOBAL_PREF + "pd"
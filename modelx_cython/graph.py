@@ -0,0 +1,356 @@
+# Copyright (c) 2023-2025 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Static call graph of cells built from formulas
+
+Cells are named by the dotted names of their spaces and themselves,
+such as ``"Projection.pv_net_cf"`` or ``"Parent.Child.foo"``.
+Calls are resolved through ``self``, child spaces, refs to spaces
+whose classes are traced, and item spaces, as in ``self.Child.foo()``,
+``self.data.sum_assured()`` and ``self(i - 1).foo()``.
+Cells referred to without being called, as in ``map(self.foo, ...)``,
+are called by the cells referring to them.
+Calls on ``self`` that cannot be resolved, and ``getattr`` on
+expressions rooted at ``self``, are kept in :attr:`CallGraph.unresolved`
+in the code of their callees.
+
+Cells not reachable from the cells to output can be removed from
+the sources of modules by :func:`prune_cells` before translation.
+"""
+
+import json
+import logging
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+import libcst as cst
+import libcst.matchers as m
+
+from modelx_cython.consts import (
+    CELLS_NAMES,
+    FORMULA_PREF,
+    HAS_PREF,
+    VAR_PREF,
+    MX_SELF,
+    MX_SPACE_MOD,
+    MODULE_PREF,
+    SPACE_PREF,
+)
+from modelx_cython.parser import ModuleVisitor
+from modelx_cython.tracer import MxCallTraceLogger
+
+_logger = logging.getLogger(__name__)
+
+GRAPH_SUFFIX = "_graph.json"    # Appended to the name of the package for the file name
+
+
+class CallGraphVisitor(cst.CSTVisitor):
+    """Collect calls to attributes of expressions rooted at ``self``
+
+    Each call is recorded as a pair of the expression of the receiver
+    and the name called, such as ``(self.bar, "baz")`` for
+    ``self.bar.baz()``. Attributes referred to without being called,
+    such as ``self.baz`` in ``map(self.baz, ...)`` or ``self.baz[1]``, are recorded
+    in :attr:`refs` in the same way, and ``getattr`` calls on
+    expressions rooted at ``self`` in :attr:`dynamic` in their code.
+    """
+
+    def __init__(self):
+        self.calls: List[Tuple[cst.BaseExpression, str]] = []
+        self.refs: List[Tuple[cst.BaseExpression, str]] = []
+        self.dynamic: List[str] = []
+        self._receivers: Set[int] = set()   # ids of nodes called or whose attrs are got
+
+    def visit_Call(self, node: cst.Call):
+        self._receivers.add(id(node.func))
+        if isinstance(node.func, cst.Attribute) and _is_rooted_at_self(node.func.value):
+            self.calls.append((node.func.value, node.func.attr.value))
+        elif (m.matches(node.func, m.Name("getattr")) and node.args
+              and _is_rooted_at_self(node.args[0].value)):
+            self.dynamic.append(cst.Module([]).code_for_node(node))
+
+    def visit_Attribute(self, node: cst.Attribute):
+        self._receivers.add(id(node.value))
+        if id(node) not in self._receivers and _is_rooted_at_self(node.value):
+            self.refs.append((node.value, node.attr.value))
+
+
+def _is_rooted_at_self(node: cst.BaseExpression) -> bool:
+    while True:
+        if isinstance(node, cst.Name):
+            return node.value == MX_SELF
+        elif isinstance(node, cst.Attribute):
+            node = node.value
+        elif isinstance(node, cst.Call):
+            node = node.func
+        elif isinstance(node, cst.Subscript):
+            node = node.value
+        else:
+            return False
+
+
+def get_space_name(cls_fqname: str) -> str:
+    """Return the dotted name of the space of a class
+
+    Example:
+        ``"Model._m_Parent._mx_classes._c_Child"`` to ``"Parent.Child"``
+    """
+    names = []
+    for name in cls_fqname.split(".")[1:]:
+        if name[:len(MODULE_PREF)] == MODULE_PREF:
+            names.append(name[len(MODULE_PREF):])
+        elif name[:len(SPACE_PREF)] == SPACE_PREF:
+            names.append(name[len(SPACE_PREF):])
+    return ".".join(names)
+
+
+class CallGraph:
+    """Call graph of the cells in all the modules of a model
+
+    Attributes:
+        cells: Mapping from cells names to their parameters
+        calls: Mapping from cells names to the set of cells names they call
+        unresolved: Mapping from cells names to the code of calls
+            on ``self`` not resolved to cells
+    """
+
+    def __init__(self, visitors: Mapping[str, ModuleVisitor], logger: MxCallTraceLogger):
+        self.visitors = visitors
+        self.logger = logger
+        self.cells: Dict[str, List[str]] = {}
+        self.calls: Dict[str, Set[str]] = {}
+        self.unresolved: Dict[str, List[str]] = {}
+        self._nodes: Dict[str, Tuple[str, str, str]] = {}  # To module, class and cells names
+
+        # Class fqname to names of its cells
+        self._classes: Dict[str, Mapping[str, object]] = {}
+        for module, visitor in visitors.items():
+            for cls in visitor.classes:
+                self._classes[module + "." + cls] = visitor.cells_info.get(cls, {})
+
+        for module, visitor in visitors.items():
+            for cls in visitor.classes:
+                self._add_class(module, cls)
+
+    def _add_class(self, module: str, cls: str):
+        cls_fqname = module + "." + cls
+        space = get_space_name(cls_fqname)
+        formulas = self.visitors[module].formulas.get(cls, {})
+
+        for name, info in self._classes[cls_fqname].items():
+            if info.is_special():
+                continue
+            node = space + "." + name
+            self._nodes[node] = (module, cls, name)
+            self.cells[node] = list(info.params)
+            self.calls[node] = set()
+
+            if name not in formulas:
+                continue
+            visitor = CallGraphVisitor()
+            formulas[name].body.visit(visitor)
+            for recv, attr in visitor.calls:
+                target = self._resolve(cls_fqname, recv)
+                if target is not None and attr in self._classes[target]:
+                    self.calls[node].add(get_space_name(target) + "." + attr)
+                elif target is None and self._is_non_space_ref(cls_fqname, recv):
+                    continue    # Such as self.np.exp()
+                else:
+                    code = cst.Module([]).code_for_node(recv) + "." + attr
+                    self.unresolved.setdefault(node, []).append(code)
+
+            for recv, attr in visitor.refs:
+                # Other refs, such as self.rate, are not cells
+                target = self._resolve(cls_fqname, recv)
+                if target is not None and attr in self._classes[target]:
+                    self.calls[node].add(get_space_name(target) + "." + attr)
+
+            if visitor.dynamic:
+                self.unresolved.setdefault(node, []).extend(visitor.dynamic)
+
+    def _resolve(self, cls_fqname: str, node: cst.BaseExpression) -> Optional[str]:
+        """Return the class fqname of the space that node evaluates to"""
+        if m.matches(node, m.Name(MX_SELF)):
+            return cls_fqname
+
+        elif isinstance(node, (cst.Call, cst.Subscript)):
+            # Item spaces are of the same class as their space
+            inner = node.func if isinstance(node, cst.Call) else node.value
+            return self._resolve(cls_fqname, inner)
+
+        elif isinstance(node, cst.Attribute):
+            parent = self._resolve(cls_fqname, node.value)
+            if parent is None:
+                return None
+            return self._get_member_class(parent, node.attr.value)
+
+        else:
+            return None
+
+    def _get_member_class(self, cls_fqname: str, name: str) -> Optional[str]:
+        module, cls = cls_fqname.rsplit(".", 1)
+        visitor = self.visitors.get(module)
+
+        if visitor and name in visitor.spaces.get(cls, []):
+            # Child space
+            parent_mod = module[:-len("." + MX_SPACE_MOD)]
+            child = (parent_mod + "." + MODULE_PREF + cls[len(SPACE_PREF):]
+                     + "." + MX_SPACE_MOD + "." + SPACE_PREF + name)
+            return child if child in self._classes else None
+
+        ref = self.logger.ref_info.get(cls_fqname + "." + name)
+        if ref is not None and ref.mx_class in self._classes:
+            return ref.mx_class
+
+        return None
+
+    def _is_non_space_ref(self, cls_fqname: str, node: cst.BaseExpression) -> bool:
+        """Whether node is on a ref traced to be other than a space"""
+        while not m.matches(node, m.Attribute(value=m.Name(MX_SELF))):
+            if isinstance(node, cst.Attribute):
+                node = node.value
+            elif isinstance(node, cst.Call):
+                node = node.func
+            elif isinstance(node, cst.Subscript):
+                node = node.value
+            else:
+                return False
+
+        ref = self.logger.ref_info.get(cls_fqname + "." + node.attr.value)
+        return ref is not None and not ref.mx_class
+
+    def get_callers(self) -> Dict[str, Set[str]]:
+        """Return the mapping from cells names to the cells calling them"""
+        result = {node: set() for node in self.calls}
+        for caller, callees in self.calls.items():
+            for callee in callees:
+                result[callee].add(caller)
+        return result
+
+    def get_reachable(self, nodes: Iterable[str]) -> Set[str]:
+        """Return the cells called directly or indirectly from nodes, and nodes"""
+        result = set()
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if node not in result:
+                result.add(node)
+                stack.extend(self.calls.get(node, ()))
+        return result
+
+    def get_unreachable(self, outputs: Iterable[str]) -> Dict[str, Dict[str, Set[str]]]:
+        """Return cells not reachable from outputs by modules and classes
+
+        No cells are returned if any cells reachable from outputs
+        has calls not resolved, as they can call any cells.
+        """
+        outputs = list(outputs)
+        for node in outputs:
+            if node not in self.cells:
+                raise ValueError(f"{node} in outputs is not a cells")
+
+        reachable = self.get_reachable(outputs)
+        unresolved = sorted(reachable & self.unresolved.keys())
+        if unresolved:
+            _logger.warning(
+                f"no cells are removed as {unresolved[0]} calls "
+                f"{self.unresolved[unresolved[0]][0]}")
+            return {}
+
+        result = {}
+        for node, (module, cls, name) in self._nodes.items():
+            if node not in reachable:
+                _logger.info(f"{node} is removed as it is not called from outputs")
+                result.setdefault(module, {}).setdefault(cls, set()).add(name)
+
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            "cells": {
+                node: {"params": params, "calls": sorted(self.calls[node])}
+                for node, params in self.cells.items()
+            },
+            "unresolved": {node: sorted(set(codes))
+                           for node, codes in self.unresolved.items()}
+        }
+
+    def dumps(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+
+class CellsPruner(cst.CSTTransformer):
+    """Remove cells from the source of a module
+
+    The methods and the formulas of the cells are removed together
+    with the assignments to their cache variables and their names
+    in the lists of the cells names of their spaces.
+    """
+
+    def __init__(self, pruned: Mapping[str, Set[str]]):
+        self.pruned = pruned    # Class names to names of cells to remove
+        self._names: Set[str] = set()   # Cells to remove from the current class
+        self._depth = 0     # Depth of nested functions
+
+    def visit_ClassDef(self, node: cst.ClassDef):
+        self._names = self.pruned.get(node.name.value, set())
+
+    def leave_ClassDef(self, original_node, updated_node):
+        self._names = set()
+        return updated_node
+
+    def visit_FunctionDef(self, node: cst.FunctionDef):
+        self._depth += 1
+
+    def leave_FunctionDef(self, original_node, updated_node):
+        self._depth -= 1
+        name = original_node.name.value
+        if self._depth == 0 and self._names and (
+                name in self._names or (name[:len(FORMULA_PREF)] == FORMULA_PREF
+                                        and name[len(FORMULA_PREF):] in self._names)):
+            return cst.RemovalSentinel.REMOVE
+        return updated_node
+
+    def leave_SimpleStatementLine(self, original_node, updated_node):
+        stmt = original_node.body[0]
+        if not (isinstance(stmt, cst.Assign) and len(stmt.targets) == 1):
+            return updated_node
+        target = stmt.targets[0].target
+
+        if self._names and m.matches(target, m.Attribute(value=m.Name(MX_SELF))):
+            # Cache variables in __init__
+            name = target.attr.value
+            for pref in (VAR_PREF, HAS_PREF):
+                if name[:len(pref)] == pref and name[len(pref):] in self._names:
+                    return cst.RemovalSentinel.REMOVE
+
+        elif (isinstance(target, cst.Name) and isinstance(stmt.value, cst.List)
+              and target.value[:len(CELLS_NAMES) + 1] == CELLS_NAMES + "_"):
+            names = self.pruned.get(SPACE_PREF + target.value[len(CELLS_NAMES) + 1:], set())
+            elements = [e for e in stmt.value.elements
+                        if not (isinstance(e.value, cst.SimpleString)
+                                and e.value.evaluated_value in names)]
+            return updated_node.with_changes(body=[
+                stmt.with_changes(value=stmt.value.with_changes(elements=elements))])
+
+        return updated_node
+
+
+def prune_cells(source: str, pruned: Mapping[str, Set[str]]) -> str:
+    """Return the source of a module without cells
+
+    Args:
+        source: Source of a module of classes of spaces
+        pruned: Mapping from class names to names of cells to remove
+    """
+    return cst.parse_module(source).visit(CellsPruner(pruned)).code
@@ -0,0 +1,401 @@
+# Copyright (c) 2023-2025 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Static type inference of cells not called by the sample
+
+Types are propagated through the formulas of a class from literals,
+the traced types of other cells, arguments, refs and a few builtins.
+An inferred type is one of ``bool``, ``numbers.Integral``,
+``numbers.Real``, ``str`` and ``object``, where ``object`` means unknown.
+``None`` is used during the inference for types not known yet.
+"""
+
+import numbers
+import logging
+from typing import Dict, Mapping, Optional, TYPE_CHECKING
+
+import libcst as cst
+import libcst.matchers as m
+
+from modelx_cython.consts import MX_SELF
+from modelx_cython.tracer import ReturnTypeInfo
+from modelx_cython.typedefs import normalize_type
+
+if TYPE_CHECKING:
+    from modelx_cython.builder import ClassInfo
+
+_logger = logging.getLogger(__name__)
+
+_NUMERIC = (numbers.Integral, numbers.Real)
+
+
+def join_types(a: Optional[type], b: Optional[type]) -> Optional[type]:
+    if a is None:
+        return b
+    elif b is None or a is b:
+        return a
+    elif a in _NUMERIC and b in _NUMERIC:
+        return numbers.Real
+    else:
+        return object
+
+
+def _arith_type(op, a: Optional[type], b: Optional[type]) -> Optional[type]:
+    # op is a binary operator or an augmented assignment operator
+    if a is None or b is None:
+        return None
+    elif a not in _NUMERIC or b not in _NUMERIC:
+        return object
+    elif isinstance(op, (cst.Divide, cst.DivideAssign)):
+        return numbers.Real
+    elif isinstance(op, (cst.Add, cst.Subtract, cst.Multiply, cst.FloorDivide, cst.Modulo,
+                         cst.AddAssign, cst.SubtractAssign, cst.MultiplyAssign,
+                         cst.FloorDivideAssign, cst.ModuloAssign)):
+        return numbers.Integral if a is b is numbers.Integral else numbers.Real
+    elif isinstance(op, (cst.Power, cst.PowerAssign)):
+        # int ** int can be float for negative exponents
+        return numbers.Real if numbers.Real in (a, b) else object
+    else:
+        return object
+
+
+class StaticCellsInfo:
+    """Type information of a cells inferred from formulas
+
+    Provides the attributes of :class:`~modelx_cython.tracer.RuntimeCellsInfo`
+    that :class:`~modelx_cython.builder.CombinedCellsInfo` uses.
+    Minimum and maximum arguments are not known, so the ranges of arrays
+    come from the spec or from traced cells with the same parameters.
+    """
+
+    def __init__(self, fqname: str, arg_types: Dict[str, type], ret_type: type):
+        self.fqname = fqname
+        self.arg_types = arg_types
+        self.max_args = {}
+        self.min_args = {}
+        self.ret_type = ReturnTypeInfo(ret_type)
+
+    def has_args(self):
+        return bool(len(self.arg_types))
+
+
+def _can_complete(stmts) -> bool:
+    """Whether the statements can complete normally
+
+    False only if the last statement surely returns or raises,
+    so a formula whose body can complete returns None at the end.
+    """
+    if not stmts:
+        return True
+    last = stmts[-1]
+    if isinstance(last, cst.SimpleStatementLine):
+        return not isinstance(last.body[-1], (cst.Return, cst.Raise))
+    elif isinstance(last, cst.If):
+        if last.orelse is None:
+            return True
+        orelse = [last.orelse] if isinstance(last.orelse, cst.If) else last.orelse.body.body
+        return _can_complete(last.body.body) or _can_complete(orelse)
+    elif isinstance(last, cst.Try):
+        if last.finalbody is not None and not _can_complete(last.finalbody.body.body):
+            return False
+        body = last.orelse.body.body if last.orelse is not None else last.body.body
+        return (_can_complete(body)
+                or any(_can_complete(h.body.body) for h in last.handlers))
+    elif isinstance(last, cst.With):
+        return _can_complete(last.body.body)
+    elif isinstance(last, cst.While):
+        return not (m.matches(last.test, m.Name("True"))
+                    and not m.findall(last.body, m.Break()))
+    else:
+        return True
+
+
+class _FormulaScanner(cst.CSTVisitor):
+    """Collect returns, local bindings and cells calls in a formula"""
+
+    def __init__(self):
+        self.returns = []       # expressions, None for bare returns
+        self.falls_through = False  # Whether the end of the body is reachable
+        self.assigns = []       # (name, op, expression) in order of appearance
+        self.ranges = set()     # names bound by for loops over range
+        self.others = set()     # names bound otherwise
+        self.calls = []         # self.<name>(...) calls
+        self._depth = 0         # nesting level of functions and lambdas
+
+    def visit_FunctionDef(self, node):
+        self._depth += 1
+        if self._depth == 1:
+            self.falls_through = _can_complete(node.body.body)
+
+    def leave_FunctionDef(self, original_node):
+        self._depth -= 1
+
+    def visit_Lambda(self, node):
+        self._depth += 1
+
+    def leave_Lambda(self, original_node):
+        self._depth -= 1
+
+    def visit_Return(self, node):
+        if self._depth == 1:
+            self.returns.append(node.value)
+
+    def visit_Assign(self, node):
+        for t in node.targets:
+            if isinstance(t.target, cst.Name):
+                self.assigns.append((t.target.value, None, node.value))
+            else:
+                self._add_others(t.target)
+
+    def visit_AnnAssign(self, node):
+        if isinstance(node.target, cst.Name) and node.value is not None:
+            self.assigns.append((node.target.value, None, node.value))
+        else:
+            self._add_others(node.target)
+
+    def visit_AugAssign(self, node):
+        if isinstance(node.target, cst.Name):
+            self.assigns.append((node.target.value, node.operator, node.value))
+
+    def visit_For(self, node):
+        if (isinstance(node.target, cst.Name)
+                and m.matches(node.iter, m.Call(func=m.Name("range")))):
+            self.ranges.add(node.target.value)
+        else:
+            self._add_others(node.target)
+
+    def visit_CompFor(self, node):
+        self._add_others(node.target)
+
+    def visit_NamedExpr(self, node):
+        self._add_others(node.target)
+
+    def visit_AsName(self, node):
+        self._add_others(node.name)
+
+    def visit_Call(self, node):
+        if m.matches(node.func, m.Attribute(value=m.Name(MX_SELF), attr=m.Name())):
+            self.calls.append(node)
+
+    def _add_others(self, target):
+        if isinstance(target, cst.Name):
+            self.others.add(target.value)
+        else:
+            for n in m.findall(target, m.Name()):
+                self.others.add(n.value)
+
+
+class TypeInferrer:
+    """Infer types of untraced cells in a class from the formulas
+
+    The types are computed as a fixed point over all the formulas of
+    the class, as an untraced cells can call or be called by other
+    untraced cells. Argument types of an untraced cells are joined from
+    the calls to it in the class. Calls from other classes are not
+    looked into.
+    """
+
+    def __init__(self, cls_info: "ClassInfo", formulas: Mapping[str, cst.FunctionDef]):
+        self.cls_info = cls_info
+        self.scans = {}
+        for name, node in formulas.items():
+            scanner = _FormulaScanner()
+            node.visit(scanner)
+            self.scans[name] = scanner
+
+        self.targets = [name for name, c in cls_info.cells.items()
+                        if not c.is_special() and not c.has_typeinfo()
+                        and name in self.scans]
+        self.ret_types: Dict[str, Optional[type]] = {n: None for n in self.targets}
+        self.arg_types: Dict[str, Dict[str, Optional[type]]] = {
+            n: {p: None for p in cls_info.cells[n].params} for n in self.targets}
+
+    def infer(self) -> Dict[str, StaticCellsInfo]:
+        if not self.targets:
+            return {}
+
+        changed = True
+        while changed:
+            changed = False
+            arg_types = {n: {p: None for p in ps} for n, ps in self.arg_types.items()}
+            for name, scan in self.scans.items():
+                env = self._get_locals(name, scan)
+                self._add_call_types(scan, env, arg_types)
+                if name in self.ret_types:
+                    ret_t = self.ret_types[name]
+                    for expr in scan.returns:
+                        t = self._get_type(expr, env) if expr is not None else object
+                        ret_t = join_types(ret_t, t)
+                    if scan.returns == [] or scan.falls_through:
+                        ret_t = object  # None returned
+                    if ret_t is not self.ret_types[name]:
+                        self.ret_types[name] = ret_t
+                        changed = True
+
+            if arg_types != self.arg_types:
+                self.arg_types = arg_types
+                changed = True
+
+        result = {}
+        for name in self.targets:
+            cells = self.cls_info.cells[name]
+            ret_t = self.ret_types[name] or object
+            arg_t = {p: t or object for p, t in self.arg_types[name].items()}
+            if ret_t is object and all(t is object for t in arg_t.values()):
+                continue
+            result[name] = StaticCellsInfo(cells.fqname, arg_t, ret_t)
+            _logger.info(
+                f"inferred types of {cells.fqname}: "
+                + ", ".join(f"{k}: {v.__name__}" for k, v in arg_t.items())
+                + f" -> {ret_t.__name__}")
+
+        return result
+
+    def _get_param_types(self, name) -> Dict[str, Optional[type]]:
+        cells = self.cls_info.cells[name]
+        if name in self.arg_types:
+            return dict(self.arg_types[name])
+        elif cells.has_typeinfo():
+            return {p: normalize_type(cells.get_argtype(p)) for p in cells.params}
+        else:
+            return {p: object for p in cells.params}
+
+    def _get_locals(self, name, scan) -> Dict[str, Optional[type]]:
+        env = self._get_param_types(name)
+        for n in scan.ranges:
+            env[n] = join_types(env.get(n), numbers.Integral)
+        for n in scan.others:
+            env[n] = object
+
+        # Bindings can depend on themselves, as in 'pv = pv + x'
+        changed = True
+        while changed:
+            changed = False
+            for n, op, expr in scan.assigns:
+                t = self._get_type(expr, env)
+                if op is not None:
+                    t = _arith_type(op, env.get(n), t)
+                t = join_types(env.get(n), t)
+                if t is not env.get(n):
+                    env[n] = t
+                    changed = True
+        return env
+
+    def _add_call_types(self, scan, env, arg_types):
+        for call in scan.calls:
+            name = call.func.attr.value
+            if name not in arg_types:
+                continue
+            params = self.cls_info.cells[name].params
+            types = arg_types[name]
+            for i, arg in enumerate(call.args):
+                if arg.star or (arg.keyword is None and i >= len(params)):
+                    for p in params:
+                        types[p] = object
+                    break
+                p = arg.keyword.value if arg.keyword else params[i]
+                if p in types:
+                    types[p] = join_types(types[p], self._get_type(arg.value, env))
+
+    def _get_cells_type(self, name) -> Optional[type]:
+        if name in self.ret_types:
+            return self.ret_types[name]
+
+        cells = self.cls_info.cells[name]
+        if cells.has_typeinfo() and not cells.is_array_returned:
+            return normalize_type(cells.norm_type)
+        else:
+            return object
+
+    def _get_type(self, node: cst.BaseExpression, env) -> Optional[type]:
+
+        if isinstance(node, cst.Integer):
+            return numbers.Integral
+        elif isinstance(node, cst.Float):
+            return numbers.Real
+        elif isinstance(node, (cst.SimpleString, cst.ConcatenatedString)):
+            return str
+        elif isinstance(node, cst.Name):
+            if node.value in ("True", "False"):
+                return bool
+            return env.get(node.value, object)
+
+        elif isinstance(node, cst.BinaryOperation):
+            return _arith_type(node.operator,
+                               self._get_type(node.left, env),
+                               self._get_type(node.right, env))
+
+        elif isinstance(node, cst.UnaryOperation):
+            if isinstance(node.operator, cst.Not):
+                return bool
+            t = self._get_type(node.expression, env)
+            if isinstance(node.operator, (cst.Minus, cst.Plus)) and t in _NUMERIC:
+                return t
+            return t and object
+
+        elif isinstance(node, cst.Comparison):
+            return bool
+
+        elif isinstance(node, cst.BooleanOperation):
+            return join_types(self._get_type(node.left, env),
+                              self._get_type(node.right, env))
+
+        elif isinstance(node, cst.IfExp):
+            return join_types(self._get_type(node.body, env),
+                              self._get_type(node.orelse, env))
+
+        elif isinstance(node, cst.Attribute):
+            if m.matches(node.value, m.Name(MX_SELF)):
+                ref = self.cls_info.refs.get(node.attr.value)
+                if ref is not None and ref.type_ is not None and not ref.mx_class:
+                    return normalize_type(ref.type_)
+            return object
+
+        elif isinstance(node, cst.Call):
+            return self._get_call_type(node, env)
+
+        else:
+            return object
+
+    def _get_call_type(self, node: cst.Call, env) -> Optional[type]:
+
+        if any(arg.keyword or arg.star for arg in node.args):
+            return object
+
+        func = node.func
+        if m.matches(func, m.Attribute(value=m.Name(MX_SELF), attr=m.Name())):
+            name = func.attr.value
+            if name in self.cls_info.cells:
+                return self._get_cells_type(name)
+            return object
+
+        elif isinstance(func, cst.Name) and func.value not in env:
+            args = [self._get_type(a.value, env) for a in node.args]
+            if func.value in ("max", "min") and len(args) >= 2:
+                t = None
+                for a in args:
+                    if a is None:
+                        return None
+                    t = join_types(t, a)
+                return t
+            elif func.value == "abs" and len(args) == 1:
+                return args[0] if args[0] in _NUMERIC or args[0] is None else object
+            elif func.value == "float":
+                return numbers.Real
+            elif func.value in ("int", "len"):
+                return numbers.Integral
+            elif func.value == "bool":
+                return bool
+
+        return object
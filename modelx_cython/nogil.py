@@ -0,0 +1,259 @@
+# Copyright (c) 2023-2025 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Analysis of cells that can be calculated without the GIL
+
+A cells can be declared ``nogil`` if its formula only returns
+arithmetic of numbers, its arguments, refs of numbers and the values
+of other cells in the same space that can be declared ``nogil``,
+and its values are cached in C variables or C arrays.
+The cells specified ``nogil`` in the spec are declared ``nogil``
+together with all the cells they call, or none of them are.
+"""
+
+import numbers
+import logging
+from typing import Dict, Iterable, Mapping, Optional, Set, TYPE_CHECKING
+
+import libcst as cst
+import libcst.matchers as m
+
+from modelx_cython.consts import MX_SELF
+from modelx_cython.typedefs import normalize_type
+
+if TYPE_CHECKING:
+    from modelx_cython.builder import ClassInfo
+
+_logger = logging.getLogger(__name__)
+
+_NUMERIC = (numbers.Integral, numbers.Real)
+
+_BINARY_OPS = (cst.Add, cst.Subtract, cst.Multiply, cst.Divide,
+               cst.FloorDivide, cst.Modulo)
+
+_BUILTINS = ("max", "min", "abs")  # Inlined by Cython for C values
+
+
+class NogilAnalyzer:
+    """Find cells in a class to declare ``nogil``
+
+    Formulas are checked on the syntax tree. Power operators are
+    not allowed, as Cython can calculate ``int ** int`` as a Python
+    object. Assignments to local variables are not allowed either,
+    as locals can be typed as Python objects.
+    """
+
+    def __init__(self, cls_info: "ClassInfo", formulas: Mapping[str, cst.FunctionDef]):
+        self.cls_info = cls_info
+        self.formulas = formulas
+        self._reasons: Dict[str, Optional[str]] = {}  # None if cells can be nogil
+
+    def analyze(self, names: Iterable[str]) -> Set[str]:
+        """Return the cells to declare nogil from the cells specified nogil"""
+        result = set()
+        for name in names:
+            cells = self.cls_info.cells[name]
+            closure = self._get_closure(name)
+            reasons = [(n, self._get_reason(n)) for n in closure]
+            reasons = [(n, r) for n, r in reasons if r]
+            if reasons:
+                n, r = reasons[0]
+                _logger.warning(
+                    f"{cells.fqname} is not declared nogil as "
+                    + ("" if n == name else f"it calls {n} and ")
+                    + r)
+            else:
+                result.update(closure)
+
+        for name in sorted(result):
+            _logger.info(f"{self.cls_info.cells[name].fqname} is declared nogil")
+
+        return result
+
+    def _get_closure(self, name) -> Set[str]:
+        # name and all the cells in the class called from it directly or indirectly
+        result = set()
+        names = [name]
+        while names:
+            n = names.pop()
+            if n in result:
+                continue
+            result.add(n)
+            if n in self.formulas:
+                for call in m.findall(self.formulas[n].body, m.Call(
+                        func=m.Attribute(value=m.Name(MX_SELF), attr=m.Name()))):
+                    callee = call.func.attr.value
+                    if callee in self.cls_info.cells:
+                        names.append(callee)
+        return result
+
+    def _get_reason(self, name) -> Optional[str]:
+        if name not in self._reasons:
+            self._reasons[name] = self._check_cells(name)
+        return self._reasons[name]
+
+    def _check_cells(self, name) -> Optional[str]:
+        """Return why the cells cannot be nogil, or None if it can"""
+        cells = self.cls_info.cells[name]
+
+        if cells.is_special():
+            return "it is not a cells"
+        elif name not in self.formulas:
+            return "its formula is not found"
+        elif not cells.has_typeinfo():
+            return "its types are unknown"
+        elif (normalize_type(cells.norm_type) not in _NUMERIC
+              or cells.is_array_returned):
+            return "it does not return a number"
+
+        if cells.has_args():
+            for p in cells.params:
+                if normalize_type(cells.get_argtype(p)) not in _NUMERIC:
+                    return f"its parameter {p} is not a number"
+            reason = self._check_cache(cells)
+            if reason:
+                return reason
+
+        for stmt in self.formulas[name].body.body:
+            reason = self._check_stmt(stmt, cells)
+            if reason:
+                return reason
+
+        return None
+
+    def _check_cache(self, cells) -> Optional[str]:
+        if not cells.is_arrayable() or cells.is_buffered():
+            return "its values are not cached in C arrays"
+        return None
+
+    def _check_stmt(self, stmt: cst.BaseStatement, cells) -> Optional[str]:
+
+        if isinstance(stmt, cst.SimpleStatementLine):
+            for s in stmt.body:
+                if isinstance(s, cst.Return) and s.value is not None:
+                    reason = self._check_expr(s.value, cells)
+                    if reason:
+                        return reason
+                elif (isinstance(s, cst.Expr)
+                      and isinstance(s.value, (cst.SimpleString, cst.ConcatenatedString))):
+                    continue    # Docstring
+                elif isinstance(s, cst.Pass):
+                    continue
+                else:
+                    return "its formula has statements other than if and return"
+            return None
+
+        elif isinstance(stmt, cst.If):
+            reason = self._check_expr(stmt.test, cells)
+            if reason:
+                return reason
+            for s in stmt.body.body:
+                reason = self._check_stmt(s, cells)
+                if reason:
+                    return reason
+            if stmt.orelse is not None:
+                if isinstance(stmt.orelse, cst.If):     # elif
+                    return self._check_stmt(stmt.orelse, cells)
+                for s in stmt.orelse.body.body:
+                    reason = self._check_stmt(s, cells)
+                    if reason:
+                        return reason
+            return None
+
+        else:
+            return "its formula has statements other than if and return"
+
+    def _check_expr(self, node: cst.BaseExpression, cells) -> Optional[str]:
+
+        if isinstance(node, (cst.Integer, cst.Float)):
+            return None
+
+        elif isinstance(node, cst.Name):
+            if node.value in ("True", "False") or node.value in cells.params:
+                return None
+            return f"it refers to {node.value}"
+
+        elif isinstance(node, cst.BinaryOperation):
+            if not isinstance(node.operator, _BINARY_OPS):
+                op = cst.Module([]).code_for_node(node.operator).strip()
+                return f"it uses the operator '{op}'"
+            return (self._check_expr(node.left, cells)
+                    or self._check_expr(node.right, cells))
+
+        elif isinstance(node, cst.UnaryOperation):
+            if isinstance(node.operator, cst.BitInvert):
+                return "it uses the operator '~'"
+            return self._check_expr(node.expression, cells)
+
+        elif isinstance(node, cst.Comparison):
+            for c in node.comparisons:
+                if isinstance(c.operator, (cst.In, cst.NotIn, cst.Is, cst.IsNot)):
+                    return "it uses comparisons other than of numbers"
+            return (self._check_expr(node.left, cells)
+                    or next(filter(None, (self._check_expr(c.comparator, cells)
+                                          for c in node.comparisons)), None))
+
+        elif isinstance(node, cst.BooleanOperation):
+            # 'and' and 'or' of different C types are Python objects
+            for operand in (node.left, node.right):
+                if not isinstance(operand, (cst.Comparison, cst.BooleanOperation)) and not (
+                        isinstance(operand, cst.UnaryOperation)
+                        and isinstance(operand.operator, cst.Not)):
+                    return "it uses 'and' or 'or' on other than conditions"
+            return (self._check_expr(node.left, cells)
+                    or self._check_expr(node.right, cells))
+
+        elif isinstance(node, cst.IfExp):
+            return (self._check_expr(node.test, cells)
+                    or self._check_expr(node.body, cells)
+                    or self._check_expr(node.orelse, cells))
+
+        elif isinstance(node, cst.Attribute):
+            if m.matches(node.value, m.Name(MX_SELF)):
+                ref = self.cls_info.refs.get(node.attr.value)
+                if (ref is not None and ref.type_ is not None and not ref.mx_class
+                        and normalize_type(ref.type_) in _NUMERIC):
+                    return None
+            return f"it refers to {cst.Module([]).code_for_node(node)}"
+
+        elif isinstance(node, cst.Call):
+            return self._check_call(node, cells)
+
+        else:
+            return f"it has {cst.Module([]).code_for_node(node)}"
+
+    def _check_call(self, node: cst.Call, cells) -> Optional[str]:
+
+        code = cst.Module([]).code_for_node(node.func)
+        if any(arg.keyword or arg.star for arg in node.args):
+            return f"it calls {code} with keyword or star arguments"
+
+        func = node.func
+        if m.matches(func, m.Attribute(value=m.Name(MX_SELF), attr=m.Name())):
+            callee = self.cls_info.cells.get(func.attr.value)
+            if callee is None or callee.is_special():
+                return f"it calls {code}"
+            elif len(node.args) != len(callee.params):
+                return f"it calls {code} with {len(node.args)} arguments"
+
+        elif not (isinstance(func, cst.Name) and func.value in _BUILTINS
+                  and func.value not in cells.params):
+            return f"it calls {code}"
+
+        for arg in node.args:
+            reason = self._check_expr(arg.value, cells)
+            if reason:
+                return reason
+
+        return None
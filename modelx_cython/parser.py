@@ -104,6 +104,7 @@ class ModuleVisitor(m.MatcherDecoratableVisitor, ParentScopeAddin):
         self.module = module
         self.source = source
         self.cells_info = {}
+        self.formulas = {}  # {class_name: {cells_name: FunctionDef of formula}}
         self.ref_info = {}  # {class_name: {name: CombinedRefInfo}}
         self.classes = []
         self.spaces = {}  # Parent class name to list of child space names
@@ -181,7 +182,8 @@ class ModuleVisitor(m.MatcherDecoratableVisitor, ParentScopeAddin):
 
             if original_node.name.value[: len(FORMULA_PREF)] == FORMULA_PREF:
                 # _f_ methods
-                pass
+                name = original_node.name.value[len(FORMULA_PREF):]
+                self.formulas.setdefault(cls_name, {})[name] = original_node
             elif original_node.name.value[: len(GLOBAL_PREF)] == GLOBAL_PREF:
                 # _mx_ methods
                 pass
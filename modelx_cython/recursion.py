@@ -0,0 +1,113 @@
+# Copyright (c) 2023-2025 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Analysis of cells recursing on their previous values
+
+A cells such as ``pols_if(t)`` below calls itself on ``t - 1`` down to
+the base index 0::
+
+    def pols_if(t):
+        if t == 0:
+            return pols_if_init()
+        else:
+            return pols_if(t - 1) - pols_lapse(t - 1) - ...
+
+Values of such a cells whose values are cached in C arrays are
+calculated forward from the lowest index not calculated, instead of
+recursing down to it, so calls on large indexes do not exhaust
+the stack. Values between the base index and the index called are
+calculated whether or not the formula would call them.
+"""
+
+from typing import NamedTuple, Optional, Sequence
+
+import libcst as cst
+import libcst.matchers as m
+
+from modelx_cython.consts import MX_SELF
+
+
+class Recursion(NamedTuple):
+    """Parameter a cells recurses on and its base index"""
+    param: str
+    base: int
+
+
+def find_recursion(name: str, params: Sequence[str],
+                   formula: cst.FunctionDef) -> Optional[Recursion]:
+    """Return how a cells recurses on the previous index, or None
+
+    The formula must call the cells only with its parameters,
+    except for one parameter ``p`` passed as ``p - 1`` in all the calls,
+    and must return without the calls if ``p`` is at or below the base,
+    by starting with ``if p == c:``, ``if p <= c:`` or ``if p < c + 1:``,
+    or by returning ``... if p == c else ...``.
+    """
+    calls = m.findall(formula.body, m.Call(
+        func=m.Attribute(value=m.Name(MX_SELF), attr=m.Name(name))))
+    if not calls:
+        return None
+
+    param = None
+    for call in calls:
+        if len(call.args) != len(params) or any(
+                arg.keyword or arg.star for arg in call.args):
+            return None
+        prev = [p for p, arg in zip(params, call.args)
+                if not m.matches(arg.value, m.Name(p))]
+        if len(prev) != 1 or not m.matches(
+                call.args[params.index(prev[0])].value,
+                m.BinaryOperation(left=m.Name(prev[0]),
+                                  operator=m.Subtract(), right=m.Integer("1"))):
+            return None
+        elif param is not None and param != prev[0]:
+            return None
+        param = prev[0]
+
+    stmts = [s for s in formula.body.body if not m.matches(
+        s, m.SimpleStatementLine(body=[m.Expr(m.SimpleString() | m.ConcatenatedString())]))]
+    if not stmts:
+        return None
+
+    if isinstance(stmts[0], cst.If):
+        test, body = stmts[0].test, stmts[0].body
+    elif (m.matches(stmts[0], m.SimpleStatementLine(body=[m.Return(m.IfExp())]))
+          and len(stmts) == 1):
+        test, body = stmts[0].body[0].value.test, stmts[0].body[0].value.body
+    else:
+        return None
+
+    base = _get_base(test, param)
+    if base is None or base < 0 or m.findall(body, m.Call(
+            func=m.Attribute(value=m.Name(MX_SELF), attr=m.Name(name)))):
+        return None
+
+    return Recursion(param, base)
+
+
+def _get_base(test: cst.BaseExpression, param: str) -> Optional[int]:
+    """Return c from p == c, p <= c or c - 1 from p < c"""
+    if not (isinstance(test, cst.Comparison) and len(test.comparisons) == 1
+            and m.matches(test.left, m.Name(param))
+            and isinstance(test.comparisons[0].comparator, cst.Integer)):
+        return None
+
+    op = test.comparisons[0].operator
+    value = test.comparisons[0].comparator.evaluated_value
+    if isinstance(op, (cst.Equal, cst.LessThanEqual)):
+        return value
+    elif isinstance(op, cst.LessThan):
+        return value - 1
+    else:
+        return None
@@ -0,0 +1,247 @@
+# Copyright (c) 2023-2025 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Rewriting of sums of cells values over ranges in formulas
+
+A loop in a formula such as ``pv_claims`` in BasicTerm_SC below sums
+the values of cells whose values are cached in C arrays::
+
+    pv = 0.0
+    for t in range(self.proj_len()):
+        pv += self.claims(t) * self.disc_factor(t)
+    return pv
+
+The loop is rewritten to a C loop that reads the values from the
+arrays and calls the cells only on indexes not calculated yet,
+if the range is within the arrays. ``pv`` is declared as a C double
+if it is only assigned a float literal besides the sums.
+The arrays of cells sharing values among item spaces are read from
+the space the item spaces are created from.
+"""
+
+import numbers
+import textwrap
+from typing import Dict, Optional, TYPE_CHECKING
+
+import libcst as cst
+import libcst.matchers as m
+
+from modelx_cython.config import TransSpec
+from modelx_cython.consts import CY_MOD, MX_SELF, MX_SHARED, VAR_PREF, HAS_PREF
+from modelx_cython.typedefs import normalize_type
+
+if TYPE_CHECKING:
+    from modelx_cython.builder import ClassInfo, CombinedCellsInfo
+
+_ARITH_OPS = (cst.Add, cst.Subtract, cst.Multiply, cst.Divide)
+
+
+class ReductionTransformer(cst.CSTTransformer):
+    """Rewrite sums over ranges in the formula of a cells"""
+
+    def __init__(self, cls_info: "ClassInfo", config: cst.PartialParserConfig):
+        self.cls_info = cls_info
+        self.config = config
+        self.count = 0
+        self.sums: Dict[str, int] = {}  # Names of sums to the numbers of loops rewritten
+        self._func: Optional[cst.FunctionDef] = None
+
+    def visit_FunctionDef(self, node: cst.FunctionDef):
+        if self._func is None:
+            self._func = node
+        else:
+            return False    # Skip nested functions
+
+    def leave_For(self, original_node: cst.For, updated_node: cst.For):
+        loop = self._match(original_node)
+        if loop is None:
+            return updated_node
+
+        var, range_args, acc, expr, callees = loop
+        if len(range_args) == 1 and any(
+                self.cls_info.cells_arg_starts[tuple(c.params)][0] > 0 for c in callees.values()):
+            return updated_node     # The arrays do not start from 0
+        n = self.count
+        self.count += 1
+        self.sums[acc] = self.sums.get(acc, 0) + 1
+
+        idx = f"_mx_r{n}"
+        size = min(self.cls_info.cells_arg_sizes[tuple(c.params)][0] for c in callees.values())
+        lo = max(self.cls_info.cells_arg_starts[tuple(c.params)][0] for c in callees.values())
+        code = cst.Module([]).code_for_node
+
+        # Spaces holding the arrays of the callees
+        owners = {name: f"_mx_s{n}" if c.is_shared() else MX_SELF
+                  for name, c in callees.items()}
+
+        fast_expr = expr.visit(_ArrayReader(var, idx, callees, owners))
+        stmts = [f"{idx}: {CY_MOD}.longlong"]
+        if any(c.is_shared() for c in callees.values()):
+            stmts.append(f"_mx_s{n}: {self.cls_info.name} = {MX_SELF} if {MX_SELF}.{MX_SHARED} "
+                         f"is None else {MX_SELF}.{MX_SHARED}")
+        if len(range_args) == 2:
+            stmts.append(f"_mx_start{n}: {CY_MOD}.longlong = {code(range_args[0])}")
+            start, cond = f"_mx_start{n}, ", f"{lo} <= _mx_start{n} and _mx_stop{n} <= {size}"
+        else:
+            start, cond = "", f"_mx_stop{n} <= {size}"
+        stmts.append(f"_mx_stop{n}: {CY_MOD}.longlong = {code(range_args[-1])}")
+
+        ensure_stmts = "".join(
+            f"if not {_get_has_expr(c, idx, owners[c.name])}:\n    {owners[c.name]}.{c.name}({idx})\n"
+            for c in callees.values())
+
+        stmts.append(textwrap.dedent("""\
+        if {cond}:
+            for {idx} in range({start}_mx_stop{n}):
+                {ensure_stmts}
+                {acc} += {fast_expr}
+        else:
+            for {var} in range({start}_mx_stop{n}):
+                {acc} += {expr}
+        """).format(
+            cond=cond, idx=idx, start=start, n=n, var=var, acc=acc,
+            ensure_stmts=textwrap.indent(ensure_stmts, " " * 8).strip(),
+            fast_expr=code(fast_expr), expr=code(expr)))
+
+        new_stmts = [cst.parse_statement(s, config=self.config) for s in stmts]
+        new_stmts[0] = new_stmts[0].with_changes(leading_lines=original_node.leading_lines)
+        return cst.FlattenSentinel(new_stmts)
+
+    def leave_FunctionDef(self, original_node, updated_node):
+        if original_node is not self._func:
+            return updated_node
+
+        # Declare sums as C doubles if only assigned a float literal besides the sums
+        body = list(updated_node.body.body)
+        for acc, count in sorted(self.sums.items()):
+            assigns = [i for i, s in enumerate(body) if m.matches(
+                s, m.SimpleStatementLine(body=[m.Assign(targets=[m.AssignTarget(m.Name(acc))])]))]
+            sums = m.findall(updated_node, m.AugAssign(target=m.Name(acc), operator=m.AddAssign()))
+            if (len(assigns) == 1
+                    and isinstance(body[assigns[0]].body[0].value, cst.Float)
+                    and len(sums) == 2 * count     # In the C loops and the others
+                    and self._count_stores(updated_node, acc) == 1):
+                assign = body[assigns[0]].body[0]
+                body[assigns[0]] = body[assigns[0]].with_changes(body=[cst.AnnAssign(
+                    target=assign.targets[0].target,
+                    annotation=cst.Annotation(cst.parse_expression(f"{CY_MOD}.double")),
+                    value=assign.value)])
+
+        return updated_node.with_changes(body=updated_node.body.with_changes(body=body))
+
+    @staticmethod
+    def _count_stores(node: cst.FunctionDef, name: str) -> int:
+        """Count assignments to name other than the sums"""
+        return len(m.findall(node, m.Assign(targets=[m.ZeroOrMore(), m.AssignTarget(m.Name(name)), m.ZeroOrMore()])
+                             | m.AnnAssign(target=m.Name(name))
+                             | m.AugAssign(target=m.Name(name), operator=~m.AddAssign())
+                             | m.For(target=m.Name(name))
+                             | m.CompFor(target=m.Name(name))
+                             | m.NamedExpr(target=m.Name(name))
+                             | m.Param(name=m.Name(name))))
+
+    def _match(self, node: cst.For):
+        """Return the parts of a loop summing cells values over a range"""
+        if not (isinstance(node.target, cst.Name) and node.orelse is None
+                and node.asynchronous is None
+                and m.matches(node.iter, m.Call(func=m.Name("range")))):
+            return None
+
+        range_args = [a.value for a in node.iter.args]
+        if not (1 <= len(range_args) <= 2) or any(
+                a.keyword or a.star for a in node.iter.args):
+            return None
+
+        body = node.body.body
+        if not (len(body) == 1 and m.matches(body[0], m.SimpleStatementLine(
+                body=[m.AugAssign(target=m.Name(), operator=m.AddAssign())]))):
+            return None
+
+        var = node.target.value
+        loops = m.findall(self._func, m.For(target=m.Name(var)))
+        if len(m.findall(self._func, m.Name(var))) != sum(
+                len(m.findall(loop, m.Name(var))) for loop in loops):
+            return None     # var is used out of loops on it
+
+        aug = body[0].body[0]
+        acc = aug.target.value
+        callees: Dict[str, "CombinedCellsInfo"] = {}
+        if acc == var or not self._check_expr(aug.value, var, acc, callees) or not callees:
+            return None
+
+        return var, range_args, acc, aug.value, callees
+
+    def _check_expr(self, node, var, acc, callees) -> bool:
+        if isinstance(node, (cst.Integer, cst.Float)):
+            return True
+        elif isinstance(node, cst.Name):
+            return node.value == var
+        elif isinstance(node, cst.BinaryOperation):
+            return (isinstance(node.operator, _ARITH_OPS)
+                    and self._check_expr(node.left, var, acc, callees)
+                    and self._check_expr(node.right, var, acc, callees))
+        elif isinstance(node, cst.UnaryOperation):
+            return (isinstance(node.operator, cst.Minus)
+                    and self._check_expr(node.expression, var, acc, callees))
+        elif m.matches(node, m.Call(func=m.Attribute(value=m.Name(MX_SELF), attr=m.Name()),
+                                    args=[m.Arg(value=m.Name(var), keyword=None, star="")])):
+            cells = self.cls_info.cells.get(node.func.attr.value)
+            if cells is not None and _is_array_cells(cells):
+                callees[cells.name] = cells
+                return True
+            return False
+        else:
+            return False
+
+
+def _is_array_cells(cells: "CombinedCellsInfo") -> bool:
+    return (not cells.is_special() and len(cells.params) == 1
+            and cells.has_typeinfo() and cells.is_arrayable() and not cells.is_buffered()
+            and normalize_type(cells.norm_type) in (numbers.Integral, numbers.Real))
+
+
+def _get_has_expr(cells: "CombinedCellsInfo", idx: str, owner: str = MX_SELF) -> str:
+    idx = cells.get_index_exprs([idx])[0]
+    v_expr = f"{owner}.{VAR_PREF}{cells.name}[{idx}]"
+    has_expr = f"{owner}.{HAS_PREF}{cells.name}"
+    if cells.has_flags == TransSpec.FLAGS_NAN:
+        return f"(not isnan({v_expr}))"
+    elif cells.has_flags == TransSpec.FLAGS_BITS:
+        return f"({has_expr}[({idx}) >> 3] & (1 << (({idx}) & 7)))"
+    else:
+        return f"{has_expr}[{idx}]"
+
+
+class _ArrayReader(cst.CSTTransformer):
+    """Replace calls of cells with reading their arrays"""
+
+    def __init__(self, var: str, idx: str, callees, owners):
+        self.var = var
+        self.idx = idx
+        self.callees = callees
+        self.owners = owners
+
+    def leave_Name(self, original_node, updated_node):
+        if original_node.value == self.var:
+            return updated_node.with_changes(value=self.idx)
+        return updated_node
+
+    def leave_Call(self, original_node, updated_node):
+        if m.matches(original_node.func, m.Attribute(value=m.Name(MX_SELF))) and (
+                original_node.func.attr.value in self.callees):
+            cells = self.callees[original_node.func.attr.value]
+            return cst.parse_expression(
+                f"{self.owners[cells.name]}.{VAR_PREF}{cells.name}"
+                f"[{cells.get_index_exprs([self.idx])[0]}]")
+        return updated_node
@@ -0,0 +1,174 @@
+# Copyright (c) 2023-2025 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Runners evaluating cells over item spaces in workers
+
+Each worker process imports the compiled model package once, and
+evaluates chunks of keys with the ``_mx_eval_items`` method generated
+in the classes of spaces with parameters. Cells declared ``nogil``
+can instead be evaluated in threads in the current process
+with the ``_mx_eval_nogil`` method.
+"""
+
+import os
+import sys
+import math
+import importlib
+import itertools
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+
+from modelx_cython.consts import MX_EVAL_ITEMS, MX_EVAL_NOGIL
+
+_logger = logging.getLogger(__name__)
+
+_space = None   # The space in a worker process
+
+
+def get_space(model_pkg: str, space: str):
+    """Return a space in the model of a compiled package
+
+    ``space`` is the dotted name of the space from the model,
+    such as ``"Projection"`` or ``"Parent.Child"``.
+    """
+    obj = importlib.import_module(model_pkg).mx_model
+    for name in space.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def _init_worker(model_pkg: str, space: str, path: Optional[str]):
+    global _space
+    if path:
+        sys.path.insert(0, path)
+    _space = get_space(model_pkg, space)
+
+
+def _eval_chunk(task):
+    cells, keys, args = task
+    return getattr(_space, MX_EVAL_ITEMS)(cells, keys, args)
+
+
+def _split(keys: Sequence, chunksize: int) -> Iterator[list]:
+    it = iter(keys)
+    while True:
+        chunk = list(itertools.islice(it, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_points(model_pkg: str, space: str, cells: str, keys: Iterable,
+                args: tuple = (), workers: Optional[int] = None,
+                chunksize: Optional[int] = None, path: Optional[str] = None,
+                start_method: Optional[str] = None) -> Iterator[np.ndarray]:
+    """Yield arrays of the values of a cells for chunks of keys
+
+    The arrays are yielded in the order of the keys as soon as each
+    chunk is calculated. See :func:`map_points` for the parameters.
+    """
+    keys = list(keys)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        # A few chunks per worker to balance load
+        chunksize = max(1, math.ceil(len(keys) / (workers * 4)))
+
+    tasks = ((cells, chunk, tuple(args)) for chunk in _split(keys, chunksize))
+    ctx = multiprocessing.get_context(start_method)
+    _logger.info(f"evaluating {cells} in {len(keys)} item spaces of {space} "
+                 f"with {workers} workers")
+
+    with ctx.Pool(workers, initializer=_init_worker,
+                  initargs=(model_pkg, space, path)) as pool:
+        yield from pool.imap(_eval_chunk, tasks)
+
+
+def map_points(model_pkg: str, space: str, cells: str, keys: Iterable,
+               args: tuple = (), workers: Optional[int] = None,
+               chunksize: Optional[int] = None, path: Optional[str] = None,
+               start_method: Optional[str] = None) -> np.ndarray:
+    """Return an array of the values of a cells in item spaces
+
+    The keys are split into chunks, and the chunks are evaluated
+    in worker processes, each of which imports the compiled model once.
+    Item spaces are deleted in the workers after their values are
+    calculated.
+
+    Args:
+        model_pkg: Name of the compiled model package, such as ``"Model_nomx_cy"``
+        space: Dotted name of the space with parameters, such as ``"Projection"``
+        cells: Name of the cells to evaluate in each item space
+        keys: Arguments to the space to create the item spaces,
+            tuples for spaces with multiple parameters
+        args: Arguments to the cells
+        workers: Number of worker processes (default: the number of CPUs)
+        chunksize: Number of keys given to a worker at a time
+        path: Path to add to ``sys.path`` in the workers to import ``model_pkg``
+        start_method: Start method of :mod:`multiprocessing`
+
+    Example:
+        >>> map_points("BasicTerm_S_nomx_cy", "Projection", "pv_net_cf", range(1, 10001))
+    """
+    results = list(iter_points(model_pkg, space, cells, keys, args=args,
+                               workers=workers, chunksize=chunksize, path=path,
+                               start_method=start_method))
+    if results:
+        return np.concatenate(results)
+    else:
+        return np.array([])
+
+
+def map_points_threaded(model_pkg: str, space: str, cells: str, keys: Iterable,
+                        threads: Optional[int] = None,
+                        chunksize: Optional[int] = None) -> np.ndarray:
+    """Return an array of the values of a nogil cells in item spaces
+
+    Same as :func:`map_points` except that the keys are evaluated
+    in threads in the current process, so the model is not imported
+    again nor pickled. The threads calculate in parallel only the cells
+    declared ``nogil``, which is specified by ``"nogil": True``
+    for the cells in the spec. Only cells without parameters can be named.
+
+    Args:
+        model_pkg: Name of the compiled model package, such as ``"Model_nomx_cy"``
+        space: Dotted name of the space with parameters, such as ``"Projection"``
+        cells: Name of the nogil cells to evaluate in each item space
+        keys: Arguments to the space to create the item spaces,
+            tuples for spaces with multiple parameters
+        threads: Number of threads (default: the number of CPUs)
+        chunksize: Number of keys given to a thread at a time
+    """
+    keys = list(keys)
+    if threads is None:
+        threads = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, math.ceil(len(keys) / (threads * 4)))
+
+    eval_nogil = getattr(get_space(model_pkg, space), MX_EVAL_NOGIL)
+    _logger.info(f"evaluating {cells} in {len(keys)} item spaces of {space} "
+                 f"with {threads} threads")
+
+    with ThreadPoolExecutor(threads) as executor:
+        results = list(executor.map(
+            lambda chunk: eval_nogil(cells, chunk), _split(keys, chunksize)))
+
+    if results:
+        return np.concatenate(results)
+    else:
+        return np.array([])
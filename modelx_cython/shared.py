@@ -0,0 +1,89 @@
+# Copyright (c) 2023-2025 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Analysis of cells sharing values among item spaces
+
+Item spaces of a space with parameters, such as ``Projection[1]``,
+``Projection[2]``, ... in BasicTerm_S, copy the refs of the space
+and differ only in the parameters, such as ``point_id``. Cells such as
+``disc_factors`` and ``inflation_factor`` in ``Projection`` do not
+refer to the parameters directly or through other cells, so their
+values are the same in all the item spaces.
+
+A cells shares values if its formula uses ``self`` only to refer to
+refs other than the parameters and to call cells sharing values.
+Such cells in item spaces call the cells in the space the items are
+created from, so the values are calculated and cached only there.
+As refs set in item spaces are not seen by such cells, cells are
+shared only if ``--share-cells`` is given.
+"""
+
+from typing import Dict, Mapping, Set, TYPE_CHECKING
+
+import libcst as cst
+import libcst.matchers as m
+
+from modelx_cython.consts import MX_SELF
+
+if TYPE_CHECKING:
+    from modelx_cython.builder import ClassInfo
+
+
+def find_shared_cells(cls_info: "ClassInfo",
+                      formulas: Mapping[str, cst.FunctionDef]) -> Set[str]:
+    """Return cells in a class with parameters sharing values among item spaces"""
+    if "__call__" not in cls_info.cells:
+        return set()
+
+    params = set(cls_info.cells["__call__"].params)
+    refs = set(cls_info.refs) - params
+
+    # Cells to cells called, for cells not referring to the parameters
+    calls: Dict[str, Set[str]] = {}
+    for name, cells in cls_info.cells.items():
+        if cells.is_special() or name not in formulas:
+            continue
+        callees = _get_callees(formulas[name], set(cls_info.cells), refs)
+        if callees is not None:
+            calls[name] = callees
+
+    # Remove cells calling cells not sharing values until none is removed
+    result = set(calls)
+    while True:
+        removed = {n for n in result if not calls[n] <= result}
+        if removed:
+            result -= removed
+        else:
+            return result
+
+
+def _get_callees(node: cst.FunctionDef, cells: Set[str], refs: Set[str]):
+    """Return cells called in a formula, or None if self is used otherwise"""
+    uses = m.findall(node.body, m.Name(MX_SELF))
+    attrs = m.findall(node.body, m.Attribute(value=m.Name(MX_SELF)))
+    calls = m.findall(node.body, m.Call(func=m.Attribute(value=m.Name(MX_SELF))))
+    if len(uses) != len(attrs):
+        return None     # self is passed or assigned
+
+    result = set()
+    called = [c.func for c in calls]
+    for attr in attrs:
+        name = attr.attr.value
+        if name in refs:
+            continue
+        elif name in cells and any(attr is f for f in called):
+            result.add(name)
+        else:
+            return None     # Parameters, child spaces or other attributes
+    return result
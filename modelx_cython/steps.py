@@ -0,0 +1,121 @@
+# Copyright (c) 2023-2025 Fumito Hamamura <fumito.ham@gmail.com>
+
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation version 3.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Scheduling of cells calling each other on previous indexes
+
+Cells such as ``pols_if``, ``pols_lapse``, ``pols_death`` and
+``pols_maturity`` in BasicTerm call each other on ``t`` and ``t - 1``,
+so calling one of them on a large ``t`` recurses through all of them
+down to ``t = 0``. Such a group of cells is a strongly connected
+component of the calls between the cells in a space that have
+one parameter of the same name and whose values are cached in C arrays.
+
+Calling the cells in a group on ``t = 0, 1, 2, ...`` in turn, in the
+order in which the cells called on the same ``t`` come first,
+finds the values the formulas call already calculated. As the cells are
+called through their methods, values are the same in any order,
+and the order only decides how deep the formulas recurse.
+"""
+
+from typing import Dict, List, Mapping, NamedTuple, Set, Tuple, TYPE_CHECKING
+
+import libcst as cst
+import libcst.matchers as m
+
+from modelx_cython.consts import MX_SELF
+
+if TYPE_CHECKING:
+    from modelx_cython.builder import ClassInfo
+
+
+class StepGroup(NamedTuple):
+    """Cells to call on each index of a parameter in the order"""
+    param: str
+    cells: Tuple[str, ...]
+
+
+def find_step_groups(cls_info: "ClassInfo",
+                     formulas: Mapping[str, cst.FunctionDef]) -> List[StepGroup]:
+    """Return groups of cells in a class calling each other"""
+
+    # Parameter names to cells
+    candidates: Dict[str, List[str]] = {}
+    for name, cells in cls_info.cells.items():
+        if (not cells.is_special() and len(cells.params) == 1 and cells.loop
+                and cells.has_typeinfo() and cells.is_arrayable()
+                and not cells.is_buffered() and name in formulas):
+            candidates.setdefault(cells.params[0], []).append(name)
+
+    result = []
+    for param, names in sorted(candidates.items()):
+        calls: Dict[str, Set[str]] = {}     # Cells to cells called
+        same: Dict[str, Set[str]] = {}      # Cells to cells called on param
+        for name in names:
+            calls[name], same[name] = set(), set()
+            for call in m.findall(formulas[name].body, m.Call(
+                    func=m.Attribute(value=m.Name(MX_SELF), attr=m.Name()))):
+                callee = call.func.attr.value
+                if callee in names:
+                    calls[name].add(callee)
+                    if (len(call.args) == 1 and not call.args[0].keyword
+                            and m.matches(call.args[0].value, m.Name(param))):
+                        same[name].add(callee)
+
+        for group in _get_components(sorted(names), calls):
+            if len(group) > 1:
+                result.append(StepGroup(param, _sort_by_calls(group, same)))
+
+    return result
+
+
+def _get_components(names: List[str], calls: Mapping[str, Set[str]]) -> List[List[str]]:
+    """Return strongly connected components of the calls"""
+    reachable = {}
+    for name in names:
+        found, stack = set(), [name]
+        while stack:
+            n = stack.pop()
+            for callee in calls[n]:
+                if callee not in found:
+                    found.add(callee)
+                    stack.append(callee)
+        reachable[name] = found
+
+    result, done = [], set()
+    for name in names:
+        if name not in done:
+            group = [n for n in names
+                     if n == name or (n in reachable[name] and name in reachable[n])]
+            done.update(group)
+            result.append(group)
+
+    return result
+
+
+def _sort_by_calls(group: List[str], same: Mapping[str, Set[str]]) -> Tuple[str, ...]:
+    """Sort cells so cells called on the same index come first
+
+    Cells calling each other on the same index are sorted by name.
+    """
+    result: List[str] = []
+    rest = list(group)
+    while rest:
+        ready = [n for n in rest if not (same[n] & set(rest)) - {n}]
+        if not ready:
+            ready = rest[:1]
+        for n in ready:
+            result.append(n)
+            rest.remove(n)
+
+    return tuple(result)
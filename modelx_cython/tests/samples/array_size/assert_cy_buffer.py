@@ -0,0 +1,14 @@
+from ArraySize_nomx_cy import mx_model
+
+
+s = mx_model.Space1
+
+assert s.foo(10) == 10
+assert s.bar(5, 10) == 10
+assert s.baz() == 1
+
+# Buffers grow beyond the traced sizes
+assert s.foo(30) == 30
+assert s.bar(5, 10) == 10
+assert s.bar(12, 3) == 12
+assert s.bar(20, 40) == 40
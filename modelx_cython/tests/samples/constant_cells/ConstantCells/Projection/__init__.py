@@ -0,0 +1,53 @@
+from modelx.serialize.jsonvalues import *
+
+_formula = None
+
+_bases = []
+
+_allow_none = None
+
+_spaces = []
+
+# ---------------------------------------------------------------------------
+# Cells
+
+def expense_acq():
+    """Acquisition expense per policy"""
+    return 300
+
+
+def inflation_rate():
+    return 0.01
+
+
+def loading_prem():
+    return 0.5
+
+
+def adj():
+    return -2
+
+
+def is_active():
+    return True
+
+
+def label():
+    return "term"
+
+
+def expense_acq2():
+    return expense_acq() * 2
+
+
+def expenses(t):
+    if is_active():
+        return expense_acq() * (1 + inflation_rate()) ** t + adj()
+    else:
+        return 0.0
+
+
+def premium():
+    return (1 + loading_prem()) * 100 - adj()
+
+
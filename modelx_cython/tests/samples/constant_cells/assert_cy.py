@@ -0,0 +1,15 @@
+import pathlib
+import modelx as mx
+from ConstantCells_nomx_cy import mx_model as cy_model
+
+m = mx.read_model(pathlib.Path(__file__).parent / "ConstantCells")
+
+for name in ["expense_acq", "inflation_rate", "loading_prem", "adj", "is_active",
+             "label", "expense_acq2", "premium"]:
+    assert getattr(cy_model.Projection, name)() == getattr(m.Projection, name)()
+
+for t in range(12):
+    assert cy_model.Projection.expenses(t) == m.Projection.expenses(t)
+
+cy_model.Projection._mx_clear_cache()
+assert cy_model.Projection.premium() == m.Projection.premium()
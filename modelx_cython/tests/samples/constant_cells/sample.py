@@ -0,0 +1,8 @@
+from ConstantCells_nomx import mx_model
+
+space = mx_model.Projection
+for t in range(10):
+    space.expenses(t)
+space.premium()
+space.expense_acq2()
+space.label()
@@ -0,0 +1,10 @@
+from DeepRecursion_nomx_cy import mx_model
+
+# Called without a deep stack as values are calculated forward
+space = mx_model.Space1
+assert space.foo(100_000) == 100_000
+assert space.foo(99_999) == 99_999
+
+space._mx_clear_cache()
+assert space.foo(50_000) == 50_000
+assert space.foo(100_000) == 100_000
@@ -0,0 +1,10 @@
+{"spaces":
+     {"Space1":
+          {"cells_params":
+               {"i":
+                    {"size": 100_001}
+                },
+           "cells": {"foo": {"has_flags": "bits"}}
+           }
+      }
+ }
@@ -0,0 +1,29 @@
+from modelx.serialize.jsonvalues import *
+
+_formula = None
+
+_bases = []
+
+_allow_none = None
+
+_spaces = []
+
+# ---------------------------------------------------------------------------
+# Cells
+
+def disc(r):
+    return 1 / (1 + r)
+
+
+def periods(r, n):
+    return n if r > 0 else -n
+
+
+def is_neg(r):
+    return r < 0
+
+
+def label(r):
+    return str(r)
+
+
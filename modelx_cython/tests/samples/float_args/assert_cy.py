@@ -0,0 +1,18 @@
+from FloatArgs_nomx_cy import mx_model
+
+space = mx_model.Rates
+
+# Tables grow beyond their initial size
+rates = [i / 1000 - 0.5 for i in range(5000)]
+for _ in range(2):
+    assert [space.disc(r) for r in rates] == [1 / (1 + r) for r in rates]
+    assert [space.periods(r, 3) for r in rates] == [3 if r > 0 else -3 for r in rates]
+    assert [space.is_neg(r) for r in rates] == [r < 0 for r in rates]
+
+assert space.periods(0.5, -(2 ** 40)) == -(2 ** 40)
+assert space.disc(-0.0) == space.disc(0.0) == 1.0
+assert space.label(0.5) == "0.5"
+
+space._mx_clear_cache()
+assert space.disc(1.0) == 0.5
+assert space.periods(1.0, 5) == 5
@@ -0,0 +1,7 @@
+from FloatArgs_nomx import mx_model
+
+space = mx_model.Rates
+space.disc(0.01)
+space.periods(0.01, 10)
+space.is_neg(-0.5)
+space.label(0.5)
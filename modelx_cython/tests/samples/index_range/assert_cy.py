@@ -1,10 +1,13 @@
-import sys
 from IndexRange_nomx_cy import mx_model
 
+s = mx_model.Space1
 
-try:
-    mx_model.Space1.foo(11)
-except IndexError:
-    sys.exit(0)
+# Args out of the arrays are cached in dicts
+assert s.foo(11) == 12
+assert s.foo(100) == 101
+assert s.foo(100) == 101
+assert s.foo(-1) == 0
+assert s.foo(10) == 11
 
-sys.exit(1)
+s._mx_clear_cache()
+assert s.foo(100) == 101
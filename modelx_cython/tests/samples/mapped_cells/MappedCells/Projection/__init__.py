@@ -0,0 +1,25 @@
+from modelx.serialize.jsonvalues import *
+
+_formula = None
+
+_bases = []
+
+_allow_none = None
+
+_spaces = []
+
+# ---------------------------------------------------------------------------
+# Cells
+
+def claims(t):
+    return t * 10
+
+
+def total_claims(n):
+    return sum(map(claims, range(n)))
+
+
+def premiums(t):
+    return t * 20
+
+
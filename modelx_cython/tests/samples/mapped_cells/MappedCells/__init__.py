@@ -0,0 +1,10 @@
+from modelx.serialize.jsonvalues import *
+
+_name = "MappedCells"
+
+_allow_none = False
+
+_spaces = [
+    "Projection"
+]
+
@@ -0,0 +1,8 @@
+from MappedCells_nomx_cy import mx_model
+
+proj = mx_model.Projection
+
+# claims is kept as it is passed to map
+assert proj.total_claims(5) == 100
+assert proj.claims(3) == 30
+assert not hasattr(proj, "premiums")
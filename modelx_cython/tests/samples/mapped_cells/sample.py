@@ -0,0 +1,4 @@
+from MappedCells_nomx import mx_model
+
+mx_model.Projection.total_claims(5)
+mx_model.Projection.premiums(5)
@@ -0,0 +1,46 @@
+from modelx.serialize.jsonvalues import *
+
+_formula = lambda point_id: None
+
+_bases = []
+
+_allow_none = None
+
+_spaces = []
+
+# ---------------------------------------------------------------------------
+# Cells
+
+def disc(t):
+    return 1.0 if t == 0 else disc(t - 1) / (1 + rate)
+
+
+def cf(t):
+    return point_id * (t + 1) if t <= term else 0
+
+
+def pv(t):
+    if t < term:
+        return cf(t) * disc(t) + pv(t + 1)
+    else:
+        return cf(t) * disc(t)
+
+
+def pv_total():
+    return pv(0)
+
+
+def max_cf():
+    return max(cf(t) for t in range(term + 1))
+
+
+def pv_max():
+    return pv_total() + max_cf()
+
+
+# ---------------------------------------------------------------------------
+# References
+
+rate = 0.03
+
+term = 10
\ No newline at end of file
@@ -0,0 +1,35 @@
+import pathlib
+import modelx as mx
+from NogilCells_nomx_cy import mx_model as cy_model
+
+m = mx.read_model(pathlib.Path(__file__).parent / "NogilCells")
+
+for i in range(1, 6):
+    assert cy_model.Projection[i].pv_total() == m.Projection[i].pv_total()
+    assert cy_model.Projection[i].pv_max() == m.Projection[i].pv_max()
+
+proj = cy_model.Projection
+
+assert list(proj._mx_eval_nogil("pv_total", range(6, 10))) == [
+    m.Projection[i].pv_total() for i in range(6, 10)]
+
+try:
+    del proj[6]
+except KeyError:
+    pass
+else:
+    raise AssertionError("KeyError not thrown")
+
+try:
+    proj._mx_eval_nogil("pv_max", range(6, 10))
+except ValueError:
+    pass
+else:
+    raise AssertionError("ValueError not thrown")
+
+try:
+    proj[1].disc(100)
+except IndexError:
+    pass
+else:
+    raise AssertionError("IndexError not thrown")
@@ -0,0 +1,32 @@
+import pathlib
+import modelx as mx
+from NogilCells_nomx_cy import mx_model as cy_model
+
+m = mx.read_model(pathlib.Path(__file__).parent / "NogilCells")
+pv_3 = m.Projection[1].pv_total()
+cf_3 = m.Projection[1].max_cf()
+m.Projection.rate = 0.05
+pv_5 = m.Projection[1].pv_total()
+
+proj = cy_model.Projection
+
+item = proj[1]
+assert item.pv_total() == pv_3
+assert item.max_cf() == cf_3
+disc = item.disc(1)
+item.rate = 0.05
+assert item.disc(1) == disc     # Cached
+
+item._mx_clear_cache(keep=["pv_total"])
+assert item.pv_total() == pv_3
+assert item.disc(1) == 1 / 1.05
+assert item.max_cf() == cf_3
+
+item._mx_clear_cache()
+assert item.pv_total() == pv_5
+
+# Only the values of the evaluated cells remain in the kept item spaces
+assert list(proj._mx_eval_items("pv_total", [2], keep=True, clear=True)) == [2 * pv_3]
+proj[2].rate = 0.05
+assert proj[2].pv_total() == 2 * pv_3
+assert proj[2].disc(1) == 1 / 1.05
@@ -0,0 +1,36 @@
+import pathlib
+import modelx as mx
+from NogilCells_nomx_cy import mx_model as cy_model
+
+m = mx.read_model(pathlib.Path(__file__).parent / "NogilCells")
+
+proj = cy_model.Projection
+
+# pv_max gathers max_cf from the item spaces
+for name in ["pv_total", "pv_max"]:
+    assert proj._mx_eval_columns(name, range(1, 6)).tolist() == [
+        m.Projection[i].cells[name]() for i in range(1, 6)]
+
+assert proj._mx_eval_columns("pv", range(1, 6), (3,)).tolist() == [
+    m.Projection[i].pv(3) for i in range(1, 6)]
+
+# Item spaces created in the method are deleted
+proj._mx_eval_columns("pv_total", range(11, 14))
+try:
+    del proj[11]
+except KeyError:
+    pass
+else:
+    raise AssertionError("KeyError not thrown")
+
+# Refs of item spaces differ
+proj[2].term = 5
+expected = [proj[i].pv_total() for i in range(1, 4)]
+assert proj._mx_eval_columns("pv_total", range(1, 4)).tolist() == expected
+
+try:
+    proj._mx_eval_columns("max_cf", range(1, 4))
+except ValueError:
+    pass
+else:
+    raise AssertionError("ValueError not thrown")
@@ -0,0 +1,5 @@
+from NogilCells_nomx import mx_model
+
+
+for i in range(1, 4):
+    mx_model.Projection[i].pv_max()
@@ -0,0 +1,8 @@
+{"spaces":
+     {"Projection":
+          {"cells":
+               {"pv_total": {"nogil": True},
+                "pv_max": {"nogil": True}}
+           }
+      }
+ }
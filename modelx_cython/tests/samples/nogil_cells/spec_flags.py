@@ -0,0 +1,8 @@
+{"spaces":
+     {"Projection":
+          {"cells":
+               {"disc": {"has_flags": "nan"},
+                "pv": {"has_flags": "bits"}}
+           }
+      }
+ }
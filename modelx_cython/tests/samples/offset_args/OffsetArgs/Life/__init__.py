@@ -0,0 +1,43 @@
+from modelx.serialize.jsonvalues import *
+
+_formula = None
+
+_bases = []
+
+_allow_none = None
+
+_spaces = []
+
+# ---------------------------------------------------------------------------
+# Cells
+
+def rate(year):
+    return 0.001 * (year - 2000)
+
+
+def qx(age):
+    return 0.0005 * age
+
+
+def lx(age):
+    if age == 18:
+        return 1.0
+    else:
+        return lx(age - 1) * (1 - qx(age - 1))
+
+
+def total(n):
+    s = 0.0
+    for a in range(18, n):
+        s += lx(a) * qx(a)
+    return s
+
+
+def shift(t):
+    return 2 * t
+
+
+def grid(i, year):
+    return 10000 * i + year
+
+
@@ -0,0 +1,25 @@
+from OffsetArgs_nomx_cy import mx_model
+
+space = mx_model.Life
+
+
+lx = [1.0]
+for age in range(19, 121):
+    lx.append(lx[-1] * (1 - 0.0005 * (age - 1)))
+
+# Calculated forward from the base age
+assert space.lx(120) == lx[-1]
+assert space.total(121) == sum(lx[a - 18] * 0.0005 * a for a in range(18, 121))
+assert space.total(19) == 0.0005 * 18
+
+assert [space.rate(year) for year in range(2020, 2121)] == [
+    0.001 * (year - 2000) for year in range(2020, 2121)]
+assert [space.shift(t) for t in range(-5, 6)] == [2 * t for t in range(-5, 6)]
+assert space.grid(3, 2030) == 32030
+assert space.grid(1, 2020) == 12020
+
+# Args out of the arrays are cached in dicts
+assert space.shift(-6) == -12
+assert space.shift(100) == 200
+assert space.grid(0, 2020) == 2020
+assert space.rate(1990) == 0.001 * -10
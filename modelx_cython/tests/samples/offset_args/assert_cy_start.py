@@ -0,0 +1,5 @@
+from OffsetArgs_nomx_cy import mx_model
+
+# Arrays start from the year specified below the years traced
+assert mx_model.Life.rate(2000) == 0.0
+assert mx_model.Life.grid(1, 2000) == 12000
@@ -0,0 +1,14 @@
+from OffsetArgs_nomx import mx_model
+
+space = mx_model.Life
+for year in range(2020, 2121):
+    space.rate(year)
+space.lx(120)
+space.qx(120)
+space.total(19)
+space.total(121)
+for t in range(-5, 6):
+    space.shift(t)
+for i in range(1, 4):
+    for year in range(2020, 2031):
+        space.grid(i, year)
@@ -0,0 +1,8 @@
+{"spaces":
+     {"Life":
+          {"cells_param_start": {"year": 2000, ("i", "year"): (1, 2000)},
+           "cells": {"lx": {"has_flags": "bits"},
+                     "grid": {"has_flags": "bits"}}
+           }
+      }
+ }
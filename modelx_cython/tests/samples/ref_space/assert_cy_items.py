@@ -0,0 +1,20 @@
+from RefSpace_nomx_cy import RefSpace
+
+
+def assert_key_error(space, key):
+    try:
+        del space[key]
+    except KeyError:
+        pass
+    else:
+        raise AssertionError(f"KeyError not thrown")
+
+
+foo = RefSpace.Foo
+
+assert list(foo._mx_eval_items("foo", range(10))) == [i + 3 for i in range(10)]
+assert_key_error(foo, 3)
+
+assert list(foo._mx_eval_items("quux", [1, 2], keep=True)) == [
+    foo[1].quux(), foo[2].quux()]
+del foo[2]
@@ -0,0 +1,32 @@
+from RefSpace_nomx_cy import RefSpace
+
+
+def assert_key_error(space, key):
+    try:
+        del space[key]
+    except KeyError:
+        pass
+    else:
+        raise AssertionError(f"KeyError not thrown")
+
+
+foo = RefSpace.Foo
+
+for i in range(1, 4):
+    assert foo[i].foo() == 3 + i
+
+assert_key_error(foo, 1)    # Least recently used
+assert foo[2].quux() == 6   # foo[3] becomes least recently used
+assert foo[4].foo() == 7
+assert_key_error(foo, 3)
+del foo[2]
+del foo[4]
+
+assert list(foo._mx_eval_items("foo", range(10))) == [i + 3 for i in range(10)]
+
+# Item spaces created are deleted even if the oldest ones are removed
+assert foo[1].foo() == 4 and foo[2].foo() == 5
+assert list(foo._mx_eval_items("foo", [5])) == [8]
+assert_key_error(foo, 5)
+assert list(foo._mx_eval_items("foo", [6], args=())) == [9]
+assert_key_error(foo, 6)
@@ -0,0 +1,13 @@
+from RefSpace_nomx_cy import RefSpace
+
+foo = RefSpace.Foo
+qux = RefSpace.Bar.Qux
+
+for i in range(100):
+    assert foo[i].foo() == 3 + i
+
+assert RefSpace.Bar.baz() == 3
+assert list(foo._cells) == ["foo"]
+assert not hasattr(foo, "quux")
+assert not hasattr(qux, "qux") and not hasattr(qux, "corge")
+assert list(qux._cells) == []
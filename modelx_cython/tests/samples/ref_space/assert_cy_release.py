@@ -0,0 +1,23 @@
+from RefSpace_nomx_cy import RefSpace
+
+
+def assert_key_error(space, key):
+    try:
+        del space[key]
+    except KeyError:
+        pass
+    else:
+        raise AssertionError(f"KeyError not thrown")
+
+
+foo = RefSpace.Foo
+
+for i in range(100):
+    assert foo[i].foo() == 3 + i
+    assert_key_error(foo, i)
+
+item = foo[1]
+assert item.quux() == 5
+assert foo[1] is not item
+
+assert list(foo._mx_eval_items("foo", range(10))) == [i + 3 for i in range(10)]
@@ -0,0 +1 @@
+{"spaces": {"Foo": {"max_itemspaces": 2}}}
@@ -0,0 +1,46 @@
+from modelx.serialize.jsonvalues import *
+
+_formula = lambda point_id: None
+
+_bases = []
+
+_allow_none = None
+
+_spaces = []
+
+# ---------------------------------------------------------------------------
+# Cells
+
+def disc_rate_mth():
+    return (1 + rate) ** (1 / 12) - 1
+
+
+def disc_factor(t):
+    return (1 + disc_rate_mth()) ** (-t)
+
+
+def duration(t):
+    return t // 12
+
+
+def premium(t):
+    return point_id * 10 * (1 + 0.1 * duration(t))
+
+
+def pv_premium():
+    pv = 0.0
+    for t in range(term):
+        pv += premium(t) * disc_factor(t)
+    return pv
+
+
+def size():
+    return point_id * 100
+
+
+# ---------------------------------------------------------------------------
+# References
+
+rate = 0.03
+
+term = 60
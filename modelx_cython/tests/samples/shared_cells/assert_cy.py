@@ -0,0 +1,18 @@
+import pathlib
+import modelx as mx
+from SharedCells_nomx_cy import mx_model as cy_model
+
+m = mx.read_model(pathlib.Path(__file__).parent / "SharedCells")
+
+for i in range(1, 6):
+    assert cy_model.Projection[i].pv_premium() == m.Projection[i].pv_premium()
+    assert cy_model.Projection[i].size() == m.Projection[i].size()
+    assert cy_model.Projection[i].disc_factor(70) == m.Projection[i].disc_factor(70)
+
+assert cy_model.Projection.disc_factor(12) == m.Projection.disc_factor(12)
+
+# Item spaces call shared cells in the space after clearing their caches
+cy_model.Projection[1]._mx_clear_cache()
+assert cy_model.Projection[1].pv_premium() == m.Projection[1].pv_premium()
+cy_model.Projection._mx_clear_cache()
+assert cy_model.Projection[2].pv_premium() == m.Projection[2].pv_premium()
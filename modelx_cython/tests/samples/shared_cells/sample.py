@@ -0,0 +1,6 @@
+from SharedCells_nomx import mx_model
+
+
+for i in range(1, 4):
+    mx_model.Projection[i].pv_premium()
+    mx_model.Projection[i].size()
@@ -0,0 +1,53 @@
+from modelx.serialize.jsonvalues import *
+
+_formula = None
+
+_bases = []
+
+_allow_none = None
+
+_spaces = []
+
+# ---------------------------------------------------------------------------
+# Cells
+
+def foo(t):
+    return 1.5 * t
+
+
+def bar(t):
+    return foo(t) + 1
+
+
+def baz(t):
+    return 0 if t == 0 else baz(t - 1) + bar(t)
+
+
+def qux():
+    return max(1, 2)
+
+
+def quux(t):
+    pv = 0
+    for s in range(t):
+        pv += baz(s) * qux()
+    return pv
+
+
+def corge(x):
+    return str(x)
+
+
+def grault(t):
+    if t > 0:
+        return 1.0
+
+
+def garply(n):
+    count = 0
+    for t in range(n):
+        if grault(t) is None:
+            count += 1
+    return count
+
+
@@ -0,0 +1,9 @@
+from modelx.serialize.jsonvalues import *
+
+_name = "StaticTypes"
+
+_allow_none = False
+
+_spaces = [
+    "Space1"
+]
\ No newline at end of file
@@ -0,0 +1,15 @@
+from StaticTypes_nomx_cy import mx_model
+
+
+s = mx_model.Space1
+
+assert s.foo(10) == 15.0
+assert s.bar(10) == 16.0
+assert s.bar(11) == 17.5
+assert s.baz(3) == 12.0
+assert s.qux() == 2
+assert s.quux(4) == 42.0
+assert s.corge("a") == "a"
+assert s.grault(0) is None
+assert s.grault(1) == 1.0
+assert s.garply(3) == 1
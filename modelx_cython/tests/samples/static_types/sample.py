@@ -0,0 +1,4 @@
+from StaticTypes_nomx import mx_model
+
+
+mx_model.Space1.foo(10)
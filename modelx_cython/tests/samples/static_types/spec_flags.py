@@ -0,0 +1,8 @@
+{"spaces":
+     {"Space1":
+          {"cells":
+               {"foo": {"has_flags": "nan"},
+                "bar": {"has_flags": "bits"}}
+           }
+      }
+ }
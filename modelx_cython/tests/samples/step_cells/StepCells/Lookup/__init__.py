@@ -0,0 +1,21 @@
+from modelx.serialize.jsonvalues import *
+
+_formula = None
+
+_bases = []
+
+_allow_none = None
+
+_spaces = []
+
+# ---------------------------------------------------------------------------
+# Cells
+
+def x(t):
+    return 0.0 if t == 0 else y(t - 1) + 1 / (11 - t)
+
+
+def y(t):
+    return x(t) * 2
+
+
@@ -0,0 +1,25 @@
+from modelx.serialize.jsonvalues import *
+
+_formula = None
+
+_bases = []
+
+_allow_none = None
+
+_spaces = []
+
+# ---------------------------------------------------------------------------
+# Cells
+
+def a(t):
+    return 0 if t == 0 else b(t - 1)
+
+
+def b(t):
+    return a(t) + 1
+
+
+def c(t):
+    return a(t) + b(t)
+
+
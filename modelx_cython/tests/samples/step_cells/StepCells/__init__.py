@@ -0,0 +1,11 @@
+from modelx.serialize.jsonvalues import *
+
+_name = "StepCells"
+
+_allow_none = False
+
+_spaces = [
+    "Projection",
+    "Lookup"
+]
+
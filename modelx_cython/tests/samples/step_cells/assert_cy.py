@@ -0,0 +1,24 @@
+from StepCells_nomx_cy import mx_model
+
+space = mx_model.Projection
+
+# Called without a deep stack as a and b are calculated in steps
+space._mx_run_steps(50_000)
+assert space.c(50_000) == 100_001
+
+space._mx_run_steps(100_001)
+assert space.c(100_000) == 200_001
+assert [space.a(t) for t in range(5)] == [0, 1, 2, 3, 4]
+
+# x is not defined on t beyond 10, which the sample traced up to
+lookup = mx_model.Lookup
+y_10 = lookup.y(10)
+lookup._mx_clear_cache()
+lookup._mx_run_steps()
+assert lookup.y(10) == y_10
+try:
+    lookup._mx_run_steps(1000)
+except ZeroDivisionError:
+    pass
+else:
+    raise AssertionError("ZeroDivisionError not thrown")
@@ -0,0 +1,4 @@
+from StepCells_nomx import mx_model
+
+mx_model.Projection.c(10)
+mx_model.Lookup.y(10)
@@ -0,0 +1,7 @@
+{"spaces":
+     {"Projection":
+          {"cells_param_size": {"t": 100_001}},
+      "Lookup":
+          {"cells_param_size": {"t": 1000}}
+      }
+ }
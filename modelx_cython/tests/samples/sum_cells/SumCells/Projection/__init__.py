@@ -0,0 +1,35 @@
+from modelx.serialize.jsonvalues import *
+
+_formula = None
+
+_bases = []
+
+_allow_none = None
+
+_spaces = []
+
+# ---------------------------------------------------------------------------
+# Cells
+
+def x(t):
+    return 0.5 * t
+
+
+def y(t):
+    return 1.0 if t == 0 else 0.99 * y(t - 1)
+
+
+def total(n):
+    s = 0.0
+    for t in range(n):
+        s += x(t) * y(t)
+    return s
+
+
+def partial(m, n):
+    s = 0.0
+    for t in range(m, n):
+        s += 2 * y(t) - x(t) / 4
+    return s
+
+
@@ -0,0 +1,18 @@
+from SumCells_nomx_cy import mx_model
+
+space = mx_model.Projection
+
+
+def x(t):
+    return 0.5 * t
+
+
+def y(t):
+    return 0.99 ** t
+
+
+# Sums over the arrays calculate cells not calculated yet
+assert abs(space.partial(50, 101) - sum(2 * y(t) - x(t) / 4 for t in range(50, 101))) < 1e-9
+assert abs(space.total(101) - sum(x(t) * y(t) for t in range(101))) < 1e-9
+assert space.total(0) == 0.0
+assert space.partial(5, 3) == 0.0
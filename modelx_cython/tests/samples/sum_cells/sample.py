@@ -0,0 +1,6 @@
+from SumCells_nomx import mx_model
+
+mx_model.Projection.total(0)
+mx_model.Projection.total(101)
+mx_model.Projection.partial(0, 0)
+mx_model.Projection.partial(50, 101)
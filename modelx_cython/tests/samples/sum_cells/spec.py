@@ -0,0 +1,5 @@
+{"spaces":
+     {"Projection":
+          {"cells_param_size": {"t": 101}}
+      }
+ }
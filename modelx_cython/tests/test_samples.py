@@ -1,3 +1,4 @@
+import json
 import logging
 import sys
 import os
@@ -160,7 +161,7 @@ def test_varying_integral_arg_types(sample_dir, model):
         env=env
     ).returncode == 0
 
-    assert "cdef long long[3] _v_foo" in (work_dir / (model + "_nomx_cy") / "_mx_classes.pxd").read_text()
+    assert "cdef long long[2] _v_foo" in (work_dir / (model + "_nomx_cy") / "_mx_classes.pxd").read_text()
 
 
 @pytest.mark.parametrize("sample_dir, model, spec", [["deep_recursion", "DeepRecursion", ""],
@@ -250,5 +251,628 @@ def test_varying_arg_types(sample_dir, model, spec):
 
     assert (result := subprocess.run(argv, env=env, capture_output=True, text=True)).returncode == 0
     assert subprocess.run([sys.executable, str(work_dir / "assert_cy_old.py")], env=env).returncode == 0
-    assert subprocess.run([sys.executable, str(work_dir / "assert_cy_new.py")], env=env
-                          ).returncode == (1 if spec == 'spec_old.py' else 0)
\ No newline at end of file
+    assert subprocess.run([sys.executable, str(work_dir / "assert_cy_new.py")], env=env).returncode == 0
+
+    # Args out of the arrays of the old sizes are cached in dicts
+    size = 21 if spec == 'spec_old.py' else 31
+    assert f"cdef long long[{size}] _v_foo" in (
+        work_dir / (model + "_nomx_cy") / "_mx_classes.pxd").read_text()
+
+@pytest.mark.parametrize("sample_dir, model", [["nested_params", "NestedParams"]],
+                         indirect=["sample_dir"])
+def test_parallel_jobs(sample_dir, model):
+    """Modules are compiled in parallel and timed with --jobs"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--spec", str(work_dir / "spec.py"),
+            "--sample", str(work_dir / "sample.py"),
+            "--jobs", "2"]
+
+    for jobs in ["0", "-1"]:
+        assert subprocess.run(argv[:-1] + [jobs], env=env, cwd=work_dir).returncode == 2
+
+    assert (result := subprocess.run(argv, env=env, cwd=work_dir, capture_output=True, text=True)).returncode == 0
+    assert "nthreads=2" in (work_dir / "setup.py").read_text()
+    assert f"compiled {model}_nomx_cy._mx_classes in" in result.stdout
+
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy.py")],
+        env=env
+    ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["ref_space", "RefSpace"]],
+                         indirect=["sample_dir"])
+def test_incremental(sample_dir, model):
+    """Only modules with changed source are rebuilt with --incremental"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+    cy_path = work_dir / (model + "_nomx_cy")
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--spec", str(work_dir / "spec.py"),
+            "--sample", str(work_dir / "sample.py"),
+            "--incremental"]
+
+    def get_mtimes():
+        return {p.relative_to(cy_path): p.stat().st_mtime_ns
+                for p in cy_path.rglob("*") if p.suffix in (".py", ".pxd", ".so", ".pyd")}
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+    mtimes = get_mtimes()
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+    assert get_mtimes() == mtimes
+
+    # Edit a formula in a child space
+    src = work_dir / (model + "_nomx") / "_m_Bar" / "_mx_classes.py"
+    src.write_text(src.read_text() + "\n# edited\n")
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+    updated = {k for k, v in get_mtimes().items() if mtimes.get(k) != v}
+    assert pathlib.Path("_m_Bar", "_mx_classes.py") in updated
+    assert pathlib.Path("_mx_classes.py") not in updated
+    assert pathlib.Path("_mx_classes.pxd") not in updated
+    assert any(p.parent.name == "_m_Bar" and p.suffix in (".so", ".pyd") for p in updated)
+    assert not any(p.parent == pathlib.Path() and p.suffix in (".so", ".pyd") for p in updated)
+
+    # Files removed from the source are removed from the output
+    data = work_dir / (model + "_nomx") / "_m_Bar" / "data.txt"
+    data.write_text("data")
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+    assert (cy_path / "_m_Bar" / "data.txt").exists()
+    data.unlink()
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+    assert not (cy_path / "_m_Bar" / "data.txt").exists()
+    assert (cy_path / "_m_Bar" / "_mx_classes.pxd").exists()
+
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy.py")],
+        env=env
+    ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["various_types", "VariousTypes"],
+                                               ["ref_space", "RefSpace"]],
+                         indirect=["sample_dir"])
+def test_trace_db(sample_dir, model):
+    """Type information reloaded from --trace-db gives the same translation"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+    cy_path = work_dir / (model + "_nomx_cy")
+    trace_db = work_dir / "trace_db.json"
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--no-spec",
+            "--trace-db", str(trace_db),
+            "--translate-only"]
+
+    def get_codes():
+        return {p.relative_to(cy_path): p.read_text()
+                for p in cy_path.rglob("*") if p.suffix in (".py", ".pxd")}
+
+    assert subprocess.run(argv + ["--sample", str(work_dir / "sample.py")],
+                          env=env, cwd=work_dir).returncode == 0
+    assert trace_db.exists()
+    codes = get_codes()
+
+    # The sample is not run
+    assert subprocess.run(argv + ["--sample", str(work_dir / "missing.py")],
+                          env=env, cwd=work_dir).returncode == 0
+    assert get_codes() == codes
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="sys.monitoring requires Python 3.12+")
+@pytest.mark.parametrize("sample_dir, model", [["ref_space", "RefSpace"],
+                                               ["various_types", "VariousTypes"]],
+                         indirect=["sample_dir"])
+def test_monitoring_tracer(sample_dir, model):
+    """The monitoring tracer collects the same type information as the profile tracer"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    results = {}
+    for tracer in ["profile", "monitoring"]:
+        trace_db = work_dir / f"trace_db_{tracer}.json"
+        argv = [sys.executable, "-m", "modelx_cython", str(work_dir / (model + "_nomx")),
+                "--sample", str(work_dir / "sample.py"),
+                "--no-spec",
+                "--tracer", tracer,
+                "--trace-db", str(trace_db),
+                "--translate-only"]
+        assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+        results[tracer] = json.loads(trace_db.read_text())
+
+    assert results["profile"] == results["monitoring"]
+
+
+@pytest.mark.parametrize("sample_dir, model", [["index_range", "IndexRange"],
+                                               ["ref_space", "RefSpace"]],
+                         indirect=["sample_dir"])
+def test_max_traced_calls(sample_dir, model):
+    """Sampled tracing gives the same argument types and sizes as full tracing"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    for calls in ["0", "-1"]:
+        argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+                "--sample", str(work_dir / "sample.py"),
+                "--no-spec", "--translate-only", "--max-traced-calls", calls]
+        assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 2
+
+    results = {}
+    for opts in [[], ["--max-traced-calls", "1"]]:
+        trace_db = work_dir / f"trace_db_{len(opts)}.json"
+        argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+                "--sample", str(work_dir / "sample.py"),
+                "--no-spec",
+                "--trace-db", str(trace_db),
+                "--translate-only"] + opts
+        assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+        results[len(opts)] = json.loads(trace_db.read_text())["cells_info"]
+
+    assert results[0].keys() == results[2].keys()
+    for name, full in results[0].items():
+        assert full["arg_types"] == results[2][name]["arg_types"]
+        assert full["max_args"] == results[2][name]["max_args"]
+
+
+@pytest.mark.parametrize("sample_dir, model", [["static_types", "StaticTypes"]],
+                         indirect=["sample_dir"])
+def test_infer_types(sample_dir, model):
+    """Cells not called by the sample are typed from their formulas"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--sample", str(work_dir / "sample.py"),
+            "--no-spec",
+            "--infer-types"]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+
+    code = (work_dir / (model + "_nomx_cy") / "_mx_classes.py").read_text()
+    assert "_v_bar: _mx_cy.double[11]" in code
+    assert "_v_baz: _mx_cy.double[11]" in code
+    assert "def quux(self, t: object) -> _mx_cy.double:" in code
+    assert "def qux(self) -> _mx_cy.longlong:" in code
+    assert "_v_grault: _mx_cy.double" not in code   # None returned if t <= 0
+
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy.py")],
+        env=env
+    ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["array_size", "ArraySize"]],
+                         indirect=["sample_dir"])
+def test_cache_layout_buffer(sample_dir, model):
+    """Caches in memoryviews are allocated on demand and grow"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--no-spec",
+            "--cache-layout", "buffer"]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+
+    pxd = (work_dir / (model + "_nomx_cy") / "_mx_classes.pxd").read_text()
+    assert "cdef long long[:, ::1] _v_bar" in pxd
+    assert "cdef signed char[:, ::1] _has_bar" in pxd
+
+    for script in ["assert_cy.py", "assert_cy_buffer.py"]:
+        assert subprocess.run(
+            [sys.executable, str(work_dir / script)],
+            env=env
+        ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["static_types", "StaticTypes"]],
+                         indirect=["sample_dir"])
+def test_has_flags(sample_dir, model):
+    """Calculated values are flagged by bits or NaN as specified"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--sample", str(work_dir / "sample.py"),
+            "--spec", str(work_dir / "spec_flags.py"),
+            "--infer-types"]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+
+    pxd = (work_dir / (model + "_nomx_cy") / "_mx_classes.pxd").read_text()
+    assert "_has_foo" not in pxd
+    assert "cdef unsigned char[2] _has_bar" in pxd
+    assert "cdef bint[11] _has_baz" in pxd
+
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy.py")],
+        env=env
+    ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["ref_space", "RefSpace"]],
+                         indirect=["sample_dir"])
+def test_eval_items(sample_dir, model):
+    """Cells are evaluated over item spaces in a batch"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--spec", str(work_dir / "spec.py"),
+            "--sample", str(work_dir / "sample.py")]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy_items.py")],
+        env=env
+    ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["ref_space", "RefSpace"]],
+                         indirect=["sample_dir"])
+def test_map_points(sample_dir, model):
+    """Cells are evaluated over item spaces in worker processes"""
+    from modelx_cython.run import map_points
+
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--spec", str(work_dir / "spec.py"),
+            "--sample", str(work_dir / "sample.py")]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+
+    result = map_points(model + "_nomx_cy", "Foo", "foo", range(10),
+                        workers=2, chunksize=3, path=str(work_dir))
+    assert list(result) == [i + 3 for i in range(10)]
+
+
+@pytest.mark.parametrize("sample_dir, model", [["nogil_cells", "NogilCells"]],
+                         indirect=["sample_dir"])
+def test_nogil(sample_dir, model, monkeypatch):
+    """Closed numeric cells are calculated without the GIL in threads"""
+    from modelx_cython.run import map_points_threaded
+
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--spec", str(work_dir / "spec.py"),
+            "--sample", str(work_dir / "sample.py")]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+
+    pxd = (work_dir / (model + "_nomx_cy") / "_mx_classes.pxd").read_text()
+    assert "cpdef double pv_total(_c_Projection self) except? -1 nogil" in pxd
+    assert "cpdef double disc(_c_Projection self, long long t) except? -1 nogil" in pxd
+    assert "cpdef double pv_max(_c_Projection self)\n" in pxd     # calls max_cf using a generator
+
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy.py")],
+        env=env
+    ).returncode == 0
+
+    monkeypatch.syspath_prepend(str(work_dir))
+    result = map_points_threaded(model + "_nomx_cy", "Projection", "pv_total",
+                                 range(1, 11), threads=2, chunksize=3)
+    expected = subprocess.run(
+        [sys.executable, "-c",
+         "from NogilCells_nomx import mx_model; "
+         "print([mx_model.Projection[i].pv_total() for i in range(1, 11)])"],
+        env=env, capture_output=True, text=True).stdout
+    assert repr(result.tolist()) == expected.strip()
+
+
+@pytest.mark.parametrize("sample_dir, model", [["nogil_cells", "NogilCells"]],
+                         indirect=["sample_dir"])
+def test_eval_columns(sample_dir, model):
+    """Closed numeric cells are calculated over arrays of item spaces"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--no-spec",
+            "--sample", str(work_dir / "sample.py")]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+
+    code = (work_dir / (model + "_nomx_cy") / "_mx_classes.py").read_text()
+    assert "class _mx_columns_c_Projection:" in code
+    assert "def max_cf(self):" not in code.split("class _mx_columns_c_Projection:")[1]
+
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy_columns.py")],
+        env=env
+    ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["ref_space", "RefSpace"]],
+                         indirect=["sample_dir"])
+@pytest.mark.parametrize("spec, assertion", [["spec_lru.py", "assert_cy_lru.py"],
+                                             ["spec_release.py", "assert_cy_release.py"]])
+def test_max_itemspaces(sample_dir, model, spec, assertion):
+    """Item spaces are removed beyond the maximum number"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--spec", str(work_dir / spec),
+            "--sample", str(work_dir / "sample.py")]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+    for script in ["assert_cy.py", assertion]:
+        assert subprocess.run(
+            [sys.executable, str(work_dir / script)],
+            env=env
+        ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["nogil_cells", "NogilCells"]],
+                         indirect=["sample_dir"])
+@pytest.mark.parametrize("options", [["--spec", "spec.py"],
+                                     ["--spec", "spec_flags.py"],
+                                     ["--spec", "spec.py", "--cache-layout", "buffer"],
+                                     ["--spec", "spec.py", "--share-cells"]])
+def test_clear_cache(sample_dir, model, options):
+    """Caches of cells are cleared except those of the cells to keep"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--sample", str(work_dir / "sample.py"),
+            *options]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+    if "--share-cells" in options:
+        # disc is nogil, so it is calculated in each item space
+        pxd = (work_dir / (model + "_nomx_cy") / "_mx_classes.pxd").read_text()
+        assert "_mx_shared" not in pxd
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy_clear.py")],
+        env=env
+    ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["ref_space", "RefSpace"]],
+                         indirect=["sample_dir"])
+def test_call_graph(sample_dir, model):
+    """Calls through refs and child spaces are saved next to the package"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--spec", str(work_dir / "spec.py"),
+            "--sample", str(work_dir / "sample.py"),
+            "--translate-only"]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+
+    graph = json.loads((work_dir / (model + "_nomx_cy_graph.json")).read_text())
+    assert {k: v["calls"] for k, v in graph["cells"].items()} == {
+        "Foo.foo": ["Bar.baz"],
+        "Foo.quux": ["Bar.Qux.qux"],
+        "Bar.baz": [],
+        "Bar.Qux.qux": [],
+        "Bar.Qux.corge": ["Foo.foo"]
+    }
+    assert graph["unresolved"] == {}
+
+
+@pytest.mark.parametrize("sample_dir, model", [["ref_space", "RefSpace"]],
+                         indirect=["sample_dir"])
+def test_outputs(sample_dir, model):
+    """Cells not called from outputs are removed"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--spec", str(work_dir / "spec.py"),
+            "--sample", str(work_dir / "sample.py"),
+            "--outputs", "Foo.foo"]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy_outputs.py")],
+        env=env
+    ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["mapped_cells", "MappedCells"]],
+                         indirect=["sample_dir"])
+def test_outputs_referred(sample_dir, model):
+    """Cells referred to without being called from outputs are kept"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--no-spec",
+            "--sample", str(work_dir / "sample.py"),
+            "--outputs", "Projection.total_claims"]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+    graph = json.loads((work_dir / (model + "_nomx_cy_graph.json")).read_text())
+    assert graph["cells"]["Projection.total_claims"]["calls"] == ["Projection.claims"]
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy_outputs.py")],
+        env=env
+    ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["deep_recursion", "DeepRecursion"]],
+                         indirect=["sample_dir"])
+@pytest.mark.parametrize("spec", ["spec.py", "spec_bits.py"])
+def test_recursion_loop(sample_dir, model, spec):
+    """Cells recursing on the previous index are calculated forward"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--spec", str(work_dir / spec),
+            "--sample", str(work_dir / "sample.py")]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy_loop.py")],
+        env=env
+    ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["step_cells", "StepCells"]],
+                         indirect=["sample_dir"])
+def test_run_steps(sample_dir, model):
+    """Cells calling each other on previous indexes are calculated in steps"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--spec", str(work_dir / "spec.py"),
+            "--sample", str(work_dir / "sample.py")]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+    assert "_mx_stop = 11 if stop < 0 else min(stop, 100001)\n" \
+           "        for _mx_t in range(_mx_stop):\n" \
+           "            self.a(_mx_t)\n" \
+           "            self.b(_mx_t)\n" in (
+        work_dir / (model + "_nomx_cy") / "_mx_classes.py").read_text()
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy.py")],
+        env=env
+    ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["sum_cells", "SumCells"]],
+                         indirect=["sample_dir"])
+def test_sum_loop(sample_dir, model):
+    """Sums of cells over ranges read the arrays of the cells"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--spec", str(work_dir / "spec.py"),
+            "--sample", str(work_dir / "sample.py")]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+    code = (work_dir / (model + "_nomx_cy") / "_mx_classes.py").read_text()
+    assert "s: _mx_cy.double = 0.0" in code
+    assert "if _mx_stop0 <= 101:" in code
+    assert "if 0 <= _mx_start0 and _mx_stop0 <= 101:" in code
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy.py")],
+        env=env
+    ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["float_args", "FloatArgs"]],
+                         indirect=["sample_dir"])
+def test_hash_tables(sample_dir, model):
+    """Cells with float args are cached in hash tables"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--sample", str(work_dir / "sample.py"),
+            "--no-spec"]
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+    pxd = (work_dir / (model + "_nomx_cy") / "_mx_classes.pxd").read_text()
+    assert "cdef double[::1] _v_disc" in pxd
+    assert "cdef long long[::1] _v_periods" in pxd
+    assert "cdef signed char[::1] _v_is_neg" in pxd
+    assert "cdef long long[:, ::1] _key_periods" in pxd
+    assert "cdef dict _v_label" in pxd
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy.py")],
+        env=env
+    ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["offset_args", "OffsetArgs"]],
+                         indirect=["sample_dir"])
+@pytest.mark.parametrize("options, scripts", [
+    [["--no-spec"], ["assert_cy.py"]],
+    [["--no-spec", "--cache-layout", "buffer"], ["assert_cy.py"]],
+    [["--spec", "spec.py"], ["assert_cy.py", "assert_cy_start.py"]]
+])
+def test_offset_arrays(sample_dir, model, options, scripts):
+    """Arrays start from the lowest args traced"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--sample", str(work_dir / "sample.py")] + options
+
+    assert subprocess.run(argv, env=env, cwd=work_dir).returncode == 0
+    if options == ["--no-spec"]:
+        pxd = (work_dir / (model + "_nomx_cy") / "_mx_classes.pxd").read_text()
+        assert "cdef double[101] _v_rate" in pxd
+        assert "cdef double[103] _v_lx" in pxd
+        assert "cdef long long[11] _v_shift" in pxd
+        assert "cdef long long[3][11] _v_grid" in pxd
+        assert "cdef dict _over_shift" in pxd
+
+    for script in scripts:
+        assert subprocess.run(
+            [sys.executable, str(work_dir / script)],
+            env=env
+        ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["constant_cells", "ConstantCells"]],
+                         indirect=["sample_dir"])
+@pytest.mark.parametrize("fold", [True, False])
+def test_fold_constants(sample_dir, model, fold):
+    """Calls of cells returning number literals are replaced with the literals"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--sample", str(work_dir / "sample.py"),
+            "--no-spec"] + (["--fold-constants"] if fold else [])
+
+    assert subprocess.run(argv, env=env).returncode == 0
+    pxd = (work_dir / (model + "_nomx_cy") / "_mx_classes.pxd").read_text()
+    for name in ["expense_acq", "inflation_rate", "loading_prem", "adj", "is_active"]:
+        assert (f"_has_{name}\n" in pxd) is not fold
+    assert "_has_label" in pxd
+    assert "_has_expense_acq2" in pxd
+
+    if fold:
+        py = (work_dir / (model + "_nomx_cy") / "_mx_classes.py").read_text()
+        assert "return 300 * (1 + 0.01) ** t + (-2)" in py
+
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy.py")],
+        env=env
+    ).returncode == 0
+
+
+@pytest.mark.parametrize("sample_dir, model", [["shared_cells", "SharedCells"]],
+                         indirect=["sample_dir"])
+def test_shared_cells(sample_dir, model):
+    """Item spaces call cells not referring to the parameters in the space"""
+    generate_nomx(work_dir := sample_dir, model)
+    env = get_env(work_dir)
+
+    argv = ["mx2cy", str(work_dir / (model + "_nomx")),
+            "--sample", str(work_dir / "sample.py"),
+            "--no-spec", "--share-cells"]
+
+    assert subprocess.run(argv, env=env).returncode == 0
+    pxd = (work_dir / (model + "_nomx_cy") / "_mx_classes.pxd").read_text()
+    py = (work_dir / (model + "_nomx_cy") / "_mx_classes.py").read_text()
+    assert "cdef _c_Projection _mx_shared" in pxd
+    for call in ["disc_rate_mth()", "disc_factor(t)", "duration(t)"]:
+        assert f"return self._mx_shared.{call}" in py
+    for call in ["premium(t)", "pv_premium()", "size()"]:
+        assert f"return self._mx_shared.{call}" not in py
+
+    assert subprocess.run(
+        [sys.executable, str(work_dir / "assert_cy.py")],
+        env=env
+    ).returncode == 0
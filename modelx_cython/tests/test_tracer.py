@@ -0,0 +1,115 @@
+import sys
+import numbers
+
+import numpy as np
+import pytest
+
+from modelx_cython.monkeytype_tracing import CallTrace, CallTraceLogger
+from modelx_cython.tracer import MxCallTraceLogger, MxMonitoringTracer, ToolIdError, trace_calls
+
+
+class _c_Space1:
+
+    def _f_foo(self, i, x):
+        pass
+
+
+def test_streaming_reduction():
+    logger = MxCallTraceLogger(module=__name__)
+    space = _c_Space1()
+    for i in range(10):
+        trace = CallTrace(_c_Space1._f_foo, {"self": space, "i": i, "x": 1.5})
+        trace.ret_val = np.int64(i) if i % 2 else i
+        logger.log(trace)
+
+    info = logger.cells_info[__name__ + "._c_Space1._f_foo"]
+    assert not hasattr(logger, "_traces")
+
+    info.finalize()
+    assert info.arg_types == {"i": int, "x": float}
+    assert info.max_args == {"i": 9}
+    assert info.ret_type.value_type is numbers.Integral
+    assert not info.ret_type.is_array
+
+
+def test_max_traced_calls():
+    logger = MxCallTraceLogger(module=__name__, max_traced_calls=3)
+    space = _c_Space1()
+    func = _c_Space1._f_foo
+    for i in range(10):
+        arg_vals = {"self": space, "i": i, "x": 1.5}
+        if logger.is_sampled_out(func):
+            logger.log_args(func, arg_vals)
+        else:
+            trace = CallTrace(func, arg_vals)
+            trace.ret_val = 1.0
+            logger.log(trace)
+
+    info = logger.cells_info[__name__ + "._c_Space1._f_foo"]
+    assert info.trace_count == 3
+
+    info.finalize()
+    assert info.max_args == {"i": 9}
+    assert info.ret_type.value_type is float
+
+
+class _Frame:
+
+    def __init__(self, code):
+        self.f_code = code
+
+
+def test_monitoring_sampled_out_in_flight():
+    logger = MxCallTraceLogger(module=__name__, max_traced_calls=1)
+    tracer = MxMonitoringTracer(__name__, logger)
+    space = _c_Space1()
+    func = _c_Space1._f_foo
+
+    trace = CallTrace(func, {"self": space, "i": 1, "x": 1.5})
+    trace.ret_val = 1.0
+    logger.log(trace)
+    for i in [5, 7]:    # Calls not returned when func is sampled out
+        tracer.traces[_Frame(func.__code__)] = CallTrace(func, {"self": space, "i": i, "x": 1.5})
+
+    tracer._drop_traces(func.__code__)
+    assert not tracer.traces
+
+    info = logger.cells_info[__name__ + "._c_Space1._f_foo"]
+    assert info.trace_count == 1
+    info.finalize()
+    assert info.max_args == {"i": 7}
+
+
+class _NullLogger(CallTraceLogger):
+
+    def log(self, trace):
+        pass
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="sys.monitoring requires Python 3.12+")
+def test_monitoring_tool_ids_in_use():
+    mon = sys.monitoring
+    ids = [i for i in (mon.PROFILER_ID,) + MxMonitoringTracer.FREE_TOOL_IDS
+           if mon.get_tool(i) is None]
+    for i in ids:
+        mon.use_tool_id(i, "other")
+    try:
+        with trace_calls(__name__, _NullLogger(), 0, backend="auto"):
+            assert sys.getprofile() is not None     # Fell back on sys.setprofile
+        with pytest.raises(ToolIdError):
+            with trace_calls(__name__, _NullLogger(), 0, backend="monitoring"):
+                pass
+    finally:
+        for i in ids:
+            mon.free_tool_id(i)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="sys.monitoring requires Python 3.12+")
+def test_monitoring_start_error():
+    mon = sys.monitoring
+    assert mon.get_tool(mon.PROFILER_ID) is None
+    with pytest.raises(ModuleNotFoundError):    # Not falling back on sys.setprofile
+        with trace_calls("no_such_model", _NullLogger(), 0, backend="auto"):
+            pass
+    assert mon.get_tool(mon.PROFILER_ID) is None
+    assert sys.getprofile() is None
@@ -18,14 +18,16 @@
 
 
 import sys
+import json
 import pathlib
 import random
+import importlib
 import numbers
 import itertools
 from dataclasses import dataclass
 from contextlib import contextmanager
-from types import FrameType
-from typing import Any, Mapping, Iterator, Sequence, Optional, Dict, List
+from types import FrameType, CodeType
+from typing import Any, Callable, Mapping, Iterator, Optional, Dict, List
 import logging
 
 import numpy as np
@@ -55,6 +57,7 @@ from modelx_cython.consts import (
     SPACE_PREF,
     SPACE_PARAMS
 )
+from modelx_cython.typedefs import get_type_name, find_type
 
 if (3, 12) <= sys.version_info < (3, 14):
     import opcode
@@ -69,53 +72,122 @@ class ReturnTypeInfo:
     is_array: bool = False
     ndim: int = 0
 
+    def to_dict(self) -> dict:
+        return {
+            "value_type": get_type_name(self.value_type),
+            "is_array": self.is_array,
+            "ndim": self.ndim
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ReturnTypeInfo":
+        return cls(find_type(data["value_type"]), data["is_array"], data["ndim"])
+
 
 class RuntimeCellsInfo:     # TODO: Create base class RuntimeBaseMemberInfo
+    """Type information of a cells reduced from its call traces
+
+    Traces are reduced one by one as they are passed to :meth:`update`,
+    so that the traces and the values in them need not be retained.
+    Calls whose return values are not traced can be given to
+    :meth:`update_args` to keep track of the argument types and maximum
+    integer arguments. :meth:`finalize` must be called after the last
+    trace is given.
+    """
     name: str
     module: str
     arg_types: Dict[str, type]  # without self
     max_args: Dict[str, int]
+    min_args: Dict[str, int]
     ret_type: ReturnTypeInfo
 
-    def __init__(self, traces: Sequence[CallTrace]) -> None:
-        self.fqname = traces[0].funcname
-        self.name = traces[0].func.__name__
-        self.module = traces[0].func.__module__
+    def __init__(self, trace: CallTrace) -> None:
+        self.fqname = trace.funcname
+        self.name = trace.func.__name__
+        self.module = trace.func.__module__
         self.arg_types = {}
         self.max_args = {}
-        self._init_arg_types(traces)
-        self.ret_type = self._init_ret_type(traces)
+        self.min_args = {}
+        self.ret_type = None
+        self.trace_count = 0
+        self._arg_type_val: Dict[str, Dict[type, Any]] = {}
+        self._arg_type_min: Dict[str, Dict[type, Any]] = {}    # Minimums of integers
+        self._first_args = trace.arg_vals
+        self._was_dtype_logged = False
+        self._was_ndim_logged = False
+        self._was_vtype_logged = False
+        self.update(trace)
 
     def has_args(self):
         return bool(len(self.arg_types))
 
-    def _init_arg_types(self, traces):
-        arg_type_val: Dict[str, dict[type, Any]] = {}
+    def update(self, trace: CallTrace) -> None:
+        self.trace_count += 1
+        self._update_arg_types(trace.arg_vals)
+        self._update_ret_type(trace)
+
+    def update_args(self, arg_vals: Dict[str, Any]) -> None:
+        self._update_arg_types(arg_vals)
+
+    def finalize(self) -> None:
+        self._init_arg_types()
+        self._first_args = None
+
+    def to_dict(self) -> dict:
+        return {
+            "fqname": self.fqname,
+            "name": self.name,
+            "module": self.module,
+            "arg_types": {k: get_type_name(v) for k, v in self.arg_types.items()},
+            "max_args": self.max_args,
+            "min_args": self.min_args,
+            "ret_type": self.ret_type.to_dict() if self.ret_type else None
+        }
 
-        for trace in traces:
+    @classmethod
+    def from_dict(cls, data: dict) -> "RuntimeCellsInfo":
+        self = cls.__new__(cls)
+        self.fqname = data["fqname"]
+        self.name = data["name"]
+        self.module = data["module"]
+        self.arg_types = {k: find_type(v) for k, v in data["arg_types"].items()}
+        self.max_args = data["max_args"]
+        self.min_args = data.get("min_args", {})   # Not in old files
+        self.ret_type = ReturnTypeInfo.from_dict(data["ret_type"]) if data["ret_type"] else None
+        return self
 
-            for arg, val in itertools.islice(
-                trace.arg_vals.items(), 1, None
-            ):  # remove self
-                tp = type(val)
-                types = arg_type_val.setdefault(arg, {})
-                if tp not in types:
+    def _update_arg_types(self, arg_vals):
+        arg_type_val = self._arg_type_val
+
+        for arg, val in itertools.islice(
+            arg_vals.items(), 1, None
+        ):  # remove self
+            tp = type(val)
+            types = arg_type_val.setdefault(arg, {})
+            mins = self._arg_type_min.setdefault(arg, {})
+            if tp not in types:
+                types[tp] = val
+                mins[tp] = val
+            elif issubclass(tp, numbers.Integral):
+                if val > types[tp]:
                     types[tp] = val
-                elif issubclass(tp, numbers.Integral):
-                    if val > types[tp]:
-                        types[tp] = val
+                elif val < mins[tp]:
+                    mins[tp] = val
 
-        for arg, type_val in arg_type_val.items():
+    def _init_arg_types(self):
+        for arg, type_val in self._arg_type_val.items():
 
             if len(type_val) == 1:
                 for tp, val in type_val.items():
                     self.arg_types[arg] = tp
                     if issubclass(tp, numbers.Integral):
                         self.max_args[arg] = val
+                        self.min_args[arg] = self._arg_type_min[arg][tp]
                     break
             elif all(issubclass(tp, numbers.Integral) for tp in type_val.keys()):
                 self.arg_types[arg] = numbers.Integral
                 self.max_args[arg] = max(v for v in type_val.values())
+                self.min_args[arg] = min(v for v in self._arg_type_min[arg].values())
 
             elif all(issubclass(tp, str) for tp in type_val.keys()):
                 self.arg_types[arg] = str
@@ -128,81 +200,72 @@ class RuntimeCellsInfo:     # TODO: Create base class RuntimeBaseMemberInfo
 
                 self.arg_types[arg] = object
 
-    def _init_ret_type(self, traces):
-        last_tp = None
-        last_args = None
-        has_last = False
-        was_dtype_logged = False
-        was_ndim_logged = False
-        was_vtype_logged = False
+    def _update_ret_type(self, tr):
+        last_tp = self.ret_type
+        last_args = self._first_args
 
         def get_arg_expr(args):
             return ", ".join(f"{k}={str(v)}" for k, v in itertools.islice(args.items(), 1, None))
 
-        for tr in traces:
-            val = tr.ret_val
-            if isinstance(val, np.ndarray):
-                tp = ReturnTypeInfo(
-                    val.dtype.type, is_array=True, ndim=val.ndim
-                )
-            else:
-                tp = ReturnTypeInfo(type(val))
-
-            if has_last:
-                if last_tp == tp:
-                    continue
-                elif last_tp.is_array and tp.is_array:
-                    if last_tp.ndim == tp.ndim:
-                        assert last_tp.value_type != tp.value_type
-                        if issubclass(last_tp.value_type, numbers.Integral) and issubclass(tp.value_type, numbers.Integral):
-                            last_tp.value_type = numbers.Integral
-                        elif issubclass(last_tp.value_type, numbers.Real) and issubclass(tp.value_type, numbers.Real):
-                            last_tp.value_type = numbers.Real
-                        else:
-                            if not was_dtype_logged:
-                                # Log varying return types with their arguments
-                                args0 = get_arg_expr(last_args)
-                                args1 = get_arg_expr(tr.arg_vals)
-                                msg0 = f"{last_tp.value_type.__name__} for {args0}"
-                                msg1 = f"{tp.value_type.__name__} for {args1}"
-                                _logger.info(f"varying array types returned from {self.fqname}:{msg0} and {msg1}")
-                                was_dtype_logged = True
-
-                            last_tp.value_type = object
-
-                    else:
-                        if not was_ndim_logged:
-                            args0 = get_arg_expr(last_args)
-                            args1 = get_arg_expr(tr.arg_vals)
-                            msg0 = f"{last_tp.ndim} for {args0}"
-                            msg1 = f"{tp.ndim} for {args1}"
-                            _logger.info(f"varying array dimensions returned from {self.fqname}:{msg0} and {msg1}")
-                            was_ndim_logged = True
-
-                        last_tp = ReturnTypeInfo(object)
-
-                elif not last_tp.is_array and not tp.is_array:
-
+        val = tr.ret_val
+        if isinstance(val, np.ndarray):
+            tp = ReturnTypeInfo(
+                val.dtype.type, is_array=True, ndim=val.ndim
+            )
+        else:
+            tp = ReturnTypeInfo(type(val))
+
+        if last_tp is not None:
+            if last_tp == tp:
+                return
+            elif last_tp.is_array and tp.is_array:
+                if last_tp.ndim == tp.ndim:
+                    assert last_tp.value_type != tp.value_type
                     if issubclass(last_tp.value_type, numbers.Integral) and issubclass(tp.value_type, numbers.Integral):
                         last_tp.value_type = numbers.Integral
                     elif issubclass(last_tp.value_type, numbers.Real) and issubclass(tp.value_type, numbers.Real):
                         last_tp.value_type = numbers.Real
                     else:
-                        if not was_vtype_logged:
+                        if not self._was_dtype_logged:
+                            # Log varying return types with their arguments
                             args0 = get_arg_expr(last_args)
                             args1 = get_arg_expr(tr.arg_vals)
                             msg0 = f"{last_tp.value_type.__name__} for {args0}"
-                            msg1 = f"{last_tp.value_type.__name__} for {args1}"
-                            _logger.info(f"varying types returned from {self.fqname}:{msg0} and {msg1}")
-                            was_vtype_logged = True
+                            msg1 = f"{tp.value_type.__name__} for {args1}"
+                            _logger.info(f"varying array types returned from {self.fqname}:{msg0} and {msg1}")
+                            self._was_dtype_logged = True
+
                         last_tp.value_type = object
 
-            else:
-                last_tp = tp
-                last_args = tr.arg_vals
-                has_last = True
+                else:
+                    if not self._was_ndim_logged:
+                        args0 = get_arg_expr(last_args)
+                        args1 = get_arg_expr(tr.arg_vals)
+                        msg0 = f"{last_tp.ndim} for {args0}"
+                        msg1 = f"{tp.ndim} for {args1}"
+                        _logger.info(f"varying array dimensions returned from {self.fqname}:{msg0} and {msg1}")
+                        self._was_ndim_logged = True
+
+                    self.ret_type = ReturnTypeInfo(object)
+
+            elif not last_tp.is_array and not tp.is_array:
+
+                if issubclass(last_tp.value_type, numbers.Integral) and issubclass(tp.value_type, numbers.Integral):
+                    last_tp.value_type = numbers.Integral
+                elif issubclass(last_tp.value_type, numbers.Real) and issubclass(tp.value_type, numbers.Real):
+                    last_tp.value_type = numbers.Real
+                else:
+                    if not self._was_vtype_logged:
+                        args0 = get_arg_expr(last_args)
+                        args1 = get_arg_expr(tr.arg_vals)
+                        msg0 = f"{last_tp.value_type.__name__} for {args0}"
+                        msg1 = f"{last_tp.value_type.__name__} for {args1}"
+                        _logger.info(f"varying types returned from {self.fqname}:{msg0} and {msg1}")
+                        self._was_vtype_logged = True
+                    last_tp.value_type = object
 
-        return last_tp
+        else:
+            self.ret_type = tp
 
 
 class RuntimeValueInfo:
@@ -218,6 +281,17 @@ class RuntimeValueInfo:
         else:
             return cls(value)
 
+    def to_dict(self) -> dict:
+        return {"type": get_type_name(self.type_), "mx_class": self.mx_class}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RuntimeValueInfo":
+        self = cls.__new__(cls)
+        # Types of modelx objects are not imported as they are not used
+        self.type_ = object if data["mx_class"] else find_type(data["type"])
+        self.mx_class = data["mx_class"]
+        return self
+
 
 
 class RuntimeRefInfo(RuntimeValueInfo):
@@ -237,6 +311,14 @@ def replace_first_name(dotted_name: str, name: str):
     return ".".join(names)
 
 
+def get_model(module: str):
+    """Return the model object of an imported exported model"""
+    mod = sys.modules[module + "." + MX_MODEL_MOD]
+    base_cls = getattr(sys.modules[module + "." + MX_SYS_MOD], BASE_MODEL)
+    model_cls = next(v for v in mod.__dict__.values() if isinstance(v, type) and issubclass(v, base_cls))
+    return next(v for v in mod.__dict__.values() if isinstance(v, model_cls))
+
+
 class MxCallTracer(CallTracer):
     """Add return_value to CallTrace"""
 
@@ -269,7 +351,10 @@ class MxCallTracer(CallTracer):
             if name in frame.f_locals:
                 arg_vals[name] = frame.f_locals[name]
 
-        self.traces[frame] = CallTrace(func, arg_vals)
+        if self.logger.is_sampled_out(func):
+            self.logger.log_args(func, arg_vals)
+        else:
+            self.traces[frame] = CallTrace(func, arg_vals)
 
     def handle_return(self, frame: FrameType, arg: Any) -> None:
         # In the case of a 'return' event, arg contains the return value, or
@@ -304,19 +389,36 @@ class MxCallTracer(CallTracer):
             del self.traces[frame]
             self.logger.log(trace)
 
-    def __call__(self, frame: FrameType, event: str, arg: Any) -> "CallTracer":
+    def _resolve_func(self, frame: FrameType) -> Optional[Callable[..., Any]]:
+        """Return the function to trace for the code of frame, or None"""
         code = frame.f_code
         if (
-            event not in SUPPORTED_EVENTS
-            or code.co_name == "trace_types"
+            code.co_name == "trace_types"
             or self.should_trace
             and not self.should_trace(code)
         ):
-            return self
+            return None
 
         # Filter by module name here
         func = get_func(frame)
         if not func or not func.__module__.split(".")[0] == self.module:
+            return None
+
+        return func
+
+    def __call__(self, frame: FrameType, event: str, arg: Any) -> "CallTracer":
+        if event not in SUPPORTED_EVENTS:
+            return self
+
+        # The decision is cached per code object in self.cache,
+        # which is also looked up by _get_func in handle_call
+        code = frame.f_code
+        try:
+            func = self.cache[code]
+        except KeyError:
+            func = self.cache[code] = self._resolve_func(frame)
+
+        if func is None:
             return self
 
         try:
@@ -333,8 +435,18 @@ class MxCallTracer(CallTracer):
 
 class MxCodeFilter:
 
+    def __init__(self):
+        self._cache: Dict[CodeType, bool] = {}
+
     def __call__(self, code):
-        # Since called many times, check module name and function name only
+        try:
+            return self._cache[code]
+        except KeyError:
+            result = self._cache[code] = self._should_trace(code)
+            return result
+
+    def _should_trace(self, code):
+        # Check module name and function name only
         if (
             code.co_filename[-len(MX_MODEL_MOD) - 3: -3] == MX_MODEL_MOD
             or code.co_filename[-len(MX_SPACE_MOD) - 3: -3] == MX_SPACE_MOD
@@ -352,43 +464,114 @@ class MxCodeFilter:
 class MxCallTraceLogger(CallTraceLogger):
     """Log and store/print records collected by a CallTracer."""
 
-    def __init__(self, module: str, new_model_name: str = None) -> None:
+    def __init__(self, module: str, new_model_name: str = None,
+                 max_traced_calls: Optional[int] = None) -> None:
         super().__init__()
         self.module = module
         self.new_name = new_model_name
-        self._traces = {}  # funcname -> [trace]
-        self.cells_info = {}  # funcname -> MethodTypeInfo
+        self.max_traced_calls = max_traced_calls
+        self._refs_traces = {}  # funcname -> first trace of _mx_assign_refs
+        self._funcnames = {}  # func -> funcname
+        self._func_info = {}  # func -> RuntimeCellsInfo
+        self.cells_info = {}  # funcname -> RuntimeCellsInfo
         self.ref_info = {}
         self.modules = []
         self.param_info = {}  # class name -> {param: RuntimeParamInfo}
 
     def log(self, trace: CallTrace) -> None:
-        """Log a single call trace."""
-        self._traces.setdefault(trace.funcname, []).append(trace)
+        """Log a single call trace.
 
-    def flush(self) -> None:
-        for k, v in self._traces.items():
+        Traces of cells are reduced into :class:`RuntimeCellsInfo` as they
+        arrive, and only the first trace of each ``_mx_assign_refs`` is kept.
+        """
+        try:
+            funcname = self._funcnames[trace.func]
+        except KeyError:
+            funcname = self._funcnames[trace.func] = trace.funcname
 
-            name_split = k.split(".")
-            tr0 = v[0]  # First trace
-            if name_split[-1] == MX_ASSIGN_REFS:
-                # Extract refs
-                for name, val in tr0.arg_vals[MX_SELF].__dict__.items():
-                    if is_user_defined(name):
-                        fqname = ".".join(name_split[:-1] + [name])
-                        self.ref_info[fqname] = RuntimeRefInfo.init_mxobj(val, self.module)
+        if trace.func.__name__ == MX_ASSIGN_REFS:
+            self._refs_traces.setdefault(funcname, trace)
+        else:
+            info = self.cells_info.get(funcname)
+            if info is None:
+                info = self.cells_info[funcname] = RuntimeCellsInfo(trace)
+                self._func_info[trace.func] = info
             else:
-                # Extract cells
-                self.cells_info[k] = info = RuntimeCellsInfo(v)
-                if info.module not in self.modules:
-                    self.modules.append(info.module)
+                info.update(trace)
+
+    def is_sampled_out(self, func) -> bool:
+        """Whether calls to func need no more full traces
+
+        True if ``max_traced_calls`` is set and as many traces of func
+        have been logged. Arguments of the calls to func should then be
+        logged by :meth:`log_args` to keep the maximum integer arguments
+        accurate, which the sizes of the generated arrays are based on.
+        """
+        if self.max_traced_calls is None:
+            return False
+        info = self._func_info.get(func)
+        return info is not None and info.trace_count >= self.max_traced_calls
 
-        self._traces.clear()
+    def log_args(self, func, arg_vals: Dict[str, Any]) -> None:
+        """Log the arguments of a call to func whose return is not traced"""
+        self._func_info[func].update_args(arg_vals)
+
+    def flush(self) -> None:
+        for k, tr0 in self._refs_traces.items():
+            # Extract refs
+            name_split = k.split(".")
+            for name, val in tr0.arg_vals[MX_SELF].__dict__.items():
+                if is_user_defined(name):
+                    fqname = ".".join(name_split[:-1] + [name])
+                    self.ref_info[fqname] = RuntimeRefInfo.init_mxobj(val, self.module)
+
+        for info in self.cells_info.values():
+            info.finalize()
+            if info.module not in self.modules:
+                self.modules.append(info.module)
+
+        self._refs_traces.clear()
+        self._func_info.clear()
         self._get_params()
 
         if self.new_name:
             self._update_model_name()
 
+    def save(self, path: pathlib.Path):
+        """Save the flushed type information to a JSON file"""
+        data = {
+            "module": self.module,
+            "new_name": self.new_name,
+            "modules": self.modules,
+            "cells_info": {k: v.to_dict() for k, v in self.cells_info.items()},
+            "ref_info": {k: v.to_dict() for k, v in self.ref_info.items()},
+            "param_info": {
+                k: {p: v.to_dict() for p, v in params.items()}
+                for k, params in self.param_info.items()
+            }
+        }
+        pathlib.Path(path).write_text(json.dumps(data, separators=(",", ":")))
+
+    @classmethod
+    def load(cls, path: pathlib.Path, new_model_name: str = None) -> "MxCallTraceLogger":
+        """Create a logger from type information saved by :meth:`save`"""
+        data = json.loads(pathlib.Path(path).read_text())
+        self = cls(module=data["module"], new_model_name=data["new_name"])
+        self.modules = data["modules"]
+        self.cells_info = {
+            k: RuntimeCellsInfo.from_dict(v) for k, v in data["cells_info"].items()}
+        self.ref_info = {
+            k: RuntimeRefInfo.from_dict(v) for k, v in data["ref_info"].items()}
+        self.param_info = {
+            k: {p: RuntimeParamInfo.from_dict(v) for p, v in params.items()}
+            for k, params in data["param_info"].items()
+        }
+        if new_model_name and new_model_name != self.new_name:
+            self.new_name = new_model_name
+            self._update_model_name()
+
+        return self
+
     def _update_model_name(self):
         """Change the model name stored in members"""
 
@@ -415,10 +598,7 @@ class MxCallTraceLogger(CallTraceLogger):
             self.param_info[replace_first_name(key, self.new_name)] = params
 
     def _get_params(self):
-        module = sys.modules[self.module + "." + MX_MODEL_MOD]
-        base_cls = getattr(sys.modules[self.module + "." + MX_SYS_MOD], BASE_MODEL)
-        model_cls = next(v for v in module.__dict__.values() if isinstance(v, type) and issubclass(v, base_cls))
-        model = next(v for v in module.__dict__.values() if isinstance(v, model_cls))
+        model = get_model(self.module)
 
         for space in model._mx_spaces.values():
             self._walk_space(space, {})
@@ -447,6 +627,151 @@ class MxCallTraceLogger(CallTraceLogger):
                     self._walk_space(v, next_params)
 
 
+class ToolIdError(ValueError):
+    """No tool id of ``sys.monitoring`` is free for tracing"""
+
+
+class MxMonitoringTracer:
+    """Call tracer using ``sys.monitoring`` (PEP 669) on Python 3.12+
+
+    Unlike :class:`MxCallTracer`, which is called for every call and
+    return in the process, PY_START and PY_RETURN events are enabled only
+    on the code objects of the functions selected by ``code_filter``
+    in the modules of the model. The model is imported by :meth:`start`
+    to find the code objects, so ``_mx_assign_refs`` calls made on import
+    are logged from the spaces of the model instead of being traced.
+
+    The tool id for profilers is used, or an id not reserved for other
+    kinds of tools if another profiler uses it. :meth:`start` raises
+    :class:`ToolIdError` if none of them is free.
+    """
+
+    TOOL_NAME = "modelx-cython"
+    FREE_TOOL_IDS = (3, 4)  # Not reserved by PEP 669
+
+    def __init__(
+        self,
+        module: str,
+        logger: CallTraceLogger,
+        code_filter: Optional[CodeFilter] = None,
+    ) -> None:
+        self.module = module
+        self.logger = logger
+        self.should_trace = code_filter or MxCodeFilter()
+        self.traces: Dict[FrameType, CallTrace] = {}
+        self.funcs: Dict[CodeType, Any] = {}    # code -> function
+        self.args_only = set()  # codes whose returns are no longer traced
+        self.tool_id: Optional[int] = None
+
+    @staticmethod
+    def is_available():
+        return hasattr(sys, "monitoring")
+
+    def _collect_funcs(self):
+        prefix = self.module + "."
+        for name, mod in list(sys.modules.items()):
+            if not (name.startswith(prefix)
+                    and name.split(".")[-1] in (MX_MODEL_MOD, MX_SPACE_MOD)):
+                continue
+            for cls in mod.__dict__.values():
+                if not (isinstance(cls, type) and cls.__module__ == name):
+                    continue
+                for func in cls.__dict__.values():
+                    code = getattr(func, "__code__", None)
+                    if code is not None and self.should_trace(code):
+                        self.funcs[code] = func
+
+    def _log_assign_refs(self):
+        for obj in get_model(self.module)._mx_walk():
+            func = getattr(type(obj), MX_ASSIGN_REFS)
+            self.logger.log(CallTrace(func, {MX_SELF: obj}))
+
+    def _use_tool_id(self):
+        mon = sys.monitoring
+        for tool_id in (mon.PROFILER_ID,) + self.FREE_TOOL_IDS:
+            if mon.get_tool(tool_id) is None:
+                mon.use_tool_id(tool_id, self.TOOL_NAME)
+                self.tool_id = tool_id
+                return
+        raise ToolIdError("no sys.monitoring tool id is free for tracing")
+
+    def start(self):
+        self._use_tool_id()
+        try:
+            importlib.import_module(self.module)
+            self._collect_funcs()
+            self._log_assign_refs()
+
+            mon = sys.monitoring
+            mon.register_callback(self.tool_id, mon.events.PY_START, self.handle_start)
+            mon.register_callback(self.tool_id, mon.events.PY_RETURN, self.handle_return)
+            mon.register_callback(self.tool_id, mon.events.PY_UNWIND, self.handle_unwind)
+            mon.set_events(self.tool_id, mon.events.PY_UNWIND)
+            for code in self.funcs:
+                mon.set_local_events(
+                    self.tool_id, code, mon.events.PY_START | mon.events.PY_RETURN)
+        except BaseException:
+            self.stop()     # Release the events and the tool id
+            raise
+
+    def stop(self):
+        mon = sys.monitoring
+        for code in self.funcs:
+            mon.set_local_events(self.tool_id, code, mon.events.NO_EVENTS)
+        mon.set_events(self.tool_id, mon.events.NO_EVENTS)
+        for event in (mon.events.PY_START, mon.events.PY_RETURN, mon.events.PY_UNWIND):
+            mon.register_callback(self.tool_id, event, None)
+        mon.free_tool_id(self.tool_id)
+        self.traces.clear()
+        self.args_only.clear()
+
+    def handle_start(self, code: CodeType, offset: int):
+        try:
+            frame = sys._getframe(1)
+            f_locals = frame.f_locals
+            arg_vals = {}
+            for name in code.co_varnames[0: code.co_argcount]:
+                if name in f_locals:
+                    arg_vals[name] = f_locals[name]
+            func = self.funcs[code]
+            if self.logger.is_sampled_out(func):
+                # Only arguments are logged from now on
+                self.logger.log_args(func, arg_vals)
+                if code not in self.args_only:
+                    self.args_only.add(code)
+                    sys.monitoring.set_local_events(
+                        self.tool_id, code, sys.monitoring.events.PY_START)
+                    self._drop_traces(code)
+            else:
+                self.traces[frame] = CallTrace(func, arg_vals)
+        except Exception:
+            _logger.exception("Failed collecting trace")
+
+    def _drop_traces(self, code: CodeType):
+        """Log only the arguments of the calls of code not returned yet
+
+        Their returns are not reported after PY_RETURN is disabled.
+        """
+        for frame in [f for f in self.traces if f.f_code is code]:
+            trace = self.traces.pop(frame)
+            self.logger.log_args(trace.func, trace.arg_vals)
+
+    def handle_return(self, code: CodeType, offset: int, retval: Any):
+        trace = self.traces.pop(sys._getframe(1), None)
+        if trace is not None:
+            trace.ret_val = retval
+            self.logger.log(trace)
+
+    def handle_unwind(self, code: CodeType, offset: int, exc: BaseException):
+        if code in self.funcs:
+            self.traces.pop(sys._getframe(1), None)
+
+
+TRACER_PROFILE = "profile"
+TRACER_MONITORING = "monitoring"
+TRACER_AUTO = "auto"
+
+
 @contextmanager
 def trace_calls(
     module: str,
@@ -454,14 +779,48 @@ def trace_calls(
     max_typed_dict_size: int,
     code_filter: Optional[CodeFilter] = None,
     sample_rate: Optional[int] = None,
+    backend: str = TRACER_PROFILE,
 ) -> Iterator[None]:
-    """Enable call tracing for a block of code"""
-    old_trace = sys.getprofile()
-    sys.setprofile(
-        MxCallTracer(module, logger, max_typed_dict_size, code_filter, sample_rate)
-    )
-    try:
-        yield
-    finally:
-        sys.setprofile(old_trace)
-        logger.flush()
+    """Enable call tracing for a block of code
+
+    ``backend`` is either ``"profile"`` to use ``sys.setprofile``,
+    ``"monitoring"`` to use ``sys.monitoring`` or ``"auto"`` to use
+    ``sys.monitoring`` if available. ``"auto"`` falls back on
+    ``sys.setprofile`` if other tools use all the tool ids to use.
+    """
+    is_auto = backend == TRACER_AUTO
+    if is_auto:
+        backend = TRACER_MONITORING if MxMonitoringTracer.is_available() else TRACER_PROFILE
+
+    tracer = None
+    if backend == TRACER_MONITORING:
+        if sample_rate:
+            raise ValueError("sample_rate is not supported by the monitoring tracer")
+        tracer = MxMonitoringTracer(module, logger, code_filter)
+        try:
+            tracer.start()
+        except ToolIdError:
+            if not is_auto:
+                raise
+            _logger.warning("sys.monitoring is used by other tools, "
+                            "sys.setprofile is used for tracing instead")
+            tracer, backend = None, TRACER_PROFILE
+
+    if tracer is not None:
+        try:
+            yield
+        finally:
+            tracer.stop()
+            logger.flush()
+    elif backend == TRACER_PROFILE:
+        old_trace = sys.getprofile()
+        sys.setprofile(
+            MxCallTracer(module, logger, max_typed_dict_size, code_filter, sample_rate)
+        )
+        try:
+            yield
+        finally:
+            sys.setprofile(old_trace)
+            logger.flush()
+    else:
+        raise ValueError(f"invalid tracer backend: {backend}")
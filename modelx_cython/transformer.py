@@ -18,6 +18,7 @@ try:
 except ImportError: # Python -3.9
     NoneType = type(None)
 
+import numbers
 import textwrap
 from functools import cached_property
 import libcst as cst
@@ -28,8 +29,11 @@ from libcst._removal_sentinel import RemovalSentinel
 import libcst.matchers as m
 from libcst.metadata import ParentNodeProvider, ScopeProvider, GlobalScope, ClassScope
 
+from modelx_cython.config import TransSpec
 from modelx_cython.parser import ParentScopeAddin
-from modelx_cython.builder import ModuleInfo, CombinedCellsInfo
+from modelx_cython.builder import ModuleInfo, ClassInfo, CombinedCellsInfo
+from modelx_cython.reduction import ReductionTransformer
+from modelx_cython.constants import ConstantFolder
 
 from modelx_cython.consts import (
     FORMULA_PREF,
@@ -37,6 +41,9 @@ from modelx_cython.consts import (
     GLOBAL_PREF,
     VAR_PREF,
     HAS_PREF,
+    KEY_PREF,
+    LEN_PREF,
+    OVER_PREF,
     SPACE_PREF,
     MODULE_PREF,
     MX_SELF,
@@ -44,10 +51,39 @@ from modelx_cython.consts import (
     MX_SPACE_MOD,
     MX_ASSIGN_REFS,
     MX_COPY_REFS,
+    MX_GROW_BUFFER,
+    MX_GROW_TABLE,
+    MX_FIND_KEY,
+    MX_EVAL_ITEMS,
+    MX_EVAL_NOGIL,
+    MX_EVAL_COLUMNS,
+    MX_COLUMNS,
+    MX_COLS,
+    MX_MEMO,
+    MX_WHERE,
+    MX_AND,
+    MX_OR,
+    MX_ITEMSPACES,
+    MX_SHARED,
+    MX_CLEAR_CACHE,
+    MX_RUN_STEPS,
+    NP_MOD,
     is_user_defined,
 )
 
-from modelx_cython.typedefs import CY_BOOL_T
+from modelx_cython.typedefs import (
+    CY_BOOL_T, CY_INT_T, CY_INT_T_P, CY_FLAG_T, CY_FLAG_T_P,
+    get_buffer_type_expr, get_dtype_name, normalize_type)
+
+def _remove_blank_lines(code: str) -> str:
+    # Remove lines of empty statements in code templates
+    return "".join(line for line in code.splitlines(keepends=True) if line.strip())
+
+
+def _get_nogil_suffix(cells: CombinedCellsInfo) -> str:
+    # -1 is checked for exceptions, such as IndexError, raised without the GIL
+    return " except? -1 nogil" if cells.is_nogil() else ""
+
 
 class PXDGenerator:
 
@@ -81,6 +117,8 @@ class PXDGenerator:
     @cached_property
     def cmodule_imports(self) -> str:
         stmts = []
+        if self.module.has_nogil:
+            stmts.append("cimport cython")
         for ci in self.module.cimports:
             stmts.append(f"cimport {ci}")
         return "\n".join(stmts)
@@ -103,7 +141,9 @@ class PXDGenerator:
         return "\n\n".join(stmts)
 
     def a_class_def(self, name):
-        return self.cls_template.format(
+        # Python methods of final types can be declared nogil
+        final = "@cython.final\n" if self.module.classes[name].nogil_cells else ""
+        return final + self.cls_template.format(
             class_name=name,
             MX_SYS_MOD=MX_SYS_MOD,
             private_var_defs=textwrap.indent(self.private_var_defs(name), ' ' * 4),
@@ -136,24 +176,54 @@ class PXDGenerator:
                 continue
 
             if cells.has_args():
-                if cells.has_typeinfo() and cells.is_arrayable():
+                if cells.has_typeinfo() and cells.is_buffered():
+
+                    var_type = cells.get_buffer_decl_expr(c_style=True)
+                    decl_stmts.append(f"cdef {var_type} {VAR_PREF + cells.name}\n")
+
+                    if cells.has_flags != TransSpec.FLAGS_NAN:
+                        has_type = cells.get_buffer_decl_expr(is_flag=True, c_style=True)
+                        decl_stmts.append(f"cdef {has_type} {HAS_PREF + cells.name}\n")
+
+                    if cells.has_overflow():
+                        decl_stmts.append(f"cdef dict {OVER_PREF + cells.name}\n")
+
+                elif cells.has_typeinfo() and cells.is_arrayable():
 
                     var_name = VAR_PREF + cells.name
                     var_type = cells.get_array_decl_expr(c_style=True)
                     decl_stmts.append(f"cdef {var_type} {var_name}\n")
 
                     has_name = HAS_PREF + cells.name
-                    has_type = cells.get_array_decl_expr(
-                                rettype_expr=CY_BOOL_T, c_style=True)
-                    decl_stmts.append(f"cdef {has_type} {has_name}\n")
+                    if cells.has_flags == TransSpec.FLAGS_ARRAY:
+                        has_type = cells.get_array_decl_expr(
+                                    rettype_expr=CY_BOOL_T, c_style=True)
+                        decl_stmts.append(f"cdef {has_type} {has_name}\n")
+                    elif cells.has_flags == TransSpec.FLAGS_BITS:
+                        has_type = cells.get_bits_decl_expr(c_style=True)
+                        decl_stmts.append(f"cdef {has_type} {has_name}\n")
+
+                    if cells.has_overflow():
+                        decl_stmts.append(f"cdef dict {OVER_PREF + cells.name}\n")
+
+                elif cells.has_typeinfo() and cells.is_hashed():
+
+                    var_type = get_buffer_type_expr(cells.norm_type, c_style=True)
+                    decl_stmts.append(f"cdef {var_type}[::1] {VAR_PREF + cells.name}\n")
+                    decl_stmts.append(f"cdef {CY_FLAG_T}[::1] {HAS_PREF + cells.name}\n")
+                    decl_stmts.append(f"cdef {CY_INT_T}[:, ::1] {KEY_PREF + cells.name}\n")
+                    decl_stmts.append(f"cdef {CY_INT_T} {LEN_PREF + cells.name}\n")
 
                 else:
                     decl_stmts.append(f"cdef dict {VAR_PREF + cells.name}\n")
-            else:
+            elif not cells.is_constant():
                 rettype = cells.get_rettype_expr(c_style=True)
                 decl_stmts.append(f"cdef {rettype} {VAR_PREF + cells.name}\n")
                 decl_stmts.append(f"cdef {CY_BOOL_T} {HAS_PREF + cells.name}\n")
 
+        if cls_info.shared_cells:
+            decl_stmts.append(f"cdef {cls_name} {MX_SHARED}\n")
+
         return "".join(decl_stmts)
 
     def public_var_defs(self, cls_name):
@@ -208,7 +278,8 @@ class PXDGenerator:
                     cls_name=cls_name, cells_name=cells.name
                 )
                 decl_stmts.append(
-                    f"cdef {rettype} {FORMULA_PREF + cells.name}({parameters})\n"
+                    f"cdef {rettype} {FORMULA_PREF + cells.name}({parameters})"
+                    f"{_get_nogil_suffix(cells)}\n"
                 )
             else:
                 parameters = self._add_param_type_hints(
@@ -234,7 +305,8 @@ class PXDGenerator:
                     cls_name=cls_name, cells_name=cells.name
                 )
                 decl_stmts.append(
-                    f"cpdef {rettype} {cells.name}({parameters})\n"
+                    f"cpdef {rettype} {cells.name}({parameters})"
+                    f"{_get_nogil_suffix(cells)}\n"
                 )
             else:
                 parameters = self._add_param_type_hints(
@@ -250,6 +322,255 @@ class PXDGenerator:
 class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
     METADATA_DEPENDENCIES = (ScopeProvider, ParentNodeProvider)
 
+    grow_buffer_template = textwrap.dedent(f"""\
+    def {MX_GROW_BUFFER}(buf, idx, size, dtype, fill):
+        \"\"\"Return a buffer of cells values or flags that covers idx
+
+        A new buffer is allocated in the size of the array in the
+        C array layout, or larger if idx is out of it. Buffers at least
+        double in the dimensions in which idx is out of the old buffer.
+        Elements not copied from the old buffer are set to fill.
+        \"\"\"
+        if buf is None:
+            shape = tuple(max(i + 1, s) for i, s in zip(idx, size))
+        else:
+            shape = tuple(s if i < s else max(i + 1, 2 * s)
+                          for i, s in zip(idx, buf.shape))
+
+        new_buf = {NP_MOD}.full(shape, fill, dtype=dtype)
+        if buf is not None:
+            new_buf[tuple(slice(0, s) for s in buf.shape)] = buf
+
+        return new_buf
+    """)
+
+    hash_table_template = textwrap.dedent(f"""\
+    @{CY_MOD}.cfunc
+    @{CY_MOD}.boundscheck(False)
+    @{CY_MOD}.wraparound(False)
+    def {MX_FIND_KEY}(keys: {CY_MOD}.{CY_INT_T_P}[:, ::1], flags: {CY_MOD}.{CY_FLAG_T_P}[::1],
+                    key: {CY_MOD}.p_{CY_INT_T_P}) -> {CY_MOD}.Py_ssize_t:
+        \"\"\"Return the slot of key in a hash table, or the empty slot for key
+
+        Slots are probed linearly from the hash of key mixed from its
+        elements. The number of slots must be a power of 2, and some
+        slots must be empty.
+        \"\"\"
+        n: {CY_MOD}.Py_ssize_t = keys.shape[1]
+        mask: {CY_MOD}.Py_ssize_t = flags.shape[0] - 1
+        h: {CY_MOD}.ulonglong = 0
+        i: {CY_MOD}.Py_ssize_t
+        j: {CY_MOD}.Py_ssize_t
+        # Constants of splitmix64, typed not to be Python ints
+        c0: {CY_MOD}.ulonglong = 0x9E3779B97F4A7C15
+        c1: {CY_MOD}.ulonglong = 0xBF58476D1CE4E5B9
+        c2: {CY_MOD}.ulonglong = 0x94D049BB133111EB
+
+        for j in range(n):
+            h ^= {CY_MOD}.cast({CY_MOD}.ulonglong, key[j]) + c0
+            h = (h ^ (h >> 30)) * c1
+            h = (h ^ (h >> 27)) * c2
+            h ^= h >> 31
+
+        i = h & mask
+        while flags[i]:
+            j = 0
+            while j < n and keys[i, j] == key[j]:
+                j += 1
+            if j == n:
+                return i
+            i = (i + 1) & mask
+
+        return i
+
+
+    def {MX_GROW_TABLE}(keys, values, flags, nkeys, dtype):
+        \"\"\"Return the keys, values and flags of a hash table twice as large
+
+        A table of 16 slots is returned if flags is None.
+        \"\"\"
+        new_keys: {CY_MOD}.{CY_INT_T_P}[:, ::1]
+        new_flags: {CY_MOD}.{CY_FLAG_T_P}[::1]
+        old_keys: {CY_MOD}.{CY_INT_T_P}[:, ::1]
+        old: {CY_MOD}.Py_ssize_t[::1]
+        slots: {CY_MOD}.Py_ssize_t[::1]
+        i: {CY_MOD}.Py_ssize_t
+        j: {CY_MOD}.Py_ssize_t
+        k: {CY_MOD}.Py_ssize_t
+
+        size = 16 if flags is None else 2 * len(flags)
+        new_keys = {NP_MOD}.zeros((size, nkeys), dtype={NP_MOD}.longlong)
+        new_flags = {NP_MOD}.zeros(size, dtype={NP_MOD}.int8)
+        new_values = {NP_MOD}.zeros(size, dtype=dtype)
+        if flags is not None:
+            used = {NP_MOD}.flatnonzero({NP_MOD}.asarray(flags))
+            old, old_keys = used, keys
+            slots = {NP_MOD}.empty(len(used), dtype={NP_MOD}.intp)
+            for k in range(old.shape[0]):
+                i = {MX_FIND_KEY}(new_keys, new_flags, {CY_MOD}.address(old_keys[old[k], 0]))
+                for j in range(nkeys):
+                    new_keys[i, j] = old_keys[old[k], j]
+                new_flags[i] = 1
+                slots[k] = i
+            new_values[{NP_MOD}.asarray(slots)] = {NP_MOD}.asarray(values)[used]
+
+        return {NP_MOD}.asarray(new_keys), new_values, {NP_MOD}.asarray(new_flags)
+    """)
+
+    eval_items_template = textwrap.dedent(f"""\
+    def {MX_EVAL_ITEMS}(self, name, keys, args=(), keep=False, clear=False):
+        \"\"\"Return an array of the values of a cells in item spaces
+
+        The cells named name is called with args in the item space
+        of each key in keys. Item spaces created in this method are
+        deleted after their values are calculated unless keep is True,
+        so that memory use does not grow with the number of keys.
+        If clear is True, the caches of the other cells are cleared
+        in the item spaces not deleted.
+
+        Cells without parameters returning numbers are called in a C
+        loop writing their values into an array. The formulas are still
+        calculated in each item space one by one. See {MX_EVAL_COLUMNS},
+        if defined, to calculate them over arrays of item spaces.
+        \"\"\"
+        item: {{cls_name}}
+        i: {CY_MOD}.Py_ssize_t
+        {{decl_stmts}}
+        keys = list(keys)
+        {{eval_stmts}}
+        values = []
+        for key in keys:
+            is_new = key not in self._mx_itemspaces
+            item = {{call_expr}}
+            values.append(getattr(item, name)(*args))
+            if is_new and not keep:
+                self._mx_itemspaces.pop(key, None)
+            elif clear:
+                item.{MX_CLEAR_CACHE}(keep=(name,))
+
+        return {NP_MOD}.asarray(values)
+    """)
+
+    eval_nogil_template = textwrap.dedent(f"""\
+    def {MX_EVAL_NOGIL}(self, name, keys, keep=False, clear=False):
+        \"\"\"Return an array of the values of a nogil cells in item spaces
+
+        Same as {MX_EVAL_ITEMS} except that the cells named name is
+        calculated without the GIL, so threads calling this method
+        calculate in parallel. Only cells without parameters can be named.
+        \"\"\"
+        item: {{cls_name}}
+        {{decl_stmts}}
+        if name not in {{names}}:
+            raise ValueError(f"{{{{name}}}} is not a nogil cells without parameters")
+
+        values = []
+        for key in keys:
+            is_new = key not in self._mx_itemspaces
+            item = {{call_expr}}
+            {{eval_stmts}}
+            if is_new and not keep:
+                self._mx_itemspaces.pop(key, None)
+            elif clear:
+                item.{MX_CLEAR_CACHE}(keep=(name,))
+
+        return {NP_MOD}.asarray(values)
+    """)
+
+    eval_columns_template = textwrap.dedent(f"""\
+    def {MX_EVAL_COLUMNS}(self, name, keys, args=(), keep=False):
+        \"\"\"Return an array of the values of a cells in item spaces
+
+        Same as {MX_EVAL_ITEMS} except that the formulas of the cells
+        named name and the cells it calls are calculated over arrays of
+        the refs in the item spaces of keys, once on each argument for
+        all the keys instead of in each item space. Values are not cached
+        in the item spaces. See {{cols_name}} for the formulas.
+        \"\"\"
+        item: {{cls_name}}
+        i: {CY_MOD}.Py_ssize_t
+        gathered = {{gathered}}
+        dtypes = {{dtypes}}
+        if name not in gathered:
+            raise ValueError(f"{{{{name}}}} cannot be calculated over item spaces")
+
+        keys = list(keys)
+        cols = {{{{n: {NP_MOD}.empty(len(keys), dtype=dtypes[n]) for n in gathered[name]}}}}
+        for i in range(len(keys)):
+            key = keys[i]
+            is_new = key not in self.{MX_ITEMSPACES}
+            item = {{call_expr}}
+            {{gather_stmts}}
+            if is_new and not keep:
+                self.{MX_ITEMSPACES}.pop(key, None)
+
+        with {NP_MOD}.errstate(divide="ignore", invalid="ignore"):
+            values = getattr({{cols_name}}(cols), name)(*args)
+        return {NP_MOD}.broadcast_to(values, len(keys)).astype(dtypes[name])
+    """)
+
+    columns_template = textwrap.dedent(f"""\
+    class {{cols_name}}:
+        \"\"\"Formulas of {{cls_name}} calculated over arrays of item spaces
+
+        Refs and cells gathered from item spaces are arrays in {MX_COLS}.
+        Methods return arrays of the values in the item spaces, or numbers
+        if the values are the same in all of them.
+        \"\"\"
+
+        def __init__(self, cols):
+            self.{MX_COLS} = cols
+            self.{MX_MEMO} = {{{{}}}}
+
+        def {MX_WHERE}(self, test, body, orelse):
+            if {NP_MOD}.ndim(test) == 0:
+                return body() if test else orelse()
+            elif test.all():
+                return body()
+            elif not test.any():
+                return orelse()
+            return {NP_MOD}.where(test, body(), orelse())
+
+        def {MX_AND}(self, left, right):
+            if {NP_MOD}.ndim(left) == 0:
+                return right() if left else left
+            elif not left.any():
+                return left
+            return {NP_MOD}.logical_and(left, right())
+
+        def {MX_OR}(self, left, right):
+            if {NP_MOD}.ndim(left) == 0:
+                return left if left else right()
+            elif left.all():
+                return left
+            return {NP_MOD}.logical_or(left, right())
+    """)
+
+    clear_cache_template = textwrap.dedent(f"""\
+    def {MX_CLEAR_CACHE}(self, keep=()):
+        \"\"\"Clear the caches of the cells except the cells named in keep
+
+        The cells are calculated again when they are called next time.
+        The caches of child spaces and item spaces are not cleared.
+        \"\"\"
+    """)
+
+    run_steps_template = textwrap.dedent(f"""\
+    def {MX_RUN_STEPS}(self, stop=-1):
+        \"\"\"Calculate cells calling each other on previous indexes forward
+
+        The cells in each group are called in turn on the indexes
+        from the start of their arrays up to stop, or up to the end
+        of the arrays if stop is larger, so that their formulas find
+        the values they call on previous indexes calculated.
+        If stop is negative, the indexes are up to the highest index
+        the cells were traced on, as formulas may not be defined on
+        indexes beyond it, such as t beyond the projection length.
+        \"\"\"
+        _mx_t: {CY_MOD}.longlong
+        _mx_stop: {CY_MOD}.longlong
+    """)
+
     def __init__(
         self,
         source: str,
@@ -276,6 +597,44 @@ class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
                 config=updated_node.config_for_parsing,
             ))
 
+        if self.module.has_nan_flags:
+            stmts.append(cst.parse_statement(
+                "from cython.cimports.libc.math import isnan",
+                config=updated_node.config_for_parsing
+            ))
+        if self.module.has_arrays:
+            stmts.append(cst.parse_statement(
+                "from cython.cimports.libc.string import memset",
+                config=updated_node.config_for_parsing
+            ))
+
+        if self.module.has_buffers or self.module.has_tables or self.module.has_itemspaces:
+            np_stmts = (cst.parse_statement(
+                f"import numpy as {NP_MOD}", config=updated_node.config_for_parsing
+            ),)
+        else:
+            np_stmts = ()
+
+        body = list(updated_node.body)
+        templates = []
+        if self.module.has_buffers:
+            templates.append(self.grow_buffer_template)
+        if self.module.has_tables:
+            templates.append(self.hash_table_template)
+        if templates:
+            buffer_stmts = list(cst.parse_module(
+                "\n\n".join(templates), config=updated_node.config_for_parsing
+            ).body)
+            buffer_stmts[0] = buffer_stmts[0].with_changes(
+                leading_lines=(cst.EmptyLine(), cst.EmptyLine())
+            )
+            if body:
+                body[0] = body[0].with_changes(
+                    leading_lines=(cst.EmptyLine(), cst.EmptyLine()) + tuple(body[0].leading_lines)
+                )
+        else:
+            buffer_stmts = ()
+
         return updated_node.with_changes(
             body=(
                 cst.parse_statement(
@@ -286,7 +645,9 @@ class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
                 cst.parse_statement(
                     f"import cython as {CY_MOD}", config=updated_node.config_for_parsing
                 ),
-                *updated_node.body,
+                *np_stmts,
+                *buffer_stmts,
+                *body,
             )
         )
 
@@ -308,27 +669,74 @@ class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
                     continue
 
                 if cells.has_args():
-                    if cells.has_typeinfo() and cells.is_arrayable():
+                    if cells.has_typeinfo() and cells.is_buffered():
                         decl_stmts.append(
                             cst.parse_statement(
-                                VAR_PREF
-                                + cells.name
-                                + ": "
-                                + cells.get_array_decl_expr(),
+                                VAR_PREF + cells.name + ": " + cells.get_buffer_decl_expr(),
                                 config=self._module_node.config_for_parsing,
                             )
                         )
+                        if cells.has_flags != TransSpec.FLAGS_NAN:
+                            decl_stmts.append(
+                                cst.parse_statement(
+                                    HAS_PREF + cells.name + ": "
+                                    + cells.get_buffer_decl_expr(is_flag=True),
+                                    config=self._module_node.config_for_parsing,
+                                )
+                            )
+                        if cells.has_overflow():
+                            decl_stmts.append(
+                                cst.parse_statement(
+                                    OVER_PREF + cells.name + ": dict",
+                                    config=self._module_node.config_for_parsing,
+                                )
+                            )
+                    elif cells.has_typeinfo() and cells.is_arrayable():
                         decl_stmts.append(
                             cst.parse_statement(
-                                HAS_PREF
+                                VAR_PREF
                                 + cells.name
                                 + ": "
-                                + cells.get_array_decl_expr(
-                                    rettype_expr=f"{CY_MOD}.{CY_BOOL_T}",
-                                ),
+                                + cells.get_array_decl_expr(),
                                 config=self._module_node.config_for_parsing,
                             )
                         )
+                        if cells.has_flags == TransSpec.FLAGS_ARRAY:
+                            decl_stmts.append(
+                                cst.parse_statement(
+                                    HAS_PREF
+                                    + cells.name
+                                    + ": "
+                                    + cells.get_array_decl_expr(
+                                        rettype_expr=f"{CY_MOD}.{CY_BOOL_T}",
+                                    ),
+                                    config=self._module_node.config_for_parsing,
+                                )
+                            )
+                        elif cells.has_flags == TransSpec.FLAGS_BITS:
+                            decl_stmts.append(
+                                cst.parse_statement(
+                                    HAS_PREF + cells.name + ": " + cells.get_bits_decl_expr(),
+                                    config=self._module_node.config_for_parsing,
+                                )
+                            )
+                        if cells.has_overflow():
+                            decl_stmts.append(
+                                cst.parse_statement(
+                                    OVER_PREF + cells.name + ": dict",
+                                    config=self._module_node.config_for_parsing,
+                                )
+                            )
+                    elif cells.has_typeinfo() and cells.is_hashed():
+                        var_type = get_buffer_type_expr(cells.norm_type)
+                        for stmt in [
+                            f"{VAR_PREF}{cells.name}: {var_type}[::1]",
+                            f"{HAS_PREF}{cells.name}: {CY_MOD}.{CY_FLAG_T_P}[::1]",
+                            f"{KEY_PREF}{cells.name}: {CY_MOD}.{CY_INT_T_P}[:, ::1]",
+                            f"{LEN_PREF}{cells.name}: {CY_MOD}.{CY_INT_T_P}",
+                        ]:
+                            decl_stmts.append(cst.parse_statement(
+                                stmt, config=self._module_node.config_for_parsing))
                     else:
                         decl_stmts.append(
                             cst.parse_statement(
@@ -336,7 +744,7 @@ class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
                                 config=self._module_node.config_for_parsing,
                             )
                         )
-                else:
+                elif not cells.is_constant():
                     rettype = cells.get_rettype_expr()
                     decl_stmts.append(
                         cst.parse_statement(
@@ -352,6 +760,13 @@ class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
                         )
                     )
 
+            if cls_info.shared_cells:
+                # Space the item spaces are created from, None in the space
+                decl_stmts.append(cst.parse_statement(
+                    f"{MX_SHARED}: {cls_name}",
+                    config=self._module_node.config_for_parsing,
+                ))
+
             is_first = True
             for ref in self.module.classes[cls_name].refs.values():
 
@@ -392,22 +807,358 @@ class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
                 decorator=cst.Attribute(value=cst.Name(CY_MOD), attr=cst.Name("cclass"))
             )
 
+            # Parse in a class for the docstring to be indented in the class
+            cls_stmt = cst.parse_statement(
+                f"class {cls_name}:\n" + textwrap.indent(
+                    self._get_clear_cache_code(cls_name), " " * 4),
+                config=self._module_node.config_for_parsing,
+            )
+            meth_stmts = [
+                cls_stmt.body.body[0].with_changes(
+                    leading_lines=(cst.EmptyLine(indent=False),))
+            ]
+            if cls_info.step_groups:
+                cls_stmt = cst.parse_statement(
+                    f"class {cls_name}:\n" + textwrap.indent(
+                        self._get_run_steps_code(cls_name), " " * 4),
+                    config=self._module_node.config_for_parsing,
+                )
+                meth_stmts.append(
+                    cls_stmt.body.body[0].with_changes(
+                        leading_lines=(cst.EmptyLine(indent=False),))
+                )
+
+            columns_stmts = []
+            if "__call__" in cls_info.cells:
+                # Evaluation over item spaces
+                params = cls_info.cells["__call__"].params
+                call_expr = f"{MX_SELF}(*key)" if len(params) > 1 else f"{MX_SELF}(key)"
+                # Parse in a class for the docstring to be indented in the class
+                cls_stmt = cst.parse_statement(
+                    f"class {cls_name}:\n" + textwrap.indent(
+                        self._get_eval_items_code(cls_name, call_expr), " " * 4),
+                    config=self._module_node.config_for_parsing,
+                )
+                meth_stmts.append(
+                    cls_stmt.body.body[0].with_changes(
+                        leading_lines=(cst.EmptyLine(indent=False),))
+                )
+
+                if cls_info.columns.exprs:
+                    cls_stmt = cst.parse_statement(
+                        f"class {cls_name}:\n" + textwrap.indent(
+                            self._get_eval_columns_code(cls_name, call_expr), " " * 4),
+                        config=self._module_node.config_for_parsing,
+                    )
+                    meth_stmts.append(
+                        cls_stmt.body.body[0].with_changes(
+                            leading_lines=(cst.EmptyLine(indent=False),))
+                    )
+                    columns_stmts = [cst.parse_statement(
+                        self._get_columns_code(cls_name),
+                        config=self._module_node.config_for_parsing,
+                    ).with_changes(leading_lines=(cst.EmptyLine(), cst.EmptyLine()))]
+
+                nogil_cells = [c for c in cls_info.cells.values()
+                               if c.is_nogil() and not c.has_args()]
+                if nogil_cells:
+                    cls_stmt = cst.parse_statement(
+                        f"class {cls_name}:\n" + textwrap.indent(
+                            self._get_eval_nogil_code(cls_name, call_expr, nogil_cells),
+                            " " * 4),
+                        config=self._module_node.config_for_parsing,
+                    )
+                    meth_stmts.append(
+                        cls_stmt.body.body[0].with_changes(
+                            leading_lines=(cst.EmptyLine(indent=False),))
+                    )
+
             if decl_stmts:
                 # Add blank lines below classdef
                 decl_stmts[0] = decl_stmts[0].with_changes(
                     leading_lines=tuple(decl_stmts[0].leading_lines) + (cst.EmptyLine(),)
                 )
+
+            body = updated_node.body.body
+            if cls_info.shared_cells:
+                body = tuple(self._add_shared_call(cls_info, stmt) for stmt in body)
+
+            if decl_stmts or meth_stmts:
                 indented_block = cst.ensure_type(
                     updated_node.body, cst.IndentedBlock
-                ).with_changes(body=tuple(decl_stmts) + updated_node.body.body)
-                return updated_node.with_changes(
+                ).with_changes(
+                    body=tuple(decl_stmts) + body + tuple(meth_stmts))
+                cls_node = updated_node.with_changes(
                     decorators=(decorator,), body=indented_block
                 )
             else:
-                return updated_node.with_changes(decorators=(decorator,))
+                cls_node = updated_node.with_changes(
+                    decorators=(decorator,),
+                    body=updated_node.body.with_changes(body=body))
+
+            if columns_stmts:
+                return cst.FlattenSentinel([cls_node] + columns_stmts)
+            else:
+                return cls_node
         else:
             return updated_node
 
+    def _add_shared_call(self, cls_info: ClassInfo, node):
+        """Call shared cells in the space the item spaces are created from
+
+        Example:
+            if self._mx_shared is not None:
+                return self._mx_shared.disc_factors()
+        """
+        if not (m.matches(node, m.FunctionDef()) and node.name.value in cls_info.shared_cells):
+            return node
+
+        cells = cls_info.cells[node.name.value]
+        call_stmt = cst.parse_statement(textwrap.dedent(f"""\
+        if {MX_SELF}.{MX_SHARED} is not None:
+            return {MX_SELF}.{MX_SHARED}.{cells.name}({", ".join(cells.params)})
+        """), config=self._module_node.config_for_parsing)
+
+        return node.with_changes(
+            body=node.body.with_changes(body=(call_stmt,) + tuple(node.body.body)))
+
+    def _get_clear_cache_code(self, cls_name: str) -> str:
+        """Return the method to clear the caches of cells
+
+        Example:
+            if "foo" not in keep:
+                memset(_mx_cy.address(self._has_foo), 0, _mx_cy.sizeof(self._has_foo))
+            if "bar" not in keep:
+                self._has_bar = False
+        """
+        stmts = []
+        for cells in self.module.classes[cls_name].cells.values():
+            if cells.is_special() or cells.is_constant():
+                continue
+            clear_stmts = "".join(
+                " " * 4 + stmt + "\n" for stmt in self._get_cache_clear_stmts(cells))
+            stmts.append(f'if "{cells.name}" not in keep:\n' + clear_stmts)
+
+        return self.clear_cache_template + textwrap.indent("".join(stmts), " " * 4)
+
+    def _get_run_steps_code(self, cls_name: str) -> str:
+        """Return the method to calculate groups of cells in steps
+
+        Example:
+            _mx_stop = 121 if stop < 0 else min(stop, 241)
+            for _mx_t in range(_mx_stop):
+                self.pols_maturity(_mx_t)
+                self.pols_if(_mx_t)
+                self.pols_death(_mx_t)
+                self.pols_lapse(_mx_t)
+        """
+        cls_info = self.module.classes[cls_name]
+        stmts = []
+        for group in cls_info.step_groups:
+            size = cls_info.cells_arg_sizes[(group.param,)][0]
+            start = cls_info.cells_arg_starts[(group.param,)][0]
+            start = f"{start}, " if start else ""
+            traced = [cls_info.cells[name].get_max_arg(group.param) for name in group.cells]
+            traced = max((i for i in traced if i is not None), default=size - 1) + 1
+            stmts.append(
+                f"_mx_stop = {traced} if stop < 0 else min(stop, {size})\n"
+                f"for _mx_t in range({start}_mx_stop):\n"
+                + "".join(f"    {MX_SELF}.{name}(_mx_t)\n" for name in group.cells))
+
+        return self.run_steps_template + textwrap.indent("".join(stmts), " " * 4)
+
+    def _get_cache_clear_stmts(self, cells: CombinedCellsInfo) -> Sequence[str]:
+        v_expr = f"{MX_SELF}.{VAR_PREF}{cells.name}"
+        has_expr = f"{MX_SELF}.{HAS_PREF}{cells.name}"
+
+        if cells.has_args():
+            if cells.has_typeinfo() and cells.is_arrayable():
+                if cells.is_buffered() or cells.has_flags == TransSpec.FLAGS_NAN:
+                    # Same as in __init__
+                    return self._get_cache_init_stmts(cells)
+                else:   # Flags in C arrays or in bits
+                    stmts = [f"memset({CY_MOD}.address({has_expr}), 0, {CY_MOD}.sizeof({has_expr}))"]
+                    if cells.has_overflow():
+                        stmts.append(f"{MX_SELF}.{OVER_PREF}{cells.name} = None")
+                    return stmts
+            elif cells.has_typeinfo() and cells.is_hashed():
+                return self._get_cache_init_stmts(cells)     # Same as in __init__
+            else:
+                return [f"{v_expr} = None"]    # Created again on next call
+        else:
+            if (cells.has_typeinfo() and not cells.is_array_returned
+                    and normalize_type(cells.norm_type) in (bool, numbers.Integral, numbers.Real)):
+                return [f"{has_expr} = False"]
+            else:   # Release the Python object
+                return [f"{has_expr} = False", f"{v_expr} = None"]
+
+    def _get_eval_items_code(self, cls_name: str, call_expr: str) -> str:
+        """Return the method to evaluate cells in item spaces
+
+        Example:
+            if name == "foo" and not args:
+                buf_foo = np.empty(len(keys), dtype=np.float64)
+                view_foo = buf_foo
+                for i in range(len(keys)):
+                    key = keys[i]
+                    is_new = key not in self._mx_itemspaces
+                    item = self(key)
+                    view_foo[i] = item.foo()
+                    if is_new and not keep:
+                        self._mx_itemspaces.pop(key, None)
+                    elif clear:
+                        item._mx_clear_cache(keep=(name,))
+                return buf_foo
+        """
+        decl_stmts = []
+        eval_stmts = []
+        for cells in self.module.classes[cls_name].cells.values():
+            if (cells.is_special() or cells.has_args() or not cells.has_typeinfo()
+                    or cells.is_array_returned or cells.is_constant()
+                    or normalize_type(cells.norm_type) not in (numbers.Integral, numbers.Real)):
+                continue
+            buf, view = f"buf_{cells.name}", f"view_{cells.name}"
+            decl_stmts.append(f"{view}: {get_buffer_type_expr(cells.norm_type)}[::1]")
+            eval_stmts.append(textwrap.dedent(f"""\
+            if name == "{cells.name}" and not args:
+                {buf} = {NP_MOD}.empty(len(keys), dtype={NP_MOD}.{get_dtype_name(cells.norm_type)})
+                {view} = {buf}
+                for i in range(len(keys)):
+                    key = keys[i]
+                    is_new = key not in self.{MX_ITEMSPACES}
+                    item = {call_expr}
+                    {view}[i] = item.{cells.name}()
+                    if is_new and not keep:
+                        self.{MX_ITEMSPACES}.pop(key, None)
+                    elif clear:
+                        item.{MX_CLEAR_CACHE}(keep=(name,))
+                return {buf}
+            """))
+
+        return self.eval_items_template.format(
+            cls_name=cls_name,
+            decl_stmts=("\n" + " " * 4).join(decl_stmts),
+            call_expr=call_expr,
+            eval_stmts=textwrap.indent("".join(eval_stmts), " " * 4).strip()
+        )
+
+    def _get_eval_nogil_code(self, cls_name: str, call_expr: str,
+                             cells_list: Sequence[CombinedCellsInfo]) -> str:
+        """Return the method to evaluate nogil cells in item spaces
+
+        Example:
+            if name == "foo":
+                with _mx_cy.nogil:
+                    val_foo = item.foo()
+                values.append(val_foo)
+        """
+        decl_stmts = []
+        eval_stmts = []
+        for i, cells in enumerate(cells_list):
+            val = f"val_{cells.name}"
+            decl_stmts.append(f"{val}: {cells.get_rettype_expr()}")
+            eval_stmts.append(textwrap.dedent(f"""\
+            {"if" if i == 0 else "elif"} name == "{cells.name}":
+                with {CY_MOD}.nogil:
+                    {val} = item.{cells.name}()
+                values.append({val})
+            """))
+
+        return self.eval_nogil_template.format(
+            cls_name=cls_name,
+            decl_stmts=("\n" + " " * 4).join(decl_stmts),
+            names=repr(tuple(c.name for c in cells_list)),
+            call_expr=call_expr,
+            eval_stmts=textwrap.indent("".join(eval_stmts), " " * 8).strip()
+        )
+
+    def _get_eval_columns_code(self, cls_name: str, call_expr: str) -> str:
+        """Return the method to evaluate cells over arrays of item spaces
+
+        Example:
+            if "term" in cols:
+                cols["term"][i] = item.term
+            if "max_cf" in cols:
+                cols["max_cf"][i] = item.max_cf()
+        """
+        cls_info = self.module.classes[cls_name]
+        columns = cls_info.columns
+        dtypes = {}
+        for name in columns.exprs:
+            dtypes[name] = get_dtype_name(cls_info.cells[name].norm_type)
+        stmts = []
+        for name in sorted(set(n for names in columns.gathered.values() for n in names)):
+            if name in cls_info.refs:
+                dtypes[name] = get_dtype_name(cls_info.refs[name].type_)
+                value = f"item.{name}"
+            else:
+                dtypes[name] = get_dtype_name(cls_info.cells[name].norm_type)
+                value = f"item.{name}()"
+            stmts.append(f'if "{name}" in cols:\n    cols["{name}"][i] = {value}\n')
+
+        return self.eval_columns_template.format(
+            cls_name=cls_name,
+            cols_name=MX_COLUMNS + cls_name,
+            gathered=repr(dict(columns.gathered)),
+            dtypes="{" + ", ".join(f'"{n}": {NP_MOD}.{d}' for n, d in dtypes.items()) + "}",
+            call_expr=call_expr,
+            gather_stmts=textwrap.indent("".join(stmts), " " * 8).strip()
+        )
+
+    def _get_columns_code(self, cls_name: str) -> str:
+        """Return the class calculating formulas over arrays of item spaces
+
+        Cells recursing on previous indexes are calculated forward
+        from the lowest index, as in :meth:`_get_run_steps_code`.
+
+        Example:
+            def disc(self, t):
+                _mx_key = ("disc", t)
+                if _mx_key not in self._mx_memo:
+                    if t > 0 and ("disc", t - 1) not in self._mx_memo:
+                        for _mx_i in range(0, t):
+                            self.disc(_mx_i)
+                    self._mx_memo[_mx_key] = (1.0 if (t == 0) else ...)
+                return self._mx_memo[_mx_key]
+        """
+        cls_info = self.module.classes[cls_name]
+        exprs = cls_info.columns.exprs
+        stmts = []
+        for name, expr in exprs.items():
+            cells = cls_info.cells[name]
+            params = "".join(", " + p for p in cells.params)
+            key = f'("{name}"{params},)' if not cells.params else f'("{name}"{params})'
+
+            group = next((g for g in cls_info.step_groups if name in g.cells), None)
+            if group and all(n in exprs for n in group.cells):
+                param = group.param
+                start = cls_info.cells_arg_starts[(param,)][0]
+                prev = f'("{name}", {param} - 1)'
+                calls = [f"{MX_SELF}.{n}(_mx_i)" for n in group.cells]
+            elif cells.recursion:
+                param, start = cells.recursion
+                args = [f"{p} - 1" if p == param else p for p in cells.params]
+                prev = f'("{name}", {", ".join(args)})'
+                args = ["_mx_i" if p == param else p for p in cells.params]
+                calls = [f"{MX_SELF}.{name}({', '.join(args)})"]
+            else:
+                calls = []
+
+            stmts.append(f"def {name}({MX_SELF}{params}):\n"
+                         f"    _mx_key = {key}\n"
+                         f"    if _mx_key not in {MX_SELF}.{MX_MEMO}:\n")
+            if calls:
+                stmts.append(
+                    f"        if {param} > {start} and {prev} not in {MX_SELF}.{MX_MEMO}:\n"
+                    f"            for _mx_i in range({start}, {param}):\n"
+                    + "".join(f"                {c}\n" for c in calls))
+            stmts.append(f"        {MX_SELF}.{MX_MEMO}[_mx_key] = {expr}\n"
+                         f"    return {MX_SELF}.{MX_MEMO}[_mx_key]\n\n")
+
+        return self.columns_template.format(
+            cls_name=cls_name, cols_name=MX_COLUMNS + cls_name
+        ) + "\n" + textwrap.indent("".join(stmts), " " * 4)
+
     @m.call_if_inside(m.ClassDef())
     @m.call_if_inside(m.FunctionDef(name=cst.Name("__init__")))
     @m.leave(m.SimpleStatementLine())
@@ -432,10 +1183,53 @@ class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
                 == VAR_PREF
             )
         ):
+            attr = original_node.body[0].targets[0].target.attr.value
+            cells = self.module.classes[clsdef.name.value].cells.get(attr[len(VAR_PREF):])
+            if (attr[: len(VAR_PREF)] == VAR_PREF and cells
+                    and cells.has_args() and cells.has_typeinfo()
+                    and (cells.is_arrayable() or cells.is_hashed())):
+                stmts = self._get_cache_init_stmts(cells)
+                if stmts:
+                    return cst.FlattenSentinel([
+                        cst.parse_statement(
+                            stmt, config=self._module_node.config_for_parsing
+                        ) for stmt in stmts
+                    ])
             return cst.RemoveFromParent()
 
         return updated_node
 
+    def _get_cache_init_stmts(self, cells: CombinedCellsInfo) -> Sequence[str]:
+        """Return statements in __init__ to initialize the cache of cells in arrays or tables"""
+        v_expr = f"{MX_SELF}.{VAR_PREF}{cells.name}"
+        has_expr = f"{MX_SELF}.{HAS_PREF}{cells.name}"
+
+        if cells.is_hashed():
+            # Tables are allocated on first call
+            return [f"{v_expr} = None", f"{has_expr} = None",
+                    f"{MX_SELF}.{KEY_PREF}{cells.name} = None",
+                    f"{MX_SELF}.{LEN_PREF}{cells.name} = 0"]
+
+        elif cells.is_buffered():
+            # Memoryviews must be initialized before being tested against None
+            if cells.has_flags == TransSpec.FLAGS_NAN:
+                stmts = [f"{v_expr} = None"]
+            else:
+                stmts = [f"{v_expr} = None", f"{has_expr} = None"]
+
+        elif cells.has_flags == TransSpec.FLAGS_NAN:
+            # Doubles with all bits set are NaN
+            stmts = [f"memset({CY_MOD}.address({v_expr}), 0xFF, {CY_MOD}.sizeof({v_expr}))"]
+
+        else:   # Flags in C arrays are initialized to zero
+            stmts = []
+
+        if cells.has_overflow():
+            # Dicts for args out of the arrays are created on first such call
+            stmts.append(f"{MX_SELF}.{OVER_PREF}{cells.name} = None")
+
+        return stmts
+
     def _add_param_type_hints(
         self, funcdef: cst.FunctionDef, cls_name: str
     ) -> Union[cst.Parameters, NoneType]:
@@ -469,6 +1263,104 @@ class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
 
         return funcdef.params.with_changes(params=tuple(updated_params))
 
+    _itemspace_expr = m.Subscript(
+        value=m.Attribute(value=m.Name(MX_SELF), attr=m.Name(MX_ITEMSPACES)),
+        slice=[m.SubscriptElement(slice=m.Index(value=m.Name("_mx_key")))]
+    )
+
+    def _get_space_class(self, node) -> Union[ClassInfo, NoneType]:
+        # Class of the space whose __call__ contains node
+        while not m.matches(node, m.FunctionDef()):
+            node = self.get_parent(node, level=1)
+        if self.is_space_scope(node):
+            cls_name = cst.ensure_type(self.get_parent(node, level=2), cst.ClassDef).name.value
+            return self.module.classes[cls_name]
+        else:
+            return None
+
+    def _get_max_itemspaces(self, node) -> Union[int, NoneType]:
+        # Limit of item spaces for __call__ containing node
+        cls_info = self._get_space_class(node)
+        return cls_info.max_itemspaces if cls_info else None
+
+    @m.call_if_inside(m.ClassDef())
+    @m.call_if_inside(m.FunctionDef(name=cst.Name("__call__")))
+    @m.leave(m.SimpleStatementLine(body=[m.Return(value=_itemspace_expr)]))
+    def update_itemspace_return(self, original_node, updated_node):
+        """Move an existing item space to the end as the most recently used
+
+        Example:
+            _mx_root = self._mx_itemspaces.pop(_mx_key)
+            self._mx_itemspaces[_mx_key] = _mx_root
+            return _mx_root
+        """
+        if self._get_max_itemspaces(original_node):
+            stmts = [
+                f"_mx_root = {MX_SELF}.{MX_ITEMSPACES}.pop(_mx_key)",
+                f"{MX_SELF}.{MX_ITEMSPACES}[_mx_key] = _mx_root",
+                "return _mx_root"
+            ]
+            return cst.FlattenSentinel([
+                cst.parse_statement(stmt, config=self._module_node.config_for_parsing)
+                for stmt in stmts
+            ])
+        return updated_node
+
+    @m.call_if_inside(m.ClassDef())
+    @m.call_if_inside(m.FunctionDef(name=cst.Name("__call__")))
+    @m.leave(m.SimpleStatementLine(
+        body=[m.Assign(targets=[m.AssignTarget(target=_itemspace_expr)])]))
+    def update_itemspace_assign(self, original_node, updated_node):
+        """Remove the least recently used item space before adding a new one
+
+        Example:
+            if len(self._mx_itemspaces) >= 1000:
+                del self._mx_itemspaces[next(iter(self._mx_itemspaces))]
+            self._mx_itemspaces[_mx_key] = _mx_root
+        """
+        max_itemspaces = self._get_max_itemspaces(original_node)
+        if max_itemspaces is None:
+            return updated_node
+        elif max_itemspaces == 0:
+            return cst.RemoveFromParent()
+        else:
+            evict_stmt = cst.parse_statement(textwrap.dedent(f"""\
+            if len({MX_SELF}.{MX_ITEMSPACES}) >= {max_itemspaces}:
+                del {MX_SELF}.{MX_ITEMSPACES}[next(iter({MX_SELF}.{MX_ITEMSPACES}))]
+            """), config=self._module_node.config_for_parsing)
+            return cst.FlattenSentinel([
+                evict_stmt.with_changes(leading_lines=updated_node.leading_lines),
+                updated_node.with_changes(leading_lines=())
+            ])
+
+    @m.call_if_inside(m.ClassDef())
+    @m.call_if_inside(m.FunctionDef(name=cst.Name("__call__")))
+    @m.leave(m.SimpleStatementLine(body=[m.Assign(
+        targets=[m.AssignTarget(target=m.Name("_mx_root"))],
+        value=m.Call(func=m.Attribute(value=m.Name("_mx_base"), attr=m.Name("__class__"))))]))
+    def update_itemspace_root(self, original_node, updated_node):
+        """Share the values of cells with the space the item space is created from
+
+        Example:
+            _mx_root = _mx_base.__class__(self)
+            _mx_item: _c_Projection = _mx_cy.cast(_c_Projection, _mx_root)
+            _mx_item._mx_shared = self if self._mx_shared is None else self._mx_shared
+        """
+        cls_info = self._get_space_class(original_node)
+        if not (cls_info and cls_info.shared_cells):
+            return updated_node
+
+        cls_name = cls_info.name
+        stmts = [
+            f"_mx_item: {cls_name} = {CY_MOD}.cast({cls_name}, _mx_root)",
+            f"_mx_item.{MX_SHARED} = {MX_SELF} if {MX_SELF}.{MX_SHARED} is None "
+            f"else {MX_SELF}.{MX_SHARED}"
+        ]
+        return cst.FlattenSentinel([updated_node] + [
+            cst.parse_statement(stmt, config=self._module_node.config_for_parsing)
+            for stmt in stmts
+        ])
+
     @m.call_if_inside(m.ClassDef())
     @m.call_if_inside(m.FunctionDef(name=cst.Name(MX_COPY_REFS)))
     @m.call_if_inside(m.SimpleStatementLine())
@@ -494,6 +1386,10 @@ class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
             if meth_name[: len(FORMULA_PREF)] == FORMULA_PREF:
                 # _f_ methods
                 cells = cls_info.cells.get(meth_name[len(FORMULA_PREF):])
+                if cls_info.constant_cells:
+                    updated_node = updated_node.visit(ConstantFolder(cls_info.constant_cells))
+                updated_node = updated_node.visit(ReductionTransformer(
+                    cls_info, self._module_node.config_for_parsing))
 
                 decorators = [
                     cst.Decorator(
@@ -501,7 +1397,7 @@ class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
                             value=cst.Name(CY_MOD), attr=cst.Name("cfunc")
                         )
                     )
-                ]
+                ] + self._get_nogil_decorators(cells)
                 returns = cst.Annotation(
                     annotation=cst.parse_expression(
                         cells.get_rettype_expr(),
@@ -569,7 +1465,7 @@ class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
                             value=cst.Name(CY_MOD), attr=cst.Name("ccall")
                         )
                     )
-                ]
+                ] + self._get_nogil_decorators(cells)
                 # Return type
                 returns = cst.Annotation(
                     annotation=cst.parse_expression(
@@ -582,36 +1478,58 @@ class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
                     parameters = self._add_param_type_hints(
                         updated_node, cls_name=cls_name
                     )
-                    if cells.has_typeinfo() and cells.is_arrayable():
+                    if cells.has_typeinfo() and cells.is_buffered():
+                        return updated_node.with_changes(
+                            decorators=decorators,
+                            params=parameters,
+                            returns=returns,
+                            body=self._get_buffer_body(cells, cls_name, updated_node),
+                        )
+                    elif cells.has_typeinfo() and cells.is_arrayable():
 
                         # Construct indented_block to replace the original one
-                        c_idx_expr = ''.join([f"[{p}]" for p in cells.params])
+                        c_idx_expr = ''.join([f"[{i}]" for i in cells.get_index_exprs()])
                         param_expr = f"{', '.join([p for p in cells.params])}"
 
-                        has_expr = f"{MX_SELF}.{HAS_PREF}{meth_name}{c_idx_expr}"
                         v_expr = f"{MX_SELF}.{VAR_PREF}{meth_name}{c_idx_expr}"
                         f_expr = f"{MX_SELF}.{FORMULA_PREF}{meth_name}({param_expr})"
+                        flag_stmt, has_expr, set_stmt = self._get_flag_exprs(
+                            cells, v_expr, c_idx_expr)
 
                         args = tuple(cells.params)
                         size = cls_info.cells_arg_sizes[args]
+                        start = cls_info.cells_arg_starts[args]
 
                         idx_range = " and ".join(
-                            [f"(0 <= {p} < {i})" for p, i in zip(args, size)])
+                            [f"({lo} <= {p} < {i})" for p, lo, i in zip(args, start, size)])
+
+                        if cells.has_overflow():
+                            raise_stmt = self._get_overflow_stmts(cells)
+                        else:
+                            raise_stmt = 'raise IndexError("array index out of range")'
+                            if cells.is_nogil():
+                                raise_stmt = f"with {CY_MOD}.gil:\n    " + raise_stmt
+
+                        loop_stmts = self._get_loop_stmts(cells) if cells.recursion else ""
 
                         if_stmt = textwrap.dedent(f"""\
                         if {idx_range}:
+                            {flag_stmt}
                             if {has_expr}:
                                 return {v_expr}
                             else:
+                                {{loop_stmts}}
                                 val = {f_expr}
                                 {v_expr} = val
-                                {has_expr} = True
+                                {set_stmt}
                                 return val
                         else:
-                            raise IndexError("array index out of range")
-                        """)
+                            {{raise_stmt}}
+                        """).format(raise_stmt=textwrap.indent(raise_stmt, " " * 4).strip(),
+                                    loop_stmts=textwrap.indent(loop_stmts, " " * 8).strip())
                         if_node = cst.parse_statement(
-                            if_stmt, config=self._module_node.config_for_parsing
+                            _remove_blank_lines(if_stmt),
+                            config=self._module_node.config_for_parsing
                         )
                         indented_block = cst.ensure_type(
                             updated_node.body, cst.IndentedBlock
@@ -623,6 +1541,13 @@ class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
                             returns=returns,
                             body=indented_block,
                         )
+                    elif cells.has_typeinfo() and cells.is_hashed():
+                        return updated_node.with_changes(
+                            decorators=decorators,
+                            params=parameters,
+                            returns=returns,
+                            body=self._get_table_body(cells, updated_node),
+                        )
                     else:
                         return updated_node.with_changes(
                             decorators=decorators,
@@ -630,6 +1555,19 @@ class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
                             returns=returns,
                             body=self._add_dict_assign(meth_name, updated_node)
                         )
+                elif cells.is_constant():
+                    # Return the literal without caching it
+                    return_stmt = cst.parse_statement(
+                        f"return {cls_info.constant_cells[meth_name]}",
+                        config=self._module_node.config_for_parsing
+                    )
+                    return updated_node.with_changes(
+                        decorators=decorators,
+                        returns=returns,
+                        body=cst.ensure_type(
+                            updated_node.body, cst.IndentedBlock
+                        ).with_changes(body=(return_stmt,))
+                    )
                 else:   # No type info, no arg
                     return updated_node.with_changes(
                         decorators=decorators,
@@ -639,6 +1577,275 @@ class ModuleTransformer(m.MatcherDecoratableTransformer, ParentScopeAddin):
 
         return updated_node
 
+    def _get_nogil_decorators(self, cells: CombinedCellsInfo) -> list:
+        if cells.is_nogil():
+            return [
+                cst.Decorator(decorator=cst.parse_expression(
+                    expr, config=self._module_node.config_for_parsing))
+                for expr in [f"{CY_MOD}.nogil", f"{CY_MOD}.exceptval(-1, check=True)"]
+            ]
+        else:
+            return []
+
+    def _get_flag_exprs(self, cells: CombinedCellsInfo, v_expr: str, idx_expr: str,
+                        indexes: Sequence[str] = (), var: str = "_mx_k"):
+        """Return code to test and set the flag of a value in the array
+
+        Returns a tuple of a statement to run before the test,
+        an expression to test if the value is calculated, and a statement
+        to mark the value as calculated. The statements can be empty.
+        ``indexes`` are the expressions of the args in ``idx_expr``
+        if other than the params, and ``var`` is the variable
+        the statement assigns the index of the flag bit to.
+        """
+        has_expr = f"{MX_SELF}.{HAS_PREF}{cells.name}"
+
+        if cells.has_flags == TransSpec.FLAGS_NAN:
+            return "", f"not isnan({v_expr})", ""
+
+        elif cells.has_flags == TransSpec.FLAGS_BITS:
+            return (
+                f"{var}: {CY_MOD}.longlong = {cells.get_flat_index_expr(indexes)}",
+                f"{has_expr}[{var} >> 3] & (1 << ({var} & 7))",
+                f"{has_expr}[{var} >> 3] |= 1 << ({var} & 7)"
+            )
+
+        else:
+            return "", f"{has_expr}{idx_expr}", f"{has_expr}{idx_expr} = True"
+
+    def _get_loop_stmts(self, cells: CombinedCellsInfo) -> str:
+        """Return code to calculate values forward up to the index called
+
+        Values are calculated from the index next to the highest
+        calculated one below, or from the base index, so the formula
+        does not recurse more than once.
+
+        Example:
+            .. code-block:: python
+
+                _mx_i: _mx_cy.longlong = t
+                while _mx_i > 0:
+                    if self._has_pols_if[_mx_i - 1]:
+                        break
+                    _mx_i -= 1
+                while _mx_i < t:
+                    self._v_pols_if[_mx_i] = self._f_pols_if(_mx_i)
+                    self._has_pols_if[_mx_i] = True
+                    _mx_i += 1
+        """
+        param, base = cells.recursion
+
+        def get_exprs(index, var):
+            indexes = [index if p == param else p for p in cells.params]
+            idx_expr = "".join(f"[{i}]" for i in cells.get_index_exprs(indexes))
+            v_expr = f"{MX_SELF}.{VAR_PREF}{cells.name}{idx_expr}"
+            return (v_expr, f"{MX_SELF}.{FORMULA_PREF}{cells.name}({', '.join(indexes)})",
+                    *self._get_flag_exprs(cells, v_expr, idx_expr, indexes, var))
+
+        _, _, prev_flag_stmt, prev_has_expr, _ = get_exprs("(_mx_i - 1)", "_mx_m")
+        v_expr, f_expr, flag_stmt, _, set_stmt = get_exprs("_mx_i", "_mx_n")
+
+        return _remove_blank_lines(textwrap.dedent(f"""\
+            _mx_i: {cells.get_argtype_expr(param)} = {param}
+            while _mx_i > {base}:
+                {prev_flag_stmt}
+                if {prev_has_expr}:
+                    break
+                _mx_i -= 1
+            while _mx_i < {param}:
+                {flag_stmt}
+                {v_expr} = {f_expr}
+                {set_stmt}
+                _mx_i += 1
+            """))
+
+    def _get_buffer_body(self, cells: CombinedCellsInfo, cls_name: str,
+                         updated_node) -> cst.IndentedBlock:
+        """Replace method body to look up values in buffers
+
+        Example:
+            if (0 <= i) and (0 <= j):
+                if self._v_bar is None or not ((i < self._v_bar.shape[0]) and (j < self._v_bar.shape[1])):
+                    self._v_bar = _mx_grow_buffer(
+                        self._v_bar, (i, j), (6, 11), _mx_np.longlong, 0)
+                    self._has_bar = _mx_grow_buffer(
+                        self._has_bar, (i, j), (6, 11), _mx_np.int8, 0)
+            else:
+                if self._over_bar is None:
+                    self._over_bar = {}
+                elif (i, j) in self._over_bar:
+                    return self._over_bar[i, j]
+                val = self._f_bar(i, j)
+                self._over_bar[i, j] = val
+                return val
+            if self._has_bar[i, j]:
+                return self._v_bar[i, j]
+            else:
+                val = self._f_bar(i, j)
+                self._v_bar[i, j] = val
+                self._has_bar[i, j] = True
+                return val
+        """
+        name = cells.name
+        args = tuple(cells.params)
+        cls_info = self.module.classes[cls_name]
+        size = cls_info.get_array_lengths(args)
+        start = cls_info.cells_arg_starts[args]
+
+        indexes = cells.get_index_exprs()
+        idx_expr = ", ".join(indexes)
+        idx_tuple = f"({idx_expr},)" if len(args) == 1 else f"({idx_expr})"
+        v_expr = f"{MX_SELF}.{VAR_PREF}{name}"
+        has_expr = f"{MX_SELF}.{HAS_PREF}{name}"
+
+        lower_range = " and ".join([f"({lo} <= {p})" for p, lo in zip(args, start)])
+        upper_range = " and ".join(
+            [f"({i} < {v_expr}.shape[{n}])" for n, i in enumerate(indexes)])
+
+        if cells.has_flags == TransSpec.FLAGS_NAN:
+            fill = f"{NP_MOD}.nan"
+            grow_has = ""
+        else:
+            fill = "0"
+            grow_has = (f"{has_expr} = {MX_GROW_BUFFER}("
+                        f"{has_expr}, {idx_tuple}, {size}, "
+                        f"{NP_MOD}.{cells.get_dtype_name(is_flag=True)}, 0)")
+
+        flag_stmt, test_expr, set_stmt = self._get_flag_exprs(
+            cells, f"{v_expr}[{idx_expr}]", f"[{idx_expr}]")
+
+        if cells.has_overflow():
+            else_stmts = self._get_overflow_stmts(cells)
+        else:
+            else_stmts = 'raise IndexError("array index out of range")'
+
+        stmts = textwrap.dedent(f"""\
+        if {lower_range}:
+            if {v_expr} is None or not ({upper_range}):
+                {v_expr} = {MX_GROW_BUFFER}(
+                    {v_expr}, {idx_tuple}, {size}, {NP_MOD}.{cells.get_dtype_name()}, {fill})
+                {grow_has}
+        else:
+            {{else_stmts}}
+        {flag_stmt}
+        if {test_expr}:
+            return {v_expr}[{idx_expr}]
+        else:
+            val = {MX_SELF}.{FORMULA_PREF}{name}({", ".join(args)})
+            {v_expr}[{idx_expr}] = val
+            {set_stmt}
+            return val
+        """).format(else_stmts=textwrap.indent(else_stmts, " " * 4).strip())
+        body = cst.parse_module(
+            _remove_blank_lines(stmts), config=self._module_node.config_for_parsing
+        ).body
+
+        return cst.ensure_type(
+            updated_node.body, cst.IndentedBlock
+        ).with_changes(body=tuple(body))
+
+    def _get_overflow_stmts(self, cells: CombinedCellsInfo) -> str:
+        """Return statements to cache values for args out of the arrays in a dict
+
+        Example:
+            if self._over_foo is None:
+                self._over_foo = {}
+            elif i in self._over_foo:
+                return self._over_foo[i]
+            val = self._f_foo(i)
+            self._over_foo[i] = val
+            return val
+        """
+        over_expr = f"{MX_SELF}.{OVER_PREF}{cells.name}"
+        key_expr = ", ".join(cells.params)
+        in_expr = key_expr if len(cells.params) == 1 else f"({key_expr})"
+
+        return textwrap.dedent(f"""\
+        if {over_expr} is None:
+            {over_expr} = {{}}
+        elif {in_expr} in {over_expr}:
+            return {over_expr}[{key_expr}]
+        val = {MX_SELF}.{FORMULA_PREF}{cells.name}({key_expr})
+        {over_expr}[{key_expr}] = val
+        return val
+        """)
+
+    def _get_table_body(self, cells: CombinedCellsInfo, updated_node) -> cst.IndentedBlock:
+        """Replace method body to look up values in a hash table
+
+        Example:
+            _mx_key: _mx_cy.longlong[2]
+            _mx_i: _mx_cy.Py_ssize_t
+            _mx_key[0] = _mx_cy.cast(_mx_cy.p_longlong, _mx_cy.address(r))[0]
+            _mx_key[1] = n
+            if self._has_foo is None:
+                self._key_foo, self._v_foo, self._has_foo = _mx_grow_table(
+                    None, None, None, 2, _mx_np.float64)
+            _mx_i = _mx_find_key(self._key_foo, self._has_foo, _mx_key)
+            if self._has_foo[_mx_i]:
+                return self._v_foo[_mx_i]
+            else:
+                val = self._f_foo(r, n)
+                if 2 * (self._len_foo + 1) > self._has_foo.shape[0]:
+                    self._key_foo, self._v_foo, self._has_foo = _mx_grow_table(
+                        self._key_foo, self._v_foo, self._has_foo, 2, _mx_np.float64)
+                _mx_i = _mx_find_key(self._key_foo, self._has_foo, _mx_key)
+                self._key_foo[_mx_i, 0] = _mx_key[0]
+                self._key_foo[_mx_i, 1] = _mx_key[1]
+                self._v_foo[_mx_i] = val
+                self._has_foo[_mx_i] = 1
+                self._len_foo += 1
+                return val
+        """
+        name = cells.name
+        nkeys = len(cells.params)
+        v_expr = f"{MX_SELF}.{VAR_PREF}{name}"
+        has_expr = f"{MX_SELF}.{HAS_PREF}{name}"
+        key_expr = f"{MX_SELF}.{KEY_PREF}{name}"
+        len_expr = f"{MX_SELF}.{LEN_PREF}{name}"
+        dtype = f"{NP_MOD}.{get_dtype_name(cells.norm_type)}"
+        table = f"{key_expr}, {v_expr}, {has_expr}"
+
+        key_stmts = []
+        set_stmts = []
+        for i, p in enumerate(cells.params):
+            if cells.is_real_arg(p):    # Bits of doubles
+                key_stmts.append(f"_mx_key[{i}] = {CY_MOD}.cast("
+                                 f"{CY_MOD}.p_{CY_INT_T_P}, {CY_MOD}.address({p}))[0]")
+            else:
+                key_stmts.append(f"_mx_key[{i}] = {p}")
+            set_stmts.append(f"{key_expr}[_mx_i, {i}] = _mx_key[{i}]")
+
+        stmts = textwrap.dedent(f"""\
+        _mx_key: {CY_MOD}.{CY_INT_T_P}[{nkeys}]
+        _mx_i: {CY_MOD}.Py_ssize_t
+        {{key_stmts}}
+        if {has_expr} is None:
+            {table} = {MX_GROW_TABLE}(
+                None, None, None, {nkeys}, {dtype})
+        _mx_i = {MX_FIND_KEY}({key_expr}, {has_expr}, _mx_key)
+        if {has_expr}[_mx_i]:
+            return {v_expr}[_mx_i]
+        else:
+            val = {MX_SELF}.{FORMULA_PREF}{name}({", ".join(cells.params)})
+            if 2 * ({len_expr} + 1) > {has_expr}.shape[0]:
+                {table} = {MX_GROW_TABLE}(
+                    {table}, {nkeys}, {dtype})
+            _mx_i = {MX_FIND_KEY}({key_expr}, {has_expr}, _mx_key)
+            {{set_stmts}}
+            {v_expr}[_mx_i] = val
+            {has_expr}[_mx_i] = 1
+            {len_expr} += 1
+            return val
+        """).format(key_stmts="\n".join(key_stmts),
+                    set_stmts=("\n" + " " * 4).join(set_stmts))
+
+        body = cst.parse_module(stmts, config=self._module_node.config_for_parsing).body
+
+        return cst.ensure_type(
+            updated_node.body, cst.IndentedBlock
+        ).with_changes(body=tuple(body))
+
     def _add_dict_assign(self, meth_name: str, updated_node) -> cst.IndentedBlock:
         """Add dict assignment in method
 
@@ -1,6 +1,9 @@
 import enum
 import numbers
 import ctypes
+import builtins
+import importlib
+import logging
 
 from modelx_cython.consts import CY_MOD
 
@@ -9,6 +12,12 @@ CY_INT_T = "long long"
 CY_INT_T_P = "longlong"     # For Pure Python syntax
 CY_INT_C_TYPE = ctypes.c_longlong
 CY_FLOAT_T = "double"
+CY_FLAG_T = "signed char"   # bint cannot be the item type of memoryviews
+CY_FLAG_T_P = "schar"       # For Pure Python syntax
+CY_BITS_T = "unsigned char"
+CY_BITS_T_P = "uchar"       # For Pure Python syntax
+
+_logger = logging.getLogger(__name__)
 
 
 str_to_type = {
@@ -59,4 +68,59 @@ def get_type_expr(typ, c_style=False):
     elif issubclass(typ, str):
         return "str"
     else:
-        return "object"
\ No newline at end of file
+        return "object"
+
+def get_buffer_type_expr(typ, c_style=False):
+    """Return the item type of a memoryview for values of typ"""
+    if issubclass(typ, bool):
+        if c_style:
+            return CY_FLAG_T
+        else:
+            return f"{CY_MOD}.{CY_FLAG_T_P}"
+    else:
+        return get_type_expr(typ, c_style=c_style)
+
+
+def get_dtype_name(typ) -> str:
+    """Return the name of the numpy dtype matching get_buffer_type_expr"""
+    if issubclass(typ, bool):
+        return "int8"
+    elif issubclass(typ, numbers.Integral):
+        return "longlong"
+    elif issubclass(typ, numbers.Real):
+        return "float64"
+    else:
+        raise ValueError(f"no buffer type for {typ}")
+
+
+def get_type_name(typ: type) -> str:
+    return typ.__module__ + "." + typ.__qualname__
+
+
+def find_type(name: str) -> type:
+    """Return the type whose name is returned by get_type_name
+
+    ``object`` is returned if the type cannot be imported.
+    """
+    module, _, qualname = name.rpartition(".")
+    if module == builtins.__name__ and qualname == "NoneType":
+        return type(None)
+
+    while module:
+        try:
+            obj = importlib.import_module(module)
+        except ImportError:
+            module, _, attr = module.rpartition(".")
+            qualname = attr + "." + qualname
+            continue
+        try:
+            for attr in qualname.split("."):
+                obj = getattr(obj, attr)
+        except AttributeError:
+            break
+        if isinstance(obj, type):
+            return obj
+        break
+
+    _logger.warning(f"type '{name}' not found, replaced with 'object'")
+    return object